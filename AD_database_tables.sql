@@ -1,6 +1,9 @@
 SET FOREIGN_KEY_CHECKS = 0;
 
 -- Drop tables in reverse order of dependency
+DROP TABLE IF EXISTS Identifier_Lookup;
+DROP TABLE IF EXISTS Gene_Aliases;
+DROP TABLE IF EXISTS Pathway_DE_Summary;
 DROP TABLE IF EXISTS TF_CRE_Interactions;
 DROP TABLE IF EXISTS CRE_Gene_Interactions;
 DROP TABLE IF EXISTS Gene_Pathway_Associations;
@@ -12,6 +15,8 @@ DROP TABLE IF EXISTS Biological_Pathways;
 DROP TABLE IF EXISTS Genes;
 DROP TABLE IF EXISTS Cell_Type;
 DROP TABLE IF EXISTS Conditions;
+DROP TABLE IF EXISTS Data_Version;
+DROP TABLE IF EXISTS Schema_Migrations; -- a rebuilt schema needs every migration again
 
 -- Re-enable foreign key checks
 SET FOREIGN_KEY_CHECKS = 1;
@@ -111,10 +116,26 @@ CREATE TABLE Gene_Pathway_Associations (
     FOREIGN KEY (pid) REFERENCES Biological_Pathways(pid), -- merge based on pathway name 
     Primary key (gid, pid));
 
+CREATE TABLE Pathway_DE_Summary ( -- precomputed per condition/cell type/pathway, rebuilt by pathway_summary.sql
+    cdid INT not null,
+    cell_id INT not null,
+    pid INT not null,
+    gene_count INT not null, -- significant (padj < 0.05) genes in the pathway
+    up_regulated INT not null,
+    down_regulated INT not null,
+    avg_fold_change DOUBLE,
+    min_padj DOUBLE,
+    regulation_direction enum('up', 'down') not null,
+    FOREIGN KEY (cdid) REFERENCES Conditions(cdid),
+    Foreign key (cell_id) references Cell_Type (cell_id),
+    FOREIGN KEY (pid) REFERENCES Biological_Pathways(pid),
+    Primary key (cdid, cell_id, pid),
+    INDEX idx_pathway_summary_top (cdid, cell_id, regulation_direction, min_padj));
 
+CREATE TABLE Data_Version ( -- single row, bumped by every bulk load; the web app keys its caches on it
+    id TINYINT not null default 1,
+    version INT not null default 0,
+    loaded_at TIMESTAMP not null default CURRENT_TIMESTAMP on update CURRENT_TIMESTAMP,
+    Primary key (id));
 
-
-
-
-
-
+INSERT INTO Data_Version (id, version) VALUES (1, 0);
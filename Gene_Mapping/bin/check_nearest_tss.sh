@@ -0,0 +1,52 @@
+#!/usr/bin/env bash
+# Check nearest_tss.py against `bedtools closest -d` on fixtures/nearest_tss.
+#
+#   check_nearest_tss.sh                 compare with the committed expected.closest.bed
+#   check_nearest_tss.sh --regenerate    first rewrite expected.closest.bed with bedtools 2.30
+#
+# When bedtools is on the PATH the output is also compared with a live
+# bedtools run. expected.closest.bed must come from --regenerate (bedtools
+# 2.30.0, as in envs/mapping_env.yml), never from editing it by hand;
+# expected.closest.source records which bedtools wrote it. The check fails
+# while the fixture is unverified and no live bedtools run was compared.
+set -euo pipefail
+
+here="$(cd "$(dirname "$0")" && pwd)"
+fixture="$here/../fixtures/nearest_tss"
+expected="$fixture/expected.closest.bed"
+source_note="$fixture/expected.closest.source"
+work="$(mktemp -d)"
+trap 'rm -rf "$work"' EXIT
+
+# Inputs sorted as modules/bedtools_closest does; cres.bed has a header line
+tail -n +2 "$fixture/cres.bed" | LC_ALL=C sort -k1,1 -k2,2n > "$work/cres.bed"
+LC_ALL=C sort -k1,1 -k2,2n "$fixture/tss.bed" > "$work/tss.bed"
+
+if [[ "${1:-}" == "--regenerate" ]]; then
+    version="$(bedtools --version 2>/dev/null || true)"
+    if [[ "$version" != "bedtools v2.30."* ]]; then
+        echo "bedtools 2.30 is required to regenerate $expected (found: ${version:-none})" >&2
+        exit 2
+    fi
+    bedtools closest -a "$work/cres.bed" -b "$work/tss.bed" -d > "$expected"
+    echo "$version closest -d" > "$source_note"
+    echo "Regenerated $expected with $version"
+fi
+
+python3 "$here/nearest_tss.py" closest --tss "$fixture/tss.bed" --skip-header 1 \
+    "$fixture/cres.bed" -o "$work/ours.closest.bed"
+status=0
+python3 "$here/nearest_tss.py" compare "$work/ours.closest.bed" "$expected" || status=1
+
+if command -v bedtools > /dev/null; then
+    bedtools closest -a "$work/cres.bed" -b "$work/tss.bed" -d > "$work/bedtools.closest.bed"
+    echo "Against $(bedtools --version):"
+    python3 "$here/nearest_tss.py" compare "$work/ours.closest.bed" "$work/bedtools.closest.bed" || status=1
+elif [[ "$(cat "$source_note")" != bedtools* ]]; then
+    echo "bedtools not found, and $expected was not written by bedtools: run with --regenerate" \
+         "under bedtools 2.30 before relying on the numpy engine" >&2
+    status=3
+else
+    echo "bedtools not found; compared with the fixture from $(cat "$source_note")" >&2
+fi
+exit $status
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Combine per-sample *_mapped_cres.tsv tables into the loader's CRE inputs.
+
+Does what data_parsing.ipynb did by hand after the mapping step. It tags
+each sample with its condition and cell type, and keeps one row per
+(condition, cell type, CRE) for unique_cres.csv and one per (condition,
+cell type, CRE, gene) for unique_cres_genes.csv. The 'chr' prefix is
+stripped to match the Genes table. CREs on chromosomes without a TSS
+(distance -1) have no gene and are left out of the gene table.
+
+    export_cre_tables.py --sample h1_mapped_cres.tsv IFN ESC \\
+                         --sample wtc11_mapped_cres.tsv IFN iPSC \\
+                         --cres unique_cres.csv --cre-genes unique_cres_genes.csv
+"""
+
+import argparse
+import sys
+
+import pandas as pd
+
+CRE_COLUMNS = ['condition', 'cell_type', 'chr', 'start', 'end', 'cre_log2foldchange',
+               'merged_chr', 'merged_start', 'merged_end']
+CRE_GENE_COLUMNS = ['condition', 'cell_type', 'chr', 'start', 'end', 'entrez', 'distance_to_tss']
+
+
+def read_sample(path, condition, cell_type):
+    """One mapped table with its condition and cell type prepended."""
+    frame = pd.read_csv(path, sep='\t', dtype={'chr': str, 'merged_chr': str, 'entrez': str})
+    frame.insert(0, 'condition', condition)
+    frame.insert(1, 'cell_type', cell_type)
+    return frame
+
+
+def strip_chr(series):
+    return series.str.replace('chr', '', regex=False)
+
+
+def export_tables(samples, cres_path, cre_genes_path):
+    """Write both loader CSVs; returns (CRE rows, CRE-gene rows)."""
+    mapped = pd.concat([read_sample(*sample) for sample in samples], ignore_index=True)
+
+    cres = mapped.drop_duplicates(subset=['condition', 'cell_type', 'chr', 'start', 'end'])[CRE_COLUMNS].copy()
+    cres['chr'] = strip_chr(cres['chr'])
+    cres['merged_chr'] = strip_chr(cres['merged_chr'])
+    cres.to_csv(cres_path, index=False)
+
+    cre_genes = mapped[mapped['distance_to_tss'] >= 0]
+    cre_genes = cre_genes.drop_duplicates(
+        subset=['condition', 'cell_type', 'chr', 'start', 'end', 'entrez'])[CRE_GENE_COLUMNS].copy()
+    cre_genes['chr'] = strip_chr(cre_genes['chr'])
+    cre_genes.to_csv(cre_genes_path, index=False)
+    return len(cres), len(cre_genes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build unique_cres.csv and unique_cres_genes.csv.")
+    parser.add_argument('--sample', nargs=3, action='append', required=True,
+                        metavar=('MAPPED_TSV', 'CONDITION', 'CELL_TYPE'))
+    parser.add_argument('--cres', required=True, help='unique CRE table to write')
+    parser.add_argument('--cre-genes', required=True, help='CRE-gene table to write')
+    args = parser.parse_args()
+
+    cres, cre_genes = export_tables(args.sample, args.cres, args.cre_genes)
+    print(f"Wrote {cres:,} CREs and {cre_genes:,} CRE-gene links from {len(args.sample)} sample(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
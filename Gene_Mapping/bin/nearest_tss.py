@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Nearest-TSS mapping for CRE BED files, a numpy replacement for `bedtools closest -d`.
+
+The TSS BED is sorted once into a per-chromosome index (.npz). Each CRE
+file is then answered with searchsorted over that index instead of
+re-sorting the reference and shelling out to bedtools for every sample.
+
+Output matches `bedtools closest -a <sorted cres> -b <sorted tss> -d` (the
+default `-t all`):
+  * lines follow `sort -k1,1 -k2,2n` order of the CREs, then of the TSSs
+  * a TSS overlapping the CRE is reported with distance 0, and if any
+    overlaps exist only the overlapping TSSs are reported
+  * otherwise the nearest TSS on either side is reported at distance
+    gap + 1 (book-ended intervals are 1 apart), with every tie on both sides
+  * a CRE on a chromosome with no TSS gets a null record: '.', -1, -1,
+    score -1, '.' for the other TSS fields, and distance -1
+
+    nearest_tss.py index gencode...TSSUp0Down1bp...bed.gz tss_index.npz
+    nearest_tss.py closest --index tss_index.npz --skip-header 1 cres.bed -o sample.closest.bed
+    nearest_tss.py compare sample.closest.bed bedtools.closest.bed
+
+bin/check_nearest_tss.sh runs closest and compare on fixtures/nearest_tss,
+against its bedtools 2.30 output and a live bedtools run when one is available.
+"""
+
+import argparse
+import gzip
+import sys
+
+import numpy as np
+
+NULL_DISTANCE = -1
+
+
+def open_text(path):
+    """Open plain or gzipped text."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt')
+    return open(path)
+
+
+def read_bed(path, skip_header=0):
+    """BED records as (chrom, start, end, line) in `sort -k1,1 -k2,2n` order.
+
+    GNU sort breaks (chrom, start) ties by comparing whole lines, so the line
+    is the last sort key. Track, browser and # lines are skipped.
+    """
+    records = []
+    with open_text(path) as handle:
+        for _ in range(skip_header):
+            next(handle, None)
+        for line in handle:
+            line = line.rstrip('\n')
+            if not line or line.startswith(('#', 'track', 'browser')):
+                continue
+            fields = line.split('\t', 3)
+            records.append((fields[0], int(fields[1]), int(fields[2]), line))
+    records.sort(key=lambda record: (record[0], record[1], record[3]))
+    return records
+
+
+class TSSIndex:
+    """Per-chromosome TSS intervals sorted by start, with the raw BED lines for output."""
+
+    def __init__(self, chromosomes, field_count):
+        # chromosome -> (starts, ends, end_order, lines)
+        self.chromosomes = chromosomes
+        self.field_count = field_count
+
+    @classmethod
+    def from_records(cls, records):
+        grouped = {}
+        for chrom, start, end, line in records:
+            grouped.setdefault(chrom, []).append((start, end, line))
+        chromosomes = {}
+        for chrom, rows in grouped.items():
+            starts = np.array([row[0] for row in rows], dtype=np.int64)
+            ends = np.array([row[1] for row in rows], dtype=np.int64)
+            lines = np.array([row[2] for row in rows], dtype=object)
+            chromosomes[chrom] = cls._arrays(starts, ends, lines)
+        field_count = len(records[0][3].split('\t')) if records else 3
+        return cls(chromosomes, field_count)
+
+    @classmethod
+    def from_bed(cls, path):
+        return cls.from_records(read_bed(path))
+
+    @staticmethod
+    def _arrays(starts, ends, lines):
+        end_order = np.argsort(ends, kind='stable')
+        return starts, ends, end_order, lines
+
+    def save(self, path):
+        """Write the index as .npz; lines are stored as one UTF-8 blob plus offsets."""
+        arrays = {'field_count': np.array(self.field_count)}
+        for i, (chrom, (starts, ends, _, lines)) in enumerate(self.chromosomes.items()):
+            encoded = [line.encode('utf-8') for line in lines]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(item) for item in encoded])
+            arrays[f'chrom_{i}'] = np.array(chrom)
+            arrays[f'starts_{i}'] = starts
+            arrays[f'ends_{i}'] = ends
+            arrays[f'offsets_{i}'] = offsets
+            arrays[f'lines_{i}'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        chromosomes = {}
+        with np.load(path) as data:
+            field_count = int(data['field_count'])
+            i = 0
+            while f'chrom_{i}' in data:
+                blob = data[f'lines_{i}'].tobytes()
+                offsets = data[f'offsets_{i}']
+                lines = np.array([blob[offsets[j]:offsets[j + 1]].decode('utf-8')
+                                  for j in range(len(offsets) - 1)], dtype=object)
+                chromosomes[str(data[f'chrom_{i}'])] = cls._arrays(
+                    data[f'starts_{i}'], data[f'ends_{i}'], lines)
+                i += 1
+        return cls(chromosomes, field_count)
+
+    def null_record(self):
+        """What bedtools prints in place of the TSS fields when a chromosome has none."""
+        fields = ['.', '-1', '-1'] + ['.'] * (self.field_count - 3)
+        if self.field_count >= 5:
+            fields[4] = '-1'
+        return '\t'.join(fields)
+
+    def closest(self, chrom, a_starts, a_ends):
+        """Closest TSSs for CREs on one chromosome.
+
+        Returns (cre positions, TSS positions, distances, signed distances)
+        ordered by CRE then TSS. Signed distances are negative when the TSS
+        lies before the CRE on the chromosome.
+        """
+        arrays = self.chromosomes.get(chrom)
+        if arrays is None:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty, empty
+        starts, ends, end_order, _ = arrays
+        ends_sorted = ends[end_order]
+        a_starts = np.asarray(a_starts, dtype=np.int64)
+        a_ends = np.asarray(a_ends, dtype=np.int64)
+        cre_index = np.arange(len(a_starts))
+
+        # TSSs starting before the CRE ends, and TSSs ending at or before it starts
+        starting_before_end = np.searchsorted(starts, a_ends, side='left')
+        ending_before_start = np.searchsorted(ends_sorted, a_starts, side='right')
+        has_overlap = starting_before_end - ending_before_start > 0
+
+        pieces = []
+
+        # Overlaps: scan the start-sorted candidates that could still reach the CRE
+        if has_overlap.any():
+            max_length = int((ends - starts).max())
+            cres = cre_index[has_overlap]
+            lo = np.searchsorted(starts, a_starts[cres] - max_length, side='left')
+            hi = starting_before_end[cres]
+            owner, tss = expand_ranges(cres, lo, hi)
+            hit = ends[tss] > a_starts[owner]
+            owner, tss = owner[hit], tss[hit]
+            pieces.append((owner, tss, np.zeros(len(owner), dtype=np.int64), np.zeros(len(owner), dtype=np.int64)))
+
+        # Otherwise the nearest TSS ending before the CRE and the nearest starting after it
+        cres = cre_index[~has_overlap]
+        if len(cres):
+            no_left = ending_before_start[cres] == 0
+            no_right = starting_before_end[cres] >= len(starts)
+            left_end = ends_sorted[np.maximum(ending_before_start[cres] - 1, 0)]
+            right_start = starts[np.minimum(starting_before_end[cres], len(starts) - 1)]
+            left_distance = np.where(no_left, np.iinfo(np.int64).max, a_starts[cres] - left_end + 1)
+            right_distance = np.where(no_right, np.iinfo(np.int64).max, right_start - a_ends[cres] + 1)
+            best = np.minimum(left_distance, right_distance)
+
+            # Every TSS sharing the nearest end (left) or nearest start (right) is a tie
+            take_left = left_distance == best
+            left_cres = cres[take_left]
+            lo = np.searchsorted(ends_sorted, left_end[take_left], side='left')
+            owner, rank = expand_ranges(left_cres, lo, ending_before_start[left_cres])
+            distance = a_starts[owner] - ends_sorted[rank] + 1
+            pieces.append((owner, end_order[rank], distance, -distance))
+
+            take_right = right_distance == best
+            right_cres = cres[take_right]
+            lo = starting_before_end[right_cres]
+            hi = np.searchsorted(starts, right_start[take_right], side='right')
+            owner, tss = expand_ranges(right_cres, lo, hi)
+            distance = starts[tss] - a_ends[owner] + 1
+            pieces.append((owner, tss, distance, distance))
+
+        owner = np.concatenate([piece[0] for piece in pieces])
+        tss = np.concatenate([piece[1] for piece in pieces])
+        distance = np.concatenate([piece[2] for piece in pieces])
+        signed = np.concatenate([piece[3] for piece in pieces])
+        order = np.lexsort((tss, owner))
+        return owner[order], tss[order], distance[order], signed[order]
+
+
+def expand_ranges(owners, lo, hi):
+    """Flatten [lo, hi) ranges into (owner, position) pairs."""
+    counts = np.maximum(hi - lo, 0)
+    owner = np.repeat(owners, counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, np.repeat(lo, counts) + offsets
+
+
+def closest_lines(index, cre_records, signed=False):
+    """Yield bedtools-style output lines for CRE records from read_bed()."""
+    null = index.null_record()
+    by_chrom = {}
+    for record in cre_records:
+        by_chrom.setdefault(record[0], []).append(record)
+
+    for chrom in sorted(by_chrom):
+        records = by_chrom[chrom]
+        owner, tss, distance, signed_distance = index.closest(
+            chrom, [record[1] for record in records], [record[2] for record in records])
+        lines = index.chromosomes[chrom][3] if chrom in index.chromosomes else None
+        k = 0
+        for i, record in enumerate(records):
+            if k >= len(owner) or owner[k] != i:
+                extra = f"\t{NULL_DISTANCE}" if signed else ''
+                yield f"{record[3]}\t{null}\t{NULL_DISTANCE}{extra}"
+                continue
+            while k < len(owner) and owner[k] == i:
+                extra = f"\t{signed_distance[k]}" if signed else ''
+                yield f"{record[3]}\t{lines[tss[k]]}\t{distance[k]}{extra}"
+                k += 1
+
+
+def compare_outputs(ours, theirs, limit=10):
+    """Print differing lines between two closest outputs; returns the number of differences."""
+    with open_text(ours) as a, open_text(theirs) as b:
+        a_lines = [line.rstrip('\n') for line in a]
+        b_lines = [line.rstrip('\n') for line in b]
+    differences = 0
+    for number in range(max(len(a_lines), len(b_lines))):
+        left = a_lines[number] if number < len(a_lines) else '<missing>'
+        right = b_lines[number] if number < len(b_lines) else '<missing>'
+        if left != right:
+            differences += 1
+            if differences <= limit:
+                print(f"line {number + 1}:\n  ours:     {left}\n  bedtools: {right}")
+    print(f"{len(a_lines):,} vs {len(b_lines):,} lines, {differences:,} differing")
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nearest-TSS mapping equivalent to `bedtools closest -d`.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('index', help='sort a TSS BED (optionally gzipped) into an .npz index')
+    build.add_argument('tss', help='TSS BED or BED.gz')
+    build.add_argument('output', help='.npz index to write')
+
+    closest = commands.add_parser('closest', help='closest TSS for every CRE')
+    source = closest.add_mutually_exclusive_group(required=True)
+    source.add_argument('--index', help='.npz index from the index command')
+    source.add_argument('--tss', help='TSS BED to index on the fly')
+    closest.add_argument('cres', help='CRE BED')
+    closest.add_argument('--skip-header', type=int, default=0, help='leading CRE lines to skip')
+    closest.add_argument('--signed', action='store_true',
+                         help='append a signed distance column (negative when the TSS is before the CRE)')
+    closest.add_argument('-o', '--output', help='output file (default stdout)')
+
+    compare = commands.add_parser('compare', help='diff our output against a bedtools closest output')
+    compare.add_argument('ours')
+    compare.add_argument('bedtools')
+
+    args = parser.parse_args()
+
+    if args.command == 'index':
+        index = TSSIndex.from_bed(args.tss)
+        index.save(args.output)
+        print(f"Indexed {sum(len(arrays[0]) for arrays in index.chromosomes.values()):,} TSSs "
+              f"on {len(index.chromosomes)} chromosomes")
+        return 0
+
+    if args.command == 'compare':
+        return 1 if compare_outputs(args.ours, args.bedtools) else 0
+
+    index = TSSIndex.load(args.index) if args.index else TSSIndex.from_bed(args.tss)
+    cres = read_bed(args.cres, skip_header=args.skip_header)
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for line in closest_lines(index, cres, signed=args.signed):
+            output.write(line + '\n')
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,59 @@
 #!/usr/bin/env nextflow
 
+include { PREPARE_TSS } from './modules/prepare_tss'
+include { SHARD_CRES } from './modules/shard_cres'
+include { NEAREST_TSS } from './modules/nearest_tss'
 include { BEDTOOLS_CLOSEST } from './modules/bedtools_closest'
+include { GATHER_MAPPED_CRES } from './modules/gather_mapped_cres'
+include { EXPORT_CRE_TABLES } from './modules/export_cre_tables'
 
 workflow {
 
     Channel.fromPath(params.cres)
         .splitCsv(header: true)
-        .map { row -> tuple(row.name, file(row.path)) }
-        .set { cres_ch }
+        .map { row -> tuple(row.name, file(row.path), row.condition, row.cell_type) }
+        .set { samples_ch }
 
-    BEDTOOLS_CLOSEST(params.tss, cres_ch)
+    // Sorted and indexed once, shared by every shard of every sample
+    PREPARE_TSS(file(params.tss))
 
-}
\ No newline at end of file
+    // Scatter: one shard per chromosome per sample. The group key carries the
+    // shard count so each sample is gathered as soon as its last shard is done.
+    SHARD_CRES(samples_ch.map { name, path, condition, cell_type -> tuple(name, path) })
+
+    SHARD_CRES.out
+        .flatMap { name, shards ->
+            def files = shards instanceof List ? shards : [shards]
+            files.collect { shard -> tuple(groupKey(name, files.size()), shard.baseName, shard) }
+        }
+        .set { shards_ch }
+
+    if (params.engine == 'bedtools') {
+        closest_ch = BEDTOOLS_CLOSEST(PREPARE_TSS.out.bed, shards_ch)
+    } else {
+        closest_ch = NEAREST_TSS(PREPARE_TSS.out.index, shards_ch)
+    }
+
+    // Gather: put each sample's shards back in chromosome order
+    closest_ch
+        .groupTuple()
+        .map { name, chroms, files ->
+            tuple(name.toString(), [chroms, files].transpose().sort { it[0] }.collect { it[1] })
+        }
+        .join(samples_ch.map { name, path, condition, cell_type -> tuple(name, condition, cell_type) })
+        .map { name, files, condition, cell_type -> tuple(name, condition, cell_type, files) }
+        .set { gathered_ch }
+
+    GATHER_MAPPED_CRES(gathered_ch)
+
+    GATHER_MAPPED_CRES.out
+        .toSortedList { a, b -> a[0] <=> b[0] }
+        .multiMap { rows ->
+            samples: rows.collect { name, condition, cell_type, mapped -> [name, condition, cell_type] }
+            mapped: rows.collect { it[3] }
+        }
+        .set { mapped_ch }
+
+    EXPORT_CRE_TABLES(mapped_ch.samples, mapped_ch.mapped)
+
+}
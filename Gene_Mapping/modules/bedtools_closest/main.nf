@@ -0,0 +1,19 @@
+#!/usr/bin/env nextflow
+
+process BEDTOOLS_CLOSEST {
+    label 'process_single'
+    container 'quay.io/biocontainers/bedtools:2.30.0--h468198e_3'
+
+    input:
+    path(sorted_tss)
+    tuple val(name), val(chrom), path(shard)
+
+    output:
+    tuple val(name), val(chrom), path("${name}.${chrom}.closest.bed")
+
+    script:
+    """
+    LC_ALL=C sort -k1,1 -k2,2n $shard > sorted_cres.bed
+    bedtools closest -a sorted_cres.bed -b $sorted_tss -d > ${name}.${chrom}.closest.bed
+    """
+}
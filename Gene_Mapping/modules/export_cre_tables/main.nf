@@ -0,0 +1,21 @@
+#!/usr/bin/env nextflow
+
+process EXPORT_CRE_TABLES {
+    label 'process_single'
+    publishDir "$params.outdir", mode: 'copy'
+    conda "${projectDir}/envs/mapping_env.yml"
+
+    input:
+    val(samples)
+    path(mapped)
+
+    output:
+    path("unique_cres.csv"), emit: cres
+    path("unique_cres_genes.csv"), emit: cre_genes
+
+    script:
+    def args = samples.collect { name, condition, cell_type -> "--sample '${name.toLowerCase()}_mapped_cres.tsv' '${condition}' '${cell_type}'" }.join(' ')
+    """
+    export_cre_tables.py $args --cres unique_cres.csv --cre-genes unique_cres_genes.csv
+    """
+}
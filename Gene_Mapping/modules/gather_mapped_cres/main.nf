@@ -0,0 +1,19 @@
+#!/usr/bin/env nextflow
+
+process GATHER_MAPPED_CRES {
+    label 'process_single'
+    publishDir "$params.outdir", mode: 'copy'
+
+    input:
+    tuple val(name), val(condition), val(cell_type), path(shards, stageAs: 'shards/*')
+
+    output:
+    tuple val(name), val(condition), val(cell_type), path("${name.toLowerCase()}_mapped_cres.tsv")
+
+    script:
+    // Shards arrive in chromosome order, so concatenating them keeps `sort -k1,1 -k2,2n` order
+    """
+    printf '${params.mapped_header.join('\\t')}\\n' > ${name.toLowerCase()}_mapped_cres.tsv
+    cat ${shards} >> ${name.toLowerCase()}_mapped_cres.tsv
+    """
+}
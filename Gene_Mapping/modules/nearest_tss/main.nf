@@ -0,0 +1,18 @@
+#!/usr/bin/env nextflow
+
+process NEAREST_TSS {
+    label 'process_single'
+    conda "${projectDir}/envs/mapping_env.yml"
+
+    input:
+    path(tss_index)
+    tuple val(name), val(chrom), path(shard)
+
+    output:
+    tuple val(name), val(chrom), path("${name}.${chrom}.closest.bed")
+
+    script:
+    """
+    nearest_tss.py closest --index $tss_index $shard -o ${name}.${chrom}.closest.bed
+    """
+}
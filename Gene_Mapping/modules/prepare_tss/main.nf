@@ -0,0 +1,19 @@
+#!/usr/bin/env nextflow
+
+process PREPARE_TSS {
+    label 'process_medium'
+    conda "${projectDir}/envs/mapping_env.yml"
+
+    input:
+    path(tss)
+
+    output:
+    path("sorted_tss.bed"), emit: bed
+    path("tss_index.npz"), emit: index
+
+    script:
+    """
+    zcat -f $tss | LC_ALL=C sort -k1,1 -k2,2n --parallel=${task.cpus} -S 25% > sorted_tss.bed
+    nearest_tss.py index sorted_tss.bed tss_index.npz
+    """
+}
@@ -0,0 +1,17 @@
+#!/usr/bin/env nextflow
+
+process SHARD_CRES {
+    label 'process_single'
+
+    input:
+    tuple val(name), path(cres)
+
+    output:
+    tuple val(name), path("shards/*.bed")
+
+    script:
+    """
+    mkdir shards
+    tail -n +2 $cres | awk -F '\\t' '{ print > ("shards/" \$1 ".bed") }'
+    """
+}
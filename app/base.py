@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-from flask import Flask, request, render_template, jsonify, redirect, url_for, send_file, make_response, session
+from flask import Flask, request, render_template, jsonify, redirect, url_for, send_file, make_response, Response, stream_with_context, stream_template, g
 import mariadb
 from string import Template
 import json
@@ -9,492 +9,1241 @@ import csv
 import io
 import datetime
 import uuid
+import base64
+import time
+import re
+import zlib
+import gzip
+from urllib.parse import urlencode, parse_qsl
 import shutil
 from werkzeug.utils import secure_filename
+from werkzeug.datastructures import MultiDict
 import tempfile
+import importlib.util
 import sys
 import traceback
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from db_pool import ConnectionPool, PoolTimeout
+from result_cache import ResultCache, make_cache_key
+from saved_store import SavedResultStore
+from gene_lists import (GeneListError, GeneListStore, ensure_gene_list_tables, gene_list_id,
+                        gene_list_table, load_gene_list_table, parse_identifiers)
+from identifiers import GENE_ID_TYPES, IdentifierResolver, normalize_identifier
+from pathway_index import PathwayIndex, normalize_pathway_text
+from dimensions import DimensionSnapshot
+import metrics
+import compression
+from volcano_data import VOLCANO_COLUMNS, build_columnar_payload
 
-app = Flask(__name__, template_folder='templates', static_folder='static')
-
-# Ensure Jinja2 is set up correctly
-app.jinja_env.auto_reload = True
-app.config['TEMPLATES_AUTO_RELOAD'] = True
-app.secret_key = 'your_secret_key_here'  # Required for session
-
-# Directory to store saved results
-SAVE_DIR = '/var/www/html/students_25/Team7/app/saved_results'
-try:
-    if not os.path.exists(SAVE_DIR):
-        os.makedirs(SAVE_DIR)
-    test_file = os.path.join(SAVE_DIR, 'test_write.txt')
-    with open(test_file, 'w') as f:
-        f.write('test')
-    print(f"Successfully verified write permissions to {SAVE_DIR}")
-except Exception as e:
-    print(f"Warning: Could not write to {SAVE_DIR}: {str(e)}")
-    SAVE_DIR = tempfile.mkdtemp(prefix='genomic_results_')
-    print(f"Using temporary directory instead: {SAVE_DIR}")
-    
-SAVE_METADATA = os.path.join(SAVE_DIR, 'saved_files.json')
-saved_files = {}
-
-def connect_database(hostname='bioed-new.bu.edu', port=4253, database='Team7', 
-                    username='', password=''):
-    """Connect to the MariaDB database."""
-    try:
-        connection = mariadb.connect(
-            host=hostname,
-            user=username,
-            password=password,
-            db=database,
-            port=int(port)
-        )
-        cursor = connection.cursor()
-        return connection, cursor
-    except mariadb.Error as e:
-        return None, str(e)
+DEFAULT_SAVE_DIR = '/var/www/html/students_25/Team7/app/saved_results'
 
-def execute_query(cursor, condition_name, cell_type, gene_params, 
-                  output_fields, cre_fields, tf_fields, include_de=False, 
-                  de_params=None, cre_params=None, tf_params=None,
-                  page=1, per_page=50):
-    """Execute queries based on parameters with pagination."""
-    # Build the base query
-    query_parts = ["SELECT DISTINCT"]
-    select_fields = []
-    
-    # Add requested gene fields
-    if len(output_fields) > 0:
-        for field in output_fields:
-            if field == 'hgnc':
-                select_fields.append("g.gene_symbol as hgnc_symbol")
-            elif field == 'entrez':
-                select_fields.append("g.Entrez_ID as entrez_id")
-            elif field == 'ensembl':
-                select_fields.append("g.Ensembl_ID as ensembl_id")
-            elif field == 'chr':
-                select_fields.append("g.chromosome")
-            elif field == 'start':
-                select_fields.append("g.start_position")
-            elif field == 'end':
-                select_fields.append("g.end_position")
-            elif field == 'strand':
-                select_fields.append("g.strand")
-            elif field == 'pathway':
-                select_fields.append("bp.name as pathway")
-    
-    # Add DE fields if requested
-    if include_de and de_params:
-        de_fields = de_params.get('de_fields', [])
-        for field in de_fields:
-            select_fields.append(f"de.{field}")
-    
-    # Add related CRE info if requested
-    if len(cre_fields) > 0:
-        for field in cre_fields:
-            if field == 'cre_chr':
-                select_fields.append("cre.chromosome as cre_chr")
-            elif field == 'cre_start':
-                select_fields.append("cre.start_position as cre_start")
-            elif field == 'cre_end':
-                select_fields.append("cre.end_position as cre_end")
-            elif field == 'cre_log2fc':
-                select_fields.append("cre.cre_log2foldchange as cre_log2fc")
-            elif field == 'cre_padj':
-                select_fields.append("cre.padj as cre_padj")
-            elif field == 'cre_distance':
-                select_fields.append("cgi.distance_to_TSS as cre_distance")
-    
-    if len(tf_fields) > 0:
-        for field in tf_fields:
-            if field == 'tf_checkbox':
-                select_fields.append("tf.name as tf")            
+def config_from_env():
+    """App settings from the environment; create_app() overrides take precedence."""
+    return {
+        'SECRET_KEY': os.environ.get('SECRET_KEY', 'your_secret_key_here'),  # Required for session
+        'TEMPLATES_AUTO_RELOAD': True,
+        # Directory to store saved results and uploaded gene lists
+        'SAVE_DIR': os.environ.get('SAVE_DIR', DEFAULT_SAVE_DIR),
+        'DB_HOST': os.environ.get('DB_HOST', 'bioed-new.bu.edu'),
+        'DB_PORT': int(os.environ.get('DB_PORT', 4253)),
+        'DB_NAME': os.environ.get('DB_NAME', 'Team7'),
+        'DB_USER': os.environ.get('DB_USER', ''),
+        'DB_PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        # Connection pool tuning (one pool per worker process)
+        'DB_POOL_SIZE': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'DB_POOL_TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'DB_POOL_RECYCLE': float(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'DB_POOL_PING_INTERVAL': float(os.environ.get('DB_POOL_PING_INTERVAL', 5)),
+        'SAVED_FILE_MAX_AGE': int(os.environ.get('SAVED_FILE_MAX_AGE', 86400)),
+        'SAVED_COMPRESS_LEVEL': int(os.environ.get('SAVED_COMPRESS_LEVEL', 6)),
+        'GENE_LIST_MAX_IDS': int(os.environ.get('GENE_LIST_MAX_IDS', 50000)),
+        'COMPRESS_RESPONSES': os.environ.get('COMPRESS_RESPONSES', 'on') != 'off',
+        'COMPRESS_MIN_BYTES': int(os.environ.get('COMPRESS_MIN_BYTES', 1024)),
+        'RESULT_CACHE_MAX_ENTRIES': int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 2048)),
+        'RESULT_CACHE_TTL': float(os.environ.get('RESULT_CACHE_TTL', 3600)),
+        'RESULT_CACHE_MAX_BYTES': int(os.environ.get('RESULT_CACHE_MAX_BYTES', 128 * 1024 * 1024)),
+        'DATA_VERSION_CHECK_INTERVAL': float(os.environ.get('DATA_VERSION_CHECK_INTERVAL', 30)),
+        'DIMENSION_MAX_AGE': int(os.environ.get('DIMENSION_MAX_AGE', 60)),
+        'COUNT_WORKERS': int(os.environ.get('COUNT_WORKERS', 4)),
+        'INTERVAL_INDEX': os.environ.get('INTERVAL_INDEX', 'on') != 'off',
+        'INTERVAL_INDEX_DIR': os.environ.get('INTERVAL_INDEX_DIR'),  # optional snapshot directory
+        'INTERVAL_PREFILTER_MAX_IDS': int(os.environ.get('INTERVAL_PREFILTER_MAX_IDS', 5000)),
+        'IDENTIFIER_RESOLVER': os.environ.get('IDENTIFIER_RESOLVER', 'on') != 'off',
+        'PATHWAY_INDEX': os.environ.get('PATHWAY_INDEX', 'on') != 'off',
+        'PATHWAY_PREFILTER_MAX_IDS': int(os.environ.get('PATHWAY_PREFILTER_MAX_IDS', 5000)),
+        'SLOW_QUERY_LOG_MS': float(os.environ.get('SLOW_QUERY_LOG_MS', 0)),  # 0 = off
+        'SLOW_QUERY_LOG': os.environ.get('SLOW_QUERY_LOG'),
+    }
 
-                
-    # Base cases
-    if not select_fields and len(output_fields) > 0: 
-        select_fields = ["g.gene_symbol as hgnc_symbol", "g.Entrez_ID as entrez_id", "g.chromosome", "g.start_position", "g.end_position"]
-    elif not select_fields and len(output_fields) == 0 and len(cre_fields) > 0:
-        select_fields = ["cre.chromosome as cre_chr", "cre.start_position as cre_start", "cre.end_position as cre_end", "cre.cre_log2foldchange as cre_log2fc"]
-    elif not select_fields and len(output_fields) == 0 and len(cre_fields) == 0 and len(tf_fields) > 0:
-        select_fields = ["tf.name as tf"]
-    elif not select_fields and len(output_fields) == 0 and len(cre_fields) == 0 and len(tf_fields) == 0:
-        select_fields = ["c.name as condition_name", "ct.cell as cell_type"]
-    
-    query_parts.append(", ".join(select_fields))   
-    
-    # Basic gene query 
-    query_parts.append("""
-    FROM Genes g
-    JOIN Differential_Expression de ON g.gid = de.gid
-    JOIN Conditions c ON de.cdid = c.cdid AND c.name = %s
-    JOIN Cell_Type ct ON de.cell_id = ct.cell_id AND ct.cell = %s
-    JOIN Gene_Pathway_Associations gpa ON g.gid = gpa.gid
-    JOIN Biological_Pathways bp ON gpa.pid = bp.pid
-    """)
-    
-    # Add related CRE info 
-    if len(cre_fields) > 0 or len(cre_params) > 0:
-        query_parts.append("""
-        JOIN CRE_Gene_Interactions cgi ON g.gid = cgi.gid
-        JOIN Cis_Regulatory_Elements cre ON cgi.cid = cre.cid AND cre.cdid = c.cdid AND cre.cell_id = ct.cell_id
-        """)
-        
-    # safeguard if user bypasses cre to get tfs
-    if (len(tf_fields)+len(tf_params)) > 0 and (len(cre_fields)+len(cre_params)) == 0:
-        query_parts.append("""
-        JOIN CRE_Gene_Interactions cgi ON g.gid = cgi.gid
-        JOIN Cis_Regulatory_Elements cre ON cgi.cid = cre.cid AND cre.cdid = c.cdid AND cre.cell_id = ct.cell_id
-        """)
-        if len(cre_fields) == 0:
-            cre_fields = ["cre_chr", "cre_start", "cre_end"]
-        if len(cre_params) == 0:
-            cre_params = {}
-        
-    # include tfs
-    if len(tf_fields) > 0 or len(tf_params) > 0:
-        query_parts.append("""
-        JOIN Merged_CRES mc ON cre.mcid = mc.mcid
-        JOIN TF_CRE_Interactions tci ON mc.mcid = tci.mcid AND tci.cdid = c.cdid AND tci.cell_id = ct.cell_id
-        JOIN Transcription_Factors tf ON tci.tfid = tf.tfid
-        """)
+# Settings of the most recently created app; read from the environment if there is none
+_config = None
+
+def get_config():
+    global _config
+    if _config is None:
+        _config = config_from_env()
+    return _config
+
+# Views and request hooks, registered on each app by create_app()
+_routes = []
+
+def route(rule, **options):
+    """Record a view function for create_app() to register under its own name."""
+    def decorator(view):
+        _routes.append((rule, options, view))
+        return view
+    return decorator
+
+SAVED_PER_PAGE = 20
+GENE_LIST_REPORT_MAX = 500  # unmatched identifiers listed back to the user
+
+_save_dir = None
+_saved_store = None  # saved-result metadata; a saved_files.json from older versions is imported on first use
+_gene_list_store = None  # uploaded gene lists, shared by the worker processes through the save directory
+_storage_lock = threading.Lock()
+
+def _init_storage():
+    """Create the save directory and its stores on first use, not at import.
+
+    Falls back to a temporary directory (one per process) when the
+    configured one cannot be created or written.
+    """
+    global _save_dir, _saved_store, _gene_list_store
+    with _storage_lock:
+        if _save_dir is not None:
+            return
+        save_dir = get_config()['SAVE_DIR']
+        try:
+            os.makedirs(save_dir, exist_ok=True)
+            if not os.access(save_dir, os.W_OK):
+                raise PermissionError("directory is not writable")
+        except OSError as e:
+            print(f"Warning: Could not write to {save_dir}: {str(e)}")
+            save_dir = tempfile.mkdtemp(prefix='genomic_results_')
+            print(f"Using temporary directory instead: {save_dir}")
+        _saved_store = SavedResultStore(os.path.join(save_dir, 'saved_results.db'),
+                                        legacy_json=os.path.join(save_dir, 'saved_files.json'))
+        _gene_list_store = GeneListStore(os.path.join(save_dir, 'gene_lists'))
+        _save_dir = save_dir
+
+def get_save_dir():
+    if _save_dir is None:
+        _init_storage()
+    return _save_dir
+
+def get_saved_store():
+    if _save_dir is None:
+        _init_storage()
+    return _saved_store
+
+def get_gene_list_store():
+    if _save_dir is None:
+        _init_storage()
+    return _gene_list_store
+
+def db_settings(config):
+    """Connection arguments for the pool from the app settings."""
+    return {
+        'host': config['DB_HOST'],
+        'port': config['DB_PORT'],
+        'db': config['DB_NAME'],
+        'user': config['DB_USER'],
+        'password': config['DB_PASSWORD'],
+        # Grouped pathway lists can be long; the 1 KB default would truncate them
+        'init_command': "SET SESSION group_concat_max_len = 1048576"
+    }
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return this worker's connection pool, creating it on first use."""
+    global _pool, _pool_pid
+    # Forked workers must not share sockets with the parent, so key on the pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                config = get_config()
+                _pool = ConnectionPool(
+                    size=config['DB_POOL_SIZE'],
+                    timeout=config['DB_POOL_TIMEOUT'],
+                    recycle=config['DB_POOL_RECYCLE'],
+                    ping_interval=config['DB_POOL_PING_INTERVAL'],
+                    **db_settings(config)
+                )
+                _pool_pid = os.getpid()
+    return _pool
+
+@contextmanager
+def db_cursor(**cursor_kwargs):
+    """Check out a pooled connection and yield a cursor on it."""
+    with get_pool().connection() as connection:
+        cursor = connection.cursor(**cursor_kwargs)
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+def start_request_metrics():
+    """Label this request's spans and queries with its endpoint and start the clock."""
+    g.request_started = time.perf_counter()
+    metrics.current_route.set(request.endpoint or 'unmatched')
+
+def record_request_metrics(response):
+    """Record response size and total time; streamed bodies are measured when they finish."""
+    route = metrics.current_route.get()
+    status = str(response.status_code)
+    started = g.get('request_started', time.perf_counter())
+    if response.is_streamed and not response.direct_passthrough:
+        # Templates render while the body streams, so that time is the 'render' phase
+        render_started = time.perf_counter()
+        def finished(size):
+            now = time.perf_counter()
+            metrics.PHASE_SECONDS.observe(now - render_started, route, 'render')
+            metrics.RESPONSE_BYTES.observe(size, route)
+            metrics.REQUEST_SECONDS.observe(now - started, route, status)
+        response.response = metrics.count_streamed_bytes(response.response, finished)
+    else:
+        metrics.RESPONSE_BYTES.observe(response.content_length or 0, route)
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, route, status)
+    return response
+
+# Response compression, negotiated per request from Accept-Encoding
+COMPRESSIBLE_MIMETYPES = ('text/html', 'application/json', 'text/csv', 'text/tab-separated-values',
+                          'text/plain', 'text/css', 'application/javascript')
+
+def compress_response(response):
+    """gzip or Brotli text responses the client accepts; streamed bodies are compressed as they stream."""
+    config = get_config()
+    if (not config['COMPRESS_RESPONSES'] or response.status_code not in (200, 201)
+            or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    if not response.is_streamed and (response.content_length or 0) < config['COMPRESS_MIN_BYTES']:
+        return response
+    encoding = compression.choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = compression.compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(compression.compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+# Conditional GETs: data responses only change with the data version
+def normalized_params(values):
+    """Sorted (name, value) pairs of a request's non-empty parameters."""
+    return sorted((key, value.strip()) for key, value in values.items(multi=True) if value.strip())
+
+def data_etag(route_name, params):
+    """ETag of a data route's response: the data version plus its normalized parameters."""
+    return f"v{get_data_version()}-{make_cache_key(route_name, params)[:20]}"
+
+def is_not_modified(etag):
+    """True when the client already holds the response tagged ``etag``."""
+    return request.method in ('GET', 'HEAD') and request.if_none_match.contains_weak(etag)
+
+def with_etag(response, etag):
+    """Tag a response so browsers keep it and revalidate before each reuse."""
+    # Weak, because the compressed and uncompressed bodies share it
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def not_modified_response(etag):
+    return with_etag(Response(status=304), etag)
+
+# Selectable output columns: form value -> (SQL expression, column name)
+GENE_OUTPUT_COLUMNS = {
+    'hgnc': ("g.gene_symbol", "hgnc_symbol"),
+    'entrez': ("g.Entrez_ID", "entrez_id"),
+    'ensembl': ("g.Ensembl_ID", "ensembl_id"),
+    'chr': ("g.chromosome", "chromosome"),
+    'start': ("g.start_position", "start_position"),
+    'end': ("g.end_position", "end_position"),
+    'strand': ("g.strand", "strand"),
+    # One row per gene with its pathways grouped, instead of one row per pathway.
+    # Deferred: select_rows() computes it from the row key of the rows a page keeps
+    'pathway': ("""(SELECT GROUP_CONCAT(bp.name ORDER BY bp.name SEPARATOR '; ')
+        FROM Gene_Pathway_Associations gpa
+        JOIN Biological_Pathways bp ON gpa.pid = bp.pid
+        WHERE gpa.gid = page.row_gid)""", "pathway")
+}
+DEFERRED_COLUMNS = {'pathway': ('g',)}  # column name -> aliases whose row key it reads
+DE_OUTPUT_COLUMNS = {
+    'baseMean': ("de.baseMean", "baseMean"),
+    'log2foldchange': ("de.log2foldchange", "log2foldchange"),
+    'p_value': ("de.p_value", "p_value"),
+    'padj': ("de.padj", "padj")
+}
+CRE_OUTPUT_COLUMNS = {
+    'cre_chr': ("cre.chromosome", "cre_chr"),
+    'cre_start': ("cre.start_position", "cre_start"),
+    'cre_end': ("cre.end_position", "cre_end"),
+    'cre_log2fc': ("cre.cre_log2foldchange", "cre_log2fc"),
+    'cre_padj': ("cre.padj", "cre_padj"),
+    'cre_distance': ("cgi.distance_to_TSS", "cre_distance")
+}
+TF_OUTPUT_COLUMNS = {
+    'tf_checkbox': ("tf.name", "tf")
+}
+
+# Row key of each table an output column can come from, in sort order. A
+# search returns one row per combination of the keys of the tables it
+# selects from, ordered and paged by those indexed integer keys.
+ROW_KEYS = (
+    (('g', 'de', 'cgi'), ("g.gid", "row_gid")),
+    (('cre', 'cgi'), ("cre.cid", "row_cid")),
+    (('tf',), ("tci.tfid", "row_tfid")),
+    (('c',), ("c.cdid", "row_cdid")),
+    (('ct',), ("ct.cell_id", "row_cell_id")),
+)
+
+# Optional joins in join order: (alias, JOIN clause, aliases it needs).
+# Genes, Differential_Expression, Conditions and Cell_Type are always joined
+# because they scope the search to one condition and cell type. TFs join on
+# cre.mcid directly; Merged_CRES adds nothing the foreign key doesn't guarantee.
+SEARCH_JOINS = [
+    # cgi always brings cre: the CRE row is what scopes a link to the condition
+    ('cgi', "JOIN CRE_Gene_Interactions cgi ON g.gid = cgi.gid", ('cre',)),
+    ('cre', "JOIN Cis_Regulatory_Elements cre ON cgi.cid = cre.cid AND cre.cdid = c.cdid AND cre.cell_id = ct.cell_id", ('cgi',)),
+    ('tci', "JOIN TF_CRE_Interactions tci ON cre.mcid = tci.mcid AND tci.cdid = c.cdid AND tci.cell_id = ct.cell_id", ('cre',)),
+    ('tf', "JOIN Transcription_Factors tf ON tci.tfid = tf.tfid", ('tci',))
+]
+
+def build_search_query(condition_name, cell_type, gene_params, 
+                       output_fields, cre_fields, tf_fields, include_de=False, 
+                       de_params=None, cre_params=None, tf_params=None):
+    """Plan the search query, joining only the tables its fields and filters use.
+
+    Returns (base_query, params, layout). The base query selects the row
+    key columns and the output columns that are not deferred, and always
+    ends inside its WHERE clause so callers can append further AND
+    predicates. layout is (row_keys, columns): the (expression, column
+    name) pairs of the row key and of every output column, for
+    select_rows(), order_by_clause() and build_seek_predicate().
+    """
+    gene_params = gene_params or {}
+    de_params = de_params or {}
+    cre_params = cre_params or {}
+    tf_params = tf_params or {}
     
+    select_columns = []
+    for field in output_fields:
+        if field in GENE_OUTPUT_COLUMNS:
+            select_columns.append(GENE_OUTPUT_COLUMNS[field])
+    if include_de:
+        for field in de_params.get('de_fields') or []:
+            if field in DE_OUTPUT_COLUMNS:
+                select_columns.append(DE_OUTPUT_COLUMNS[field])
+    for field in cre_fields:
+        if field in CRE_OUTPUT_COLUMNS:
+            select_columns.append(CRE_OUTPUT_COLUMNS[field])
+    for field in tf_fields:
+        if field in TF_OUTPUT_COLUMNS:
+            select_columns.append(TF_OUTPUT_COLUMNS[field])
+    
+    # Base cases
+    if not select_columns and len(output_fields) > 0:
+        select_columns = [GENE_OUTPUT_COLUMNS[f] for f in ('hgnc', 'entrez', 'chr', 'start', 'end')]
+    elif not select_columns and len(cre_fields) > 0:
+        select_columns = [CRE_OUTPUT_COLUMNS[f] for f in ('cre_chr', 'cre_start', 'cre_end', 'cre_log2fc')]
+    elif not select_columns and len(tf_fields) > 0:
+        select_columns = [TF_OUTPUT_COLUMNS['tf_checkbox']]
+    elif not select_columns:
+        select_columns = [("c.name", "condition_name"), ("ct.cell", "cell_type")]
     
     params = [condition_name, cell_type]
-    # Add WHERE clause
-    query_parts.append("WHERE 1=1")
-    
-    # Add gene-specific filters
-    if len(gene_params) > 0:
-        if gene_params.get('gene-id-type') and gene_params.get('gene-identifier'):
-            id_type = gene_params.get('gene-id-type')
-            identifier = gene_params.get('gene-identifier')
-            if id_type == 'hgnc':
-                query_parts.append("AND lower(g.gene_symbol) = lower(%s)")
-                params.append(identifier)
-            elif id_type == 'entrez':
-                query_parts.append("AND g.Entrez_ID = %s")
-                params.append(identifier)
-            elif id_type == 'ensembl':
-                query_parts.append("AND g.Ensembl_ID = %s")
-                params.append(identifier)
-
-    # Add chromosome, position, and pathway filters if provided
-    if len(gene_params) > 0:
+    where = ["WHERE 1=1"]
+    
+    # Gene-specific filters
+    gene_list_join = ""
+    list_id = gene_params.get('gene-list-id')
+    if list_id:
+        if get_gene_list_store().get(list_id) is None:
+            raise GeneListError(f"Gene list {list_id} is no longer available; upload it again.")
+        # Filled on each connection by ensure_gene_list_tables before the query runs
+        gene_list_join = f"JOIN {gene_list_table(list_id, get_data_version())} gl ON gl.gid = g.gid"
+    
+    id_type = gene_params.get('gene-id-type')
+    identifier = gene_params.get('gene-identifier')
+    resolver = get_identifier_resolver() if (id_type and identifier) or tf_params.get('tf-name') else None
+    if id_type and identifier and resolver is not None:
+        where.append(integer_key_filter('g.gid', resolver.resolve_gene(id_type, identifier)))
+    elif id_type and identifier:
+        # Until the resolver is loaded (or with it turned off) the same lookup
+        # runs in SQL, so both paths return, and cache, the same rows
+        where.append(identifier_lookup_filter('g.gid', 'gene', GENE_ID_TYPES.get(id_type, ()),
+                                              normalize_identifier(identifier, id_type), params))
+    
+    gene_start = int(gene_params.get('gene-start')) if gene_params.get('gene-start') else None
+    gene_end = int(gene_params.get('gene-end')) if gene_params.get('gene-end') else None
+    gene_prefilter = None
+    if gene_params.get('gene-chr') or gene_start is not None or gene_end is not None:
+        gene_prefilter = interval_prefilter('gene', 'g.gid', gene_params.get('gene-chr'), gene_start, gene_end)
+    
+    if gene_prefilter:
+        where.append(gene_prefilter)
+    else:
         if gene_params.get('gene-chr'):
-            query_parts.append("AND g.chromosome = %s")
+            where.append("AND g.chromosome = %s")
             params.append(gene_params.get('gene-chr'))
         
-        if gene_params.get('gene-start'):
-            query_parts.append("AND g.start_position >= %s")
-            params.append(int(gene_params.get('gene-start')))
+        if gene_start is not None:
+            where.append("AND g.start_position >= %s")
+            params.append(gene_start)
         
-        if gene_params.get('gene-end'):
-            query_parts.append("AND g.end_position <= %s")
-            params.append(int(gene_params.get('gene-end')))
-        
-        if gene_params.get('gene-pathway'):
-            pathway_input = gene_params.get('gene-pathway').upper()
-            query_parts.append("AND lower(bp.name) LIKE lower(%s)")
-            params.append(f"%{pathway_input}%")
-
-    # Add DE filters if requested
-    if include_de and de_params:
+        if gene_end is not None:
+            where.append("AND g.end_position <= %s")
+            params.append(gene_end)
+    
+    if gene_params.get('gene-pathway'):
+        # Semi-join: a gene matches once however many of its pathways match
+        pathway_term = normalize_pathway_text(gene_params.get('gene-pathway'))
+        pathway_filter = pathway_prefilter(pathway_term) if pathway_term else "AND FALSE"
+        if pathway_filter is not None:
+            where.append(pathway_filter)
+        else:
+            # Matches what PathwayIndex.search() does: underscores and spaces are
+            # the same, and the term is literal text, not a LIKE pattern
+            where.append("""AND EXISTS (SELECT 1 FROM Gene_Pathway_Associations gpa_f
+            JOIN Biological_Pathways bp_f ON gpa_f.pid = bp_f.pid
+            WHERE gpa_f.gid = g.gid
+              AND REPLACE(REPLACE(REPLACE(bp_f.name, '_', ' '), '  ', ' '), '  ', ' ') LIKE %s ESCAPE '!')""")
+            params.append(f"%{like_escape(pathway_term)}%")
+    
+    # DE filters
+    if include_de:
         if de_params.get('padj_filter'):
-            query_parts.append("AND de.padj < %s")
+            where.append("AND de.padj < %s")
             params.append(float(de_params.get('padj_filter')))
         
         if de_params.get('logfc_filter'):
-            query_parts.append("AND abs(de.log2foldchange) > %s")
+            where.append("AND abs(de.log2foldchange) > %s")
             params.append(float(de_params.get('logfc_filter')))
-            
-    if len(cre_params) > 0:
-        # Add CRE-specific filters
+    
+    # CRE-specific filters
+    cre_start = int(cre_params.get('cre-start')) if cre_params.get('cre-start') else None
+    cre_end = int(cre_params.get('cre-end')) if cre_params.get('cre-end') else None
+    cre_prefilter = None
+    if cre_params.get('cre-chr') or cre_start is not None or cre_end is not None:
+        cre_prefilter = interval_prefilter('cre', 'cre.cid', cre_params.get('cre-chr'), cre_start, cre_end)
+    
+    if cre_prefilter:
+        where.append(cre_prefilter)
+    else:
         if cre_params.get('cre-chr'):
-            query_parts.append("AND cre.chromosome = %s")
+            where.append("AND cre.chromosome = %s")
             params.append(cre_params.get('cre-chr'))
         
-        if cre_params.get('cre-start'):
-            query_parts.append("AND cre.start_position >= %s")
-            params.append(int(cre_params.get('cre-start')))
+        if cre_start is not None:
+            where.append("AND cre.start_position >= %s")
+            params.append(cre_start)
         
-        if cre_params.get('cre-end'):
-            query_parts.append("AND cre.end_position <= %s")
-            params.append(int(cre_params.get('cre-end')))
-        
-        if cre_params.get('cre-log2fc'):
-            query_parts.append("AND abs(cre.cre_log2foldchange) > %s")
-            params.append(float(cre_params.get('cre-log2fc')))
-            
-    if len(tf_params) > 0:
-        # Add TF-specific filters
-        if tf_params.get('tf-name'):
-            query_parts.append("AND lower(tf.name) = lower(%s)")
-            params.append(tf_params.get('tf-name'))
+        if cre_end is not None:
+            where.append("AND cre.end_position <= %s")
+            params.append(cre_end)
     
-    # Combine all parts into a base query (without pagination)
-    base_query = " ".join(query_parts)
+    if cre_params.get('cre-log2fc'):
+        where.append("AND abs(cre.cre_log2foldchange) > %s")
+        params.append(float(cre_params.get('cre-log2fc')))
     
-    # First get total count for pagination metadata
-    count_query = f"SELECT COUNT(*) FROM ({base_query}) as count_query"
-    try:
-        cursor.execute(count_query, params)
-        total_count = cursor.fetchone()[0]
-    except mariadb.Error as e:
-        return None, None, f"Database count query error: {str(e)}"
+    # TF-specific filters
+    if tf_params.get('tf-name') and resolver is not None:
+        where.append(integer_key_filter('tci.tfid', resolver.resolve_tf(tf_params.get('tf-name'))))
+    elif tf_params.get('tf-name'):
+        where.append(identifier_lookup_filter('tci.tfid', 'tf', ('tf',),
+                                              normalize_identifier(tf_params.get('tf-name'), 'tf'), params))
     
-    # Add pagination to the final query
-    paginated_query = base_query + f" LIMIT {per_page} OFFSET {(page-1)*per_page}"
+    # Every selected column depends only on the keys of the tables it reads
+    inner_columns = [column for column in select_columns if column[1] not in DEFERRED_COLUMNS]
+    selected_aliases = set(re.findall(r"\b(\w+)\.", " ".join(expression for expression, _ in inner_columns)))
+    for _, name in select_columns:
+        selected_aliases.update(DEFERRED_COLUMNS.get(name, ()))
+    row_keys = [key for aliases, key in ROW_KEYS if selected_aliases.intersection(aliases)]
     
-    # Execute the paginated query
+    # Join an optional table only if a selected column or filter references
+    # it (or a table joined after it does)
+    referenced = " ".join([expression for expression, _ in row_keys + inner_columns] + where)
+    needed = {alias for alias, _, _ in SEARCH_JOINS if re.search(rf"\b{alias}\.", referenced)}
+    while True:
+        required = set(needed)
+        for alias, _, depends_on in SEARCH_JOINS:
+            if alias in needed:
+                required.update(depends_on)
+        if required == needed:
+            break
+        needed = required
+    
+    query_parts = [
+        "SELECT DISTINCT",
+        ", ".join(f"{expression} as {name}" for expression, name in row_keys + inner_columns),
+        """
+    FROM Genes g""",
+        gene_list_join,
+        """
+    JOIN Differential_Expression de ON g.gid = de.gid
+    JOIN Conditions c ON de.cdid = c.cdid AND c.name = %s
+    JOIN Cell_Type ct ON de.cell_id = ct.cell_id AND ct.cell = %s
+    """
+    ]
+    query_parts.extend(join for alias, join, _ in SEARCH_JOINS if alias in needed)
+    query_parts.extend(where)
+    
+    base_query = " ".join(query_parts)
+    return base_query, params, (row_keys, select_columns)
+
+def select_rows(base_query, layout, seek_sql="", limit=None, offset=0, include_keys=False):
+    """The output columns of a base query's rows, in row key order.
+
+    ``seek_sql``, ``limit`` and ``offset`` are applied to the base query
+    first, so deferred columns such as the grouped pathway list are only
+    computed for the rows a page keeps. With ``include_keys`` the row key
+    columns follow the output columns, for the next page's cursor.
+    """
+    row_keys, columns = layout
+    inner = base_query + (f" AND {seek_sql}" if seek_sql else "") + order_by_clause(row_keys)
+    if limit is not None:
+        inner += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+    outer = [f"{expression if name in DEFERRED_COLUMNS else f'page.`{name}`'} as `{name}`"
+             for expression, name in columns]
+    if include_keys:
+        outer.extend(f"page.`{name}`" for _, name in row_keys)
+    return f"SELECT {', '.join(outer)} FROM ({inner}) page{order_by_clause(row_keys, 'page')}"
+
+def encode_page_cursor(values):
+    """Encode the row key of the last row on a page as an opaque token."""
+    payload = json.dumps(list(values), default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_page_cursor(token):
+    """Decode a token produced by encode_page_cursor."""
     try:
-        cursor.execute(paginated_query, params)
-        results = cursor.fetchall()
-        # Convert results to list of dictionaries with column names
-        column_names = [desc[0] for desc in cursor.description]
-        result_dicts = [dict(zip(column_names, row)) for row in results]
-        
-        # Create pagination metadata
-        pagination_info = {
-            'total_records': total_count,
-            'page': page,
-            'per_page': per_page,
-            'total_pages': (total_count + per_page - 1) // per_page  # Ceiling division
-        }
-        
-        return result_dicts, pagination_info, None
-    except mariadb.Error as e:
-        return None, None, f"Database query error: {str(e)}\nQuery: {paginated_query}\nParams: {params}"
-
-def generate_table_html(results, headers, pagination_info, title=None, **params):
-    """Generate HTML table from results with server-side pagination."""
-    if not results:
-        return "<p>No results found matching your criteria.</p>"
-    
-    # Extract pagination information
-    page = pagination_info['page']
-    per_page = pagination_info['per_page']  # Should be 10
-    total_records = pagination_info['total_records']
-    total_pages = pagination_info['total_pages']
-
-    # Generate hidden fields for pagination
-    hidden_fields = []
-    for key, value in params.items():
-        if key != 'page' and key != 'per_page':  
-            if isinstance(value, dict):  
-                for sub_key, sub_value in value.items():
-                    if sub_value is not None:
-                        hidden_fields.append(f'<input type="hidden" name="{key}[{sub_key}]" value="{sub_value}">')
-            elif isinstance(value, list):  
-                for item in value:
-                    hidden_fields.append(f'<input type="hidden" name="{key}[]" value="{item}">')
-            elif value is not None:
-                hidden_fields.append(f'<input type="hidden" name="{key}" value="{value}">')
-    
-    # Add hidden fields for specific parameter types that require special handling
-    if 'output_fields' in params and params['output_fields']:
-        for field in params['output_fields']:
-            hidden_fields.append(f'<input type="hidden" name="output-fields" value="{field}">')
-    
-    if 'cre_fields' in params and params['cre_fields']:
-        for field in params['cre_fields']:
-            hidden_fields.append(f'<input type="hidden" name="cre-output-fields" value="{field}">')
-    
-    if 'tf_fields' in params and params['tf_fields']:
-        for field in params['tf_fields']:
-            hidden_fields.append(f'<input type="hidden" name="tf-checkbox" value="{field}">')
-    
-    if 'include_de' in params and params['include_de']:
-        hidden_fields.append('<input type="hidden" name="include_de" value="on">')
-    
-    if 'de_params' in params and params['de_params']:
-        de_params = params['de_params']
-        if 'de_fields' in de_params and de_params['de_fields']:
-            for field in de_params['de_fields']:
-                hidden_fields.append(f'<input type="hidden" name="de_fields" value="{field}">')
-        
-        if 'padj_filter' in de_params and de_params['padj_filter']:
-            hidden_fields.append(f'<input type="hidden" name="padj_filter" value="{de_params["padj_filter"]}">')
-        
-        if 'logfc_filter' in de_params and de_params['logfc_filter']:
-            hidden_fields.append(f'<input type="hidden" name="logfc_filter" value="{de_params["logfc_filter"]}">')
-    
-    if 'gene_params' in params and params['gene_params']:
-        gene_params = params['gene_params']
-        for key, value in gene_params.items():
-            if value:
-                hidden_fields.append(f'<input type="hidden" name="{key}" value="{value}">')
-    
-    if 'cre_params' in params and params['cre_params']:
-        cre_params = params['cre_params']
-        for key, value in cre_params.items():
-            if value:
-                hidden_fields.append(f'<input type="hidden" name="{key}" value="{value}">')
-    
-    if 'tf_params' in params and params['tf_params']:
-        tf_params = params['tf_params']
-        for key, value in tf_params.items():
-            if value:
-                hidden_fields.append(f'<input type="hidden" name="{key}" value="{value}">')
-    
-    # Always include condition and cell_type in hidden fields
-    if 'condition' in params and params['condition']:
-        hidden_fields.append(f'<input type="hidden" name="condition" value="{params["condition"]}">')
-    
-    if 'cell_type' in params and params['cell_type']:
-        hidden_fields.append(f'<input type="hidden" name="cell_type" value="{params["cell_type"]}">')
-    
-    if 'active_tab' in params and params['active_tab']:
-        hidden_fields.append(f'<input type="hidden" name="active_tab" value="{params["active_tab"]}">')
-    
-    # Create the results table
-    table_html = f"""
-    <div class="results-section">
-        <h2>{title or "Search Results"}</h2>
-        <div class="results-meta">
-            <span class="badge results-count">{len(results)} results</span>
-            <span class="badge page-info">Page {page} of {total_pages}</span>
-        </div>
-        
-        <div class="table-container">
-            <table class="results-table">
-                <thead>
-                    <tr>
+        values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid pagination cursor: {str(e)}")
+    if not isinstance(values, list):
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+def build_seek_predicate(expressions, last_values):
+    """Build a predicate selecting rows that sort after last_values.
+
+    Expands the lexicographic comparison (a, b, c) > (x, y, z) into
+    OR-ed prefix matches so NULLs (which MariaDB sorts first) are handled
+    and each term stays usable by an index.
+    """
+    if len(expressions) != len(last_values):
+        raise ValueError("Pagination cursor does not match the selected fields")
+    
+    terms = []
+    params = []
+    for i, expression in enumerate(expressions):
+        term_parts = []
+        for prev_expression, prev_value in zip(expressions[:i], last_values[:i]):
+            term_parts.append(f"{prev_expression} <=> %s")
+            params.append(prev_value)
+        if last_values[i] is None:
+            # Everything non-NULL sorts after NULL
+            term_parts.append(f"{expression} IS NOT NULL")
+        else:
+            term_parts.append(f"{expression} > %s")
+            params.append(last_values[i])
+        terms.append("(" + " AND ".join(term_parts) + ")")
+    return "(" + " OR ".join(terms) + ")", params
+
+# Search results and exact counts are cached per data version; the loader
+# bumps Data_Version after every bulk load, which invalidates both caches
+_result_cache = None
+_count_cache = None
+_cache_lock = threading.Lock()
+
+def _init_caches():
+    """Create the result and count caches from the settings on first use."""
+    global _result_cache, _count_cache
+    with _cache_lock:
+        if _result_cache is not None:
+            return
+        config = get_config()
+        _count_cache = ResultCache(max_entries=4096, ttl=config['RESULT_CACHE_TTL'], max_bytes=4 * 1024 * 1024)
+        _result_cache = ResultCache(max_entries=config['RESULT_CACHE_MAX_ENTRIES'],
+                                    ttl=config['RESULT_CACHE_TTL'],
+                                    max_bytes=config['RESULT_CACHE_MAX_BYTES'])
+
+def get_result_cache():
+    if _result_cache is None:
+        _init_caches()
+    return _result_cache
+
+def get_count_cache():
+    if _result_cache is None:
+        _init_caches()
+    return _count_cache
+
+_data_version = None
+_data_version_checked = 0.0
+_data_version_lock = threading.Lock()
+
+def get_data_version(cursor=None):
+    """Return the loader's data-version stamp, re-read at most every interval.
+
+    Pass the caller's cursor when it already holds a pooled connection so
+    the check does not need a second one.
     """
+    global _data_version, _data_version_checked
+    now = time.monotonic()
+    if _data_version is not None and now - _data_version_checked < get_config()['DATA_VERSION_CHECK_INTERVAL']:
+        return _data_version
     
-    for header in headers:
-        table_html += f"<th>{header.replace('_', ' ').title()}</th>"
+    query = "SELECT version FROM Data_Version WHERE id = 1"
+    try:
+        if cursor is None:
+            with db_cursor() as own_cursor:
+                own_cursor.execute(query)
+                row = own_cursor.fetchone()
+        else:
+            cursor.execute(query)
+            row = cursor.fetchone()
+        version = row[0] if row else 0
+    except Exception as e:
+        print(f"Could not read data version: {str(e)}")
+        version = _data_version if _data_version is not None else 0
     
-    table_html += """
-            </tr></thead>
-            <tbody>
+    with _data_version_lock:
+        if version != _data_version:
+            # Entries of the old version can never be hit again; free them now
+            get_result_cache().clear()
+            get_count_cache().clear()
+        _data_version = version
+        _data_version_checked = now
+    return version
+
+# Conditions, cell types and TFs, read once per data version for dropdowns and validation
+_dimensions = None
+_dimensions_lock = threading.Lock()
+
+def get_dimensions():
+    """Return the dimension snapshot for the current data version, or None if it cannot be read.
+
+    The tables are tiny, so a stale snapshot is replaced synchronously by
+    whichever request first sees the new version.
+    """
+    global _dimensions
+    version = get_data_version()
+    snapshot = _dimensions
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _dimensions_lock:
+        if _dimensions is not None and _dimensions.version == version:
+            return _dimensions
+        try:
+            with db_cursor() as cursor:
+                _dimensions = DimensionSnapshot.load(cursor, version)
+        except Exception as e:
+            print(f"Could not load dimension tables: {str(e)}")
+            return snapshot
+        return _dimensions
+
+def dimension_response(values, snapshot):
+    """JSON list of dimension names that browsers revalidate with If-None-Match."""
+    response = jsonify(list(values))
+    response.set_etag(snapshot.etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = get_config()['DIMENSION_MAX_AGE']
+    response.cache_control.must_revalidate = True
+    return response.make_conditional(request)
+
+def validate_condition_cell_type(condition, cell_type):
+    """Error message for an unknown condition or cell type, or None.
+
+    Skips the check (the query then simply finds nothing) when the
+    snapshot cannot be read.
+    """
+    snapshot = get_dimensions()
+    if snapshot is None:
+        return None
+    if snapshot.condition_id(condition) is None:
+        return f"Error: Unknown condition '{condition}'."
+    if snapshot.cell_type_id(cell_type) is None:
+        return f"Error: Unknown cell type '{cell_type}'."
+    return None
+
+# Interval indexes turn coordinate filters into primary-key lookups
+# numpy is only imported by the index build, which keeps it out of worker start-up
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+_interval_indexes = {'version': None, 'indexes': {}, 'building': False}
+_interval_index_lock = threading.Lock()
+
+def _build_interval_indexes(version):
+    """Build every interval index for a data version (runs in a background thread)."""
+    try:
+        import interval_index
+        start = time.monotonic()
+        with db_cursor() as cursor:
+            indexes = interval_index.load_interval_indexes(cursor, get_config()['INTERVAL_INDEX_DIR'], version)
+        with _interval_index_lock:
+            _interval_indexes['version'] = version
+            _interval_indexes['indexes'] = indexes
+        sizes = ", ".join(f"{name}={len(index)}" for name, index in indexes.items())
+        print(f"Built interval indexes for data version {version} in {time.monotonic() - start:.1f}s ({sizes})")
+    except Exception as e:
+        print(f"Could not build interval indexes: {str(e)}")
+    finally:
+        with _interval_index_lock:
+            _interval_indexes['building'] = False
+
+def get_interval_index(name):
+    """Return the named interval index for the current data version.
+
+    The first call for a version starts a background build and returns
+    None, so searches fall back to SQL range predicates until it is ready.
+    """
+    version = _data_version
+    if not (get_config()['INTERVAL_INDEX'] and NUMPY_AVAILABLE) or version is None:
+        return None
+    with _interval_index_lock:
+        if _interval_indexes['version'] == version:
+            return _interval_indexes['indexes'].get(name)
+        if not _interval_indexes['building']:
+            _interval_indexes['building'] = True
+            threading.Thread(target=_build_interval_indexes, args=(version,), daemon=True).start()
+    return None
+
+def interval_prefilter(index_name, id_expression, chrom, start, end):
+    """Resolve a coordinate filter to an ``id IN (...)`` predicate.
+
+    Returns None when the index is not ready or the match is too large to
+    inline, in which case the caller keeps the SQL range predicates.
+    """
+    index = get_interval_index(index_name)
+    if index is None:
+        return None
+    ids = index.contained(chrom or None, start, end)
+    if len(ids) > get_config()['INTERVAL_PREFILTER_MAX_IDS']:
+        return None
+    if len(ids) == 0:
+        return "AND FALSE"
+    return f"AND {id_expression} IN ({', '.join(str(i) for i in sorted(set(ids.tolist())))})"
+
+# Identifier resolver: gene symbols, aliases, Entrez/Ensembl IDs and TF names -> integer keys
+_identifier_resolver = {'version': None, 'resolver': None, 'building': False}
+_identifier_resolver_lock = threading.Lock()
+
+def _build_identifier_resolver(version):
+    """Load Identifier_Lookup for a data version (runs in a background thread)."""
+    try:
+        start = time.monotonic()
+        with db_cursor() as cursor:
+            resolver = IdentifierResolver.load(cursor)
+        with _identifier_resolver_lock:
+            _identifier_resolver['version'] = version
+            _identifier_resolver['resolver'] = resolver
+        print(f"Loaded {len(resolver)} identifiers for data version {version} in {time.monotonic() - start:.1f}s")
+    except Exception as e:
+        print(f"Could not load the identifier resolver: {str(e)}")
+    finally:
+        with _identifier_resolver_lock:
+            _identifier_resolver['building'] = False
+
+def get_identifier_resolver():
+    """Return the identifier resolver for the current data version.
+
+    Like the interval indexes, the first call for a version starts a
+    background load and returns None; searches then use SQL comparisons.
+    """
+    version = _data_version
+    if not get_config()['IDENTIFIER_RESOLVER'] or version is None:
+        return None
+    with _identifier_resolver_lock:
+        if _identifier_resolver['version'] == version:
+            return _identifier_resolver['resolver']
+        if not _identifier_resolver['building']:
+            _identifier_resolver['building'] = True
+            threading.Thread(target=_build_identifier_resolver, args=(version,), daemon=True).start()
+    return None
+
+def integer_key_filter(id_expression, ids):
+    """``AND id IN (...)`` over resolved integer keys; nothing resolved matches nothing."""
+    if not ids:
+        return "AND FALSE"
+    return f"AND {id_expression} IN ({', '.join(str(int(i)) for i in ids)})"
+
+def identifier_lookup_filter(id_expression, kind, id_types, identifier, params):
+    """The resolver's lookup as an ``id IN (SELECT ... Identifier_Lookup)`` predicate.
+
+    Symbols and aliases can be queried together: identifier_lookup.sql
+    leaves out aliases that equal an approved symbol, so an alias row only
+    exists where the resolver would fall back to it.
+    """
+    if not id_types:
+        return "AND FALSE"
+    params.append(identifier)
+    return (f"AND {id_expression} IN (SELECT il.target_id FROM Identifier_Lookup il "
+            f"WHERE il.kind = '{kind}' AND il.identifier = %s "
+            f"AND il.id_type IN ({', '.join(repr(id_type) for id_type in id_types)}))")
+
+def identifier_suggestions(gene_params, tf_params):
+    """'Did you mean' text for a gene symbol or TF name that resolved to nothing."""
+    resolver = get_identifier_resolver()
+    if resolver is None:
+        return ""
+    gene_params = gene_params or {}
+    tf_params = tf_params or {}
+    suggestions = []
+    identifier = gene_params.get('gene-identifier')
+    if identifier and gene_params.get('gene-id-type') == 'hgnc' and not resolver.resolve_gene('hgnc', identifier):
+        suggestions.extend(resolver.suggest('gene', identifier))
+    tf_name = tf_params.get('tf-name')
+    if tf_name and not resolver.resolve_tf(tf_name):
+        suggestions.extend(resolver.suggest('tf', tf_name))
+    return f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+
+# Pathway index: pathway name terms -> pids, and autocomplete for the search form
+PATHWAY_SUGGEST_MAX = 50
+_pathway_index = {'version': None, 'index': None, 'building': False}
+_pathway_index_lock = threading.Lock()
+
+def _build_pathway_index(version):
+    """Build the pathway name index for a data version (runs in a background thread)."""
+    try:
+        start = time.monotonic()
+        with db_cursor() as cursor:
+            index = PathwayIndex.load(cursor)
+        with _pathway_index_lock:
+            _pathway_index['version'] = version
+            _pathway_index['index'] = index
+        print(f"Built pathway index of {len(index)} names for data version {version} "
+              f"in {time.monotonic() - start:.1f}s")
+    except Exception as e:
+        print(f"Could not build the pathway index: {str(e)}")
+    finally:
+        with _pathway_index_lock:
+            _pathway_index['building'] = False
+
+def get_pathway_index():
+    """Return the pathway index for the current data version.
+
+    Like the interval indexes, the first call for a version starts a
+    background build and returns None; searches then use LIKE.
     """
+    version = _data_version
+    if not get_config()['PATHWAY_INDEX'] or version is None:
+        return None
+    with _pathway_index_lock:
+        if _pathway_index['version'] == version:
+            return _pathway_index['index']
+        if not _pathway_index['building']:
+            _pathway_index['building'] = True
+            threading.Thread(target=_build_pathway_index, args=(version,), daemon=True).start()
+    return None
+
+def like_escape(text):
+    """Escape LIKE wildcards in user text for ``LIKE ... ESCAPE '!'``."""
+    return text.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
+def pathway_prefilter(term):
+    """Resolve a pathway term to a ``gpa_f.pid IN (...)`` semi-join.
+
+    Returns None when the index is not ready or too many pathways match to
+    inline, in which case the caller keeps the LIKE predicate.
+    """
+    index = get_pathway_index()
+    if index is None:
+        return None
+    pids = index.search(term)
+    if len(pids) > get_config()['PATHWAY_PREFILTER_MAX_IDS']:
+        return None
+    if not pids:
+        return "AND FALSE"
+    return f"""AND EXISTS (SELECT 1 FROM Gene_Pathway_Associations gpa_f
+            WHERE gpa_f.gid = g.gid AND gpa_f.pid IN ({', '.join(str(int(pid)) for pid in sorted(pids))}))"""
+
+def normalize_search_params(condition_name, cell_type, gene_params, output_fields,
+                            cre_fields, tf_fields, include_de=False, de_params=None,
+                            cre_params=None, tf_params=None):
+    """Canonical form of a search, so equivalent requests share a cache key."""
+    int_keys = ('gene-start', 'gene-end', 'cre-start', 'cre-end')
+    float_keys = ('padj_filter', 'logfc_filter', 'cre-log2fc')
+    # Comparisons on these use case-insensitive collations or lower()
+    case_insensitive_keys = ('gene-identifier', 'gene-chr', 'gene-pathway', 'cre-chr', 'tf-name')
+    
+    def clean(params):
+        cleaned = {}
+        for key, value in (params or {}).items():
+            if isinstance(value, str):
+                value = value.strip()
+            if value is None or value == '' or value == []:
+                continue
+            try:
+                if key in int_keys:
+                    value = int(value)
+                elif key in float_keys:
+                    value = float(value)
+            except (ValueError, TypeError):
+                pass
+            if key in case_insensitive_keys and isinstance(value, str):
+                value = value.lower()
+            if isinstance(value, list):
+                value = list(dict.fromkeys(value))
+            cleaned[key] = value
+        return cleaned
     
-    for row in results:
-        table_html += "<tr>"
-        for header in headers:
-            value = row.get(header, '')
-            table_html += f"<td>{value if value is not None else ''}</td>"
-        table_html += "</tr>"
-    
-    table_html += """
-            </tbody>
-        </table>
-    </div>
+    return {
+        'condition': condition_name,
+        'cell_type': cell_type,
+        'gene': clean(gene_params),
+        'output_fields': list(dict.fromkeys(output_fields or [])),
+        'cre_fields': list(dict.fromkeys(cre_fields or [])),
+        'tf_fields': list(dict.fromkeys(tf_fields or [])),
+        'de': clean(de_params) if include_de else None,
+        'cre': clean(cre_params),
+        'tf': clean(tf_params)
+    }
+
+def cached_results(kind, key_params, fetch):
+    """Return fetch() through the result cache, keyed on kind, params and data version."""
+    key = make_cache_key(kind, get_data_version(), key_params)
+    hit, results = get_result_cache().get(key)
+    if not hit:
+        results = fetch()
+        get_result_cache().set(key, results)
+    return results
+
+def count_query(base_query):
+    """COUNT(*) over a build_search_query base query."""
+    return f"SELECT COUNT(*) FROM ({base_query}) as count_query"
+
+def order_by_clause(row_keys, table=None):
+    """ORDER BY the row key, which keyset pagination seeks on."""
+    prefix = f"{table}." if table else ""
+    return " ORDER BY " + ", ".join(f"{prefix}`{name}`" for _, name in row_keys)
+
+def get_exact_count(cursor, base_query, params):
+    """Return COUNT(*) of the base query, computed once per query and cached."""
+    key = make_cache_key('count', get_data_version(cursor), base_query, params)
+    hit, total_count = get_count_cache().get(key)
+    if hit:
+        return total_count
+    
+    ensure_gene_list_tables(cursor, base_query, get_gene_list_store())
+    total_count = metrics.timed_execute(cursor, count_query(base_query), params, fetch='one')[0]
+    get_count_cache().set(key, total_count)
+    return total_count
+
+# Exact counts run on their own pooled connection, beside the page query
+_count_executor = None
+_count_executor_pid = None
+_pending_counts = {}  # count cache key -> Future of a COUNT(*) still running
+_pending_counts_lock = threading.Lock()
+
+def get_count_executor():
+    """Return this worker's count thread pool, creating it on first use."""
+    global _count_executor, _count_executor_pid
+    if _count_executor is None or _count_executor_pid != os.getpid():
+        with _pending_counts_lock:
+            if _count_executor is None or _count_executor_pid != os.getpid():
+                _count_executor = ThreadPoolExecutor(max_workers=get_config()['COUNT_WORKERS'],
+                                                     thread_name_prefix='search-count')
+                _count_executor_pid = os.getpid()
+                _pending_counts.clear()
+    return _count_executor
+
+def _run_exact_count(key, pool, connection, base_query, params):
+    """Worker body for submit_exact_count: count on the connection checked out for it and cache it."""
+    broken = False
+    try:
+        cursor = connection.cursor()
+        try:
+            with metrics.span('count_worker'):
+                ensure_gene_list_tables(cursor, base_query, get_gene_list_store())
+                total_count = metrics.timed_execute(cursor, count_query(base_query), params, fetch='one')[0]
+        finally:
+            cursor.close()
+        get_count_cache().set(key, total_count)
+        return total_count
+    except (mariadb.InterfaceError, mariadb.OperationalError):
+        broken = True
+        raise
+    finally:
+        pool.release(connection, discard=broken)
+        with _pending_counts_lock:
+            _pending_counts.pop(key, None)
+
+def submit_exact_count(base_query, params, version):
+    """Start COUNT(*) of the base query on a second pooled connection; returns a Future or None.
+
+    Cached totals come back as an already-finished future, and requests for
+    a count that is still running share its future instead of starting
+    another. A new count only starts when a count worker and a connection
+    are both free right now, so a worker never waits on the pool while the
+    caller holds a connection waiting on it. Otherwise returns None and the
+    caller counts on its own cursor with get_exact_count().
     """
+    key = make_cache_key('count', version, base_query, params)
+    hit, total_count = get_count_cache().get(key)
+    if hit:
+        future = Future()
+        future.set_result(total_count)
+        return future
+    
+    executor = get_count_executor()
+    with _pending_counts_lock:
+        future = _pending_counts.get(key)
+        if future is not None:
+            return future
+        if len(_pending_counts) >= get_config()['COUNT_WORKERS']:
+            return None
+        pool = get_pool()
+        connection = pool.acquire(wait=False)
+        if connection is None:
+            return None
+        # Copy the context so the worker's timings are labelled with this route
+        future = executor.submit(contextvars.copy_context().run, _run_exact_count,
+                                 key, pool, connection, base_query, params)
+        _pending_counts[key] = future
+    return future
 
-    # Add server-side pagination controls
-    search_url = url_for('search')
-    
-    # Only show pagination if there are multiple pages
-    if total_pages > 1:
-        pagination = f"""
-        <div class="pagination">
-            <a href="javascript:void(0)" 
-            class="pagination-link {'disabled' if page <= 1 else ''}" 
-            data-page="{max(1, page-1)}">Previous</a>
-            <span>Page {page} of {total_pages}</span>
-            <a href="javascript:void(0)" 
-            class="pagination-link {'disabled' if page >= total_pages else ''}" 
-            data-page="{min(total_pages, page+1)}">Next</a>
-
-            <span id="loading-spinner" style="display:none; margin-left:10px;">
-                <i class="fas fa-spinner fa-spin"></i>
-            </span>
-        </div>
-        """
-        return table_html + pagination
+def estimate_count(cursor, base_query, params):
+    """Estimate the row count from the optimizer plan without running the query."""
+    with metrics.sql_span(cursor, f"EXPLAIN {base_query}", params) as record:
+        cursor.execute(f"EXPLAIN {base_query}", params)
+        plan = cursor.fetchall()
+        record.rows = len(plan)
+        columns = [desc[0].lower() for desc in cursor.description]
+    id_index = columns.index('id')
+    rows_index = columns.index('rows')
+    
+    # Rows examined per table multiply across the nested-loop join
+    estimate = 1
+    for row in plan:
+        if row[id_index] == 1 and row[rows_index]:
+            estimate *= int(row[rows_index])
+    return estimate
+
+def execute_query(cursor, condition_name, cell_type, gene_params, 
+                  output_fields, cre_fields, tf_fields, include_de=False, 
+                  de_params=None, cre_params=None, tf_params=None,
+                  page=1, per_page=50, after=None, count_mode='exact', use_cache=True):
+    """Execute queries based on parameters with pagination.
+
+    Without ``after`` the page is fetched with LIMIT/OFFSET. When ``after``
+    holds the next_cursor of the previous page, the query seeks past that
+    row's row key instead, so page N costs about the same as page 1.
+    ``count_mode`` is 'exact' (cached COUNT), 'estimate' (optimizer
+    estimate), 'later' (COUNT started but not waited for; the page fetches
+    it from /search_count) or 'none' (no total; only has_next is reported).
+    The exact COUNT runs on a second pooled connection while the page query
+    runs on ``cursor``, so a search costs the slower of the two, not the sum.
+    
+    Successful pages are kept in the result cache under the normalized
+    parameters and the current data version.
+    """
+    cache_key = None
+    if use_cache:
+        cache_key = make_cache_key(
+            'search', get_data_version(cursor),
+            normalize_search_params(condition_name, cell_type, gene_params, output_fields,
+                                    cre_fields, tf_fields, include_de=include_de,
+                                    de_params=de_params, cre_params=cre_params,
+                                    tf_params=tf_params),
+            page, per_page, after, count_mode
+        )
+        hit, cached = get_result_cache().get(cache_key)
+        if hit:
+            return cached[0], cached[1], None
+    
+    try:
+        with metrics.span('build_query'):
+            base_query, params, layout = build_search_query(
+                condition_name, cell_type, gene_params, output_fields, cre_fields,
+                tf_fields, include_de=include_de, de_params=de_params,
+                cre_params=cre_params, tf_params=tf_params
+            )
+        ensure_gene_list_tables(cursor, base_query, get_gene_list_store())
+    except ValueError as e:
+        return None, None, str(e)
+    except mariadb.Error as e:
+        return None, None, f"Could not load the gene list: {str(e)}"
+    row_keys = layout[0]
+    
+    # Start the exact count before the page query; 'later' never waits for it, and
+    # /search_count counts itself if no worker could start
+    total_count = None
+    count_future = None
+    try:
+        if count_mode in ('exact', 'later'):
+            count_future = submit_exact_count(base_query, params, get_data_version(cursor))
+        elif count_mode == 'estimate':
+            with metrics.span('count_estimate'):
+                total_count = estimate_count(cursor, base_query, params)
+    except mariadb.Error as e:
+        return None, None, f"Database count query error: {str(e)}"
+    
+    # Fetch one extra row to learn whether a next page exists
+    page_params = list(params)
+    if after:
+        try:
+            seek_sql, seek_params = build_seek_predicate(
+                [expression for expression, _ in row_keys], decode_page_cursor(after))
+        except ValueError as e:
+            return None, None, str(e)
+        paginated_query = select_rows(base_query, layout, seek_sql, limit=per_page + 1, include_keys=True)
+        page_params.extend(seek_params)
     else:
-        return table_html
+        paginated_query = select_rows(base_query, layout, limit=per_page + 1, offset=(page-1)*per_page,
+                                      include_keys=True)
     
-def save_results_to_csv(results, filename):
-    """Save query results to a CSV file."""
-    if not results:
-        return False
+    # Execute the paginated query
+    try:
+        with metrics.sql_span(cursor, paginated_query, page_params) as record:
+            with metrics.span('page_query'):
+                cursor.execute(paginated_query, page_params)
+            with metrics.span('fetchall'):
+                results = cursor.fetchall()
+            record.rows = len(results)
+            # Read before the span ends: a slow-query EXPLAIN reuses this cursor
+            column_names = [desc[0] for desc in cursor.description]
+        has_next = len(results) > per_page
+        results = results[:per_page]
+        # Convert results to list of dictionaries with column names; the row key columns come last
+        output_count = len(column_names) - len(row_keys)
+        with metrics.span('to_dicts'):
+            result_dicts = [dict(zip(column_names[:output_count], row)) for row in results]
+    except mariadb.Error as e:
+        return None, None, f"Database query error: {str(e)}\nQuery: {paginated_query}\nParams: {page_params}"
     
-    # Create directory if it doesn't exist
-    if not os.path.exists(SAVE_DIR):
-        os.makedirs(SAVE_DIR)
+    if count_mode == 'exact':
+        try:
+            if count_future is None:
+                # No count worker or connection free: count on this one instead
+                total_count = get_exact_count(cursor, base_query, params)
+            else:
+                with metrics.span('count_wait'):
+                    total_count = count_future.result()
+        except mariadb.Error as e:
+            return None, None, f"Database count query error: {str(e)}"
     
-    # Get the headers from the first result
-    headers = list(results[0].keys())
+    # Create pagination metadata
+    pagination_info = {
+        'total_records': total_count,
+        'count_is_estimate': count_mode == 'estimate',
+        'count_pending': count_mode == 'later',
+        'page': page,
+        'per_page': per_page,
+        'total_pages': (total_count + per_page - 1) // per_page if total_count is not None else None,  # Ceiling division
+        'has_next': has_next,
+        'next_cursor': encode_page_cursor(results[-1][output_count:]) if has_next else None
+    }
     
-    filepath = os.path.join(SAVE_DIR, filename)
+    if cache_key:
+        get_result_cache().set(cache_key, (result_dicts, pagination_info))
+    return result_dicts, pagination_info, None
+
+def parse_search_args(data):
+    """Read the search form fields from request args into build_search_query kwargs."""
+    include_de = data.get('include_de') == 'on'
+    de_params = None
+    if include_de:
+        de_params = {
+            'de_fields': data.getlist('de_fields'),
+            'padj_filter': data.get('padj_filter'),
+            'logfc_filter': data.get('logfc_filter')
+        }
     
+    return {
+        'condition_name': data.get('condition'),
+        'cell_type': data.get('cell_type'),
+        'gene_params': {
+            'gene-id-type': data.get('gene-id-type'),
+            'gene-identifier': data.get('gene-identifier'),
+            'gene-list-id': data.get('gene-list-id'),
+            'gene-chr': data.get('gene-chr'),
+            'gene-start': data.get('gene-start'),
+            'gene-end': data.get('gene-end'),
+            'gene-pathway': data.get('gene-pathway')
+        },
+        'output_fields': data.getlist('output-fields'),
+        'include_de': include_de,
+        'de_params': de_params,
+        'cre_params': {
+            'cre-chr': data.get('cre-chr'),
+            'cre-start': data.get('cre-start'),
+            'cre-end': data.get('cre-end'),
+            'cre-log2fc': data.get('cre-log2fc')
+        },
+        'cre_fields': data.getlist('cre-output-fields'),
+        'tf_params': {
+            'tf-name': data.get('tf-name')
+        },
+        'tf_fields': data.getlist('tf-checkbox')
+    }
+
+SAVED_FILE_SUFFIX = '.csv.gz'
+
+def write_saved_result(filepath, headers, batches, preview_rows=5):
+    """Write a header and row batches to a gzipped CSV in one pass.
+
+    Returns (row_count, size_bytes, preview rows). The file is written next
+    to ``filepath`` and renamed into place, so a failed save leaves nothing
+    half-written behind.
+    """
+    partial_path = f"{filepath}.partial"
+    row_count = 0
+    preview = []
     try:
-        # Write to CSV
-        with open(filepath, 'w', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=headers)
-            writer.writeheader()
-            writer.writerows(results)
-        return True
-    except Exception as e:
-        print(f"Error saving CSV: {str(e)}")
-        return False
+        with gzip.open(partial_path, 'wt', newline='', encoding='utf-8',
+                       compresslevel=get_config()['SAVED_COMPRESS_LEVEL']) as handle:
+            writer = csv.writer(handle)
+            writer.writerow(headers)
+            for rows in batches:
+                writer.writerows(rows)
+                if len(preview) < preview_rows:
+                    preview.extend(rows[:preview_rows - len(preview)])
+                row_count += len(rows)
+        os.replace(partial_path, filepath)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return row_count, os.path.getsize(filepath), preview
 
-def get_file_size(filepath):
+def format_file_size(size_bytes):
     """Get human-readable file size."""
-    size_bytes = os.path.getsize(filepath)
     for unit in ['B', 'KB', 'MB', 'GB']:
         if size_bytes < 1024.0:
             return f"{size_bytes:.2f} {unit}"
         size_bytes /= 1024.0
     return f"{size_bytes:.2f} TB"
 
-def get_preview(filepath, max_rows=5):
-    """Get a preview of the CSV file."""
-    preview_rows = []
-    with open(filepath, 'r') as csvfile:
-        reader = csv.reader(csvfile)
-        headers = next(reader)  # Get headers
-        for i, row in enumerate(reader):
-            if i >= max_rows:
-                break
-            preview_rows.append(row)
-    
-    # Truncate long text
-    for i, row in enumerate(preview_rows):
-        for j, cell in enumerate(row):
-            if len(cell) > 50:
-                preview_rows[i][j] = cell[:50] + "..."
-    
+def format_preview(headers, preview_rows):
+    """Short text preview of the first column of the first rows."""
     if not preview_rows:
         return "No data available for preview."
     
-    return ", ".join([f"{headers[0]}: {row[0]}" for row in preview_rows])
-
-def load_saved_files():
-    """Load saved files metadata from JSON file."""
-    try:
-        if os.path.exists(SAVE_METADATA):
-            with open(SAVE_METADATA, 'r') as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"Error loading saved files metadata: {str(e)}")
-    return {}
-
-def save_saved_files(saved_files_dict):
-    """Save files metadata to JSON file."""
-    try:
-        with open(SAVE_METADATA, 'w') as f:
-            json.dump(saved_files_dict, f, indent=2)
-        return True
-    except Exception as e:
-        print(f"Error saving files metadata: {str(e)}")
-        return False
+    # Truncate long text
+    values = [str(row[0]) for row in preview_rows]
+    values = [value[:50] + "..." if len(value) > 50 else value for value in values]
+    return ", ".join([f"{headers[0]}: {value}" for value in values])
 
 # Modified route: Change the index route to render base.html instead
-@app.route('/')
+@route('/')
 def index():
     # Render base.html as the home page
     return render_template('base.html')
 
 # Add a dedicated route for the search page
-@app.route('/search_page', methods=['GET'])
+@route('/search_page', methods=['GET'])
 def search_page():
     return render_template('updated_search.html', 
-                         table_html=None,
+                         table=None,
                          condition=None,
                          cell_type=None,
                          active_tab='gene',
@@ -502,44 +1251,40 @@ def search_page():
                          result_id=None)
 
 # Add routes for all other HTML pages
-@app.route('/guide')
+@route('/guide')
 def guide():
     return render_template('guide.html')
 
-@app.route('/faq')
+@route('/faq')
 def faq():
     return render_template('faq.html')
 
-@app.route('/resources')
+@route('/resources')
 def resources():
     return render_template('Resources_DownloadData.html')
 
-@app.route('/aboutus')
+@route('/aboutus')
 def aboutus():
     return render_template('about_us.html')
 
-@app.route('/visualizations')
+@route('/visualizations')
 def visualizations():
     return render_template('visualizations.html')
 
-@app.route('/github')
+@route('/github')
 def github():
     return render_template('github.html')
 
-@app.route('/contactus')
+@route('/contactus')
 def contactus():
     return render_template('contact_us.html')
 
-@app.route('/citation')
+@route('/citation')
 def citation():
     return render_template('citation.html')
 
-@app.route('/search', methods=['GET'])
+@route('/search', methods=['GET'])
 def search():
-    # Debug information
-    print(f"Request Method: {request.method}")
-    print(f"Args Data: {request.args}")
-    
     # Check if it's a search request (has parameters)
     if not request.args:
         return redirect(url_for('search_page'))
@@ -563,96 +1308,79 @@ def search():
     except (ValueError, TypeError):
         per_page = 10
     
-    # Print debug info
-    print(f"Pagination: page={page}, per_page={per_page}")
-    print(f"Params: condition={condition}, cell_type={cell_type}, active_tab={active_tab}")
+    # Keyset cursor from the previous page's Next link, and how to count totals
+    after = data.get('after') or None
+    count_mode = data.get('count', 'exact')
+    if count_mode not in ('exact', 'estimate', 'later', 'none'):
+        count_mode = 'exact'
     
     # Validate required parameters
     if not condition or not cell_type:
         error = "Error: Both condition and cell type are required."
+    else:
+        error = validate_condition_cell_type(condition, cell_type)
+    if error:
         return render_template('updated_search.html', 
                              error=error,
-                             table_html=None,
+                             table=None,
                              condition=None,
                              cell_type=None,
                              active_tab=active_tab,
                              result_id=None)
     
-    #Connect to database
-    connection, cursor = connect_database()
-    if not connection:
-        error_message = f"Error: Could not connect to the database. {cursor}"
+    # new!! add for ajax
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    
+    # A repeat view of the same search on the same data needs no query
+    etag = data_etag('search', [is_ajax] + normalized_params(data))
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+    
+    # Check out a pooled connection
+    try:
+        with metrics.span('connect'):
+            connection = get_pool().acquire()
+    except (mariadb.Error, PoolTimeout) as e:
+        error_message = f"Error: Could not connect to the database. {str(e)}"
         return render_template('updated_search.html', 
                               error=error_message,
-                              table_html=None,
+                              table=None,
                               condition=None,
                               cell_type=None,
                               active_tab=active_tab,
                               result_id=None)
-    
-    # new!! add for ajax
-    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    cursor = connection.cursor()
     
     try:
         results = None
         error = None
-        table_html = ""
-        
         # Generate a unique ID for this result set
         result_id = str(uuid.uuid4())
-        search_type = active_tab
-        save_option = data.get('save_option', 'view')  # Options: view, save, both
+        
+        # Query string for the full-result export links (pagination state dropped)
+        export_query = urlencode([(key, value) for key, value in data.items(multi=True)
+                                  if key not in ('page', 'per_page', 'after')])
         
         if active_tab == 'gene' or active_tab == 'cre' or active_tab == 'tf':
-            # Get gene parameters
-            gene_params = {
-                'gene-id-type': data.get('gene-id-type'),
-                'gene-identifier': data.get('gene-identifier'),
-                'gene-chr': data.get('gene-chr'),
-                'gene-start': data.get('gene-start'),
-                'gene-end': data.get('gene-end'),
-                'gene-pathway': data.get('gene-pathway')
-            }
-            
-            # Get output fields from GET request
-            output_fields = data.getlist('output-fields')
-            
-            # Get differential expression parameters
-            include_de = data.get('include_de') == 'on'
-            de_params = None
-            if include_de:
-                de_params = {
-                    'de_fields': data.getlist('de_fields'),
-                    'padj_filter': data.get('padj_filter'),
-                    'logfc_filter': data.get('logfc_filter')
-                }
-            
-            # Get CRE parameters
-            cre_params = {
-                'cre-chr': data.get('cre-chr'),
-                'cre-start': data.get('cre-start'),
-                'cre-end': data.get('cre-end'),
-                'cre-log2fc': data.get('cre-log2fc')
-            }
-            
-            # Get CRE fields from GET request
-            cre_fields = data.getlist('cre-output-fields')
-            
-            # Get TF parameters
-            tf_params = {
-                'tf-name': data.get('tf-name')  
-            }
-            
-            # Get TF fields from GET request
-            tf_fields = data.getlist('tf-checkbox')
+            # Get gene, DE, CRE and TF parameters and output fields
+            search_args = parse_search_args(data)
+            gene_params = search_args['gene_params']
+            output_fields = search_args['output_fields']
+            include_de = search_args['include_de']
+            de_params = search_args['de_params']
+            cre_params = search_args['cre_params']
+            cre_fields = search_args['cre_fields']
+            tf_params = search_args['tf_params']
+            tf_fields = search_args['tf_fields']
             
             # Call execute_query with pagination parameters
-            results, pagination_info, error = execute_query(
-                cursor, condition, cell_type, gene_params,
-                output_fields, cre_fields, tf_fields, include_de=include_de, 
-                de_params=de_params, cre_params=cre_params, tf_params=tf_params,
-                page=page, per_page=per_page
-            )
+            with metrics.span('execute_query'):
+                results, pagination_info, error = execute_query(
+                    cursor, condition, cell_type, gene_params,
+                    output_fields, cre_fields, tf_fields, include_de=include_de, 
+                    de_params=de_params, cre_params=cre_params, tf_params=tf_params,
+                    page=page, per_page=per_page, after=after, count_mode=count_mode
+                )
             
             # Build the title for results
             title = f"Search Results ({condition}, {cell_type})"
@@ -660,69 +1388,52 @@ def search():
             if gene_params.get('gene-identifier'):
                 title += f" - {gene_params.get('gene-id-type').upper()}: {gene_params.get('gene-identifier')}"
                 description += f", {gene_params.get('gene-id-type').upper()}: {gene_params.get('gene-identifier')}"
+            gene_list = get_gene_list_store().get(gene_params.get('gene-list-id'))
+            if gene_list:
+                title += f" - Gene list of {len(gene_list['identifiers']):,}"
             
-            # Generate column headers and table HTML for the result table
+            # Rendered by the _results_table.html include; both paths stream the page
             if results:
-                headers = list(results[0].keys())
-                table_html = generate_table_html(
-                        results=results, 
-                        headers=headers, 
-                        pagination_info=pagination_info, 
-                        title=title,
-                        condition=condition,
-                        cell_type=cell_type,
-                        active_tab=active_tab,
-                        gene_params=gene_params,
-                        output_fields=output_fields,
-                        include_de=include_de,
-                        de_params=de_params,
-                        cre_params=cre_params,
-                        cre_fields=cre_fields,
-                        tf_params=tf_params,
-                        tf_fields=tf_fields
-                    )
+                table = {
+                    'results': results,
+                    'headers': list(results[0].keys()),
+                    'pagination': pagination_info,
+                    'title': title,
+                    'unmatched': gene_list['unmatched'][:GENE_LIST_REPORT_MAX] if gene_list else [],
+                    'unmatched_count': len(gene_list['unmatched']) if gene_list else 0,
+                    'count_url': f"{url_for('search_count')}?{export_query}&per_page={per_page}"
+                }
 
                 if is_ajax:
-                    return render_template('results_fragment.html',
-                                            table_html=table_html,
-                                            results=results,
-                                            headers=headers,
-                                            pagination_info=pagination_info,
-                                            title=title,
-                                            condition=condition,
-                                            cell_type=cell_type,
-                                            active_tab=active_tab,
-                                            result_id=result_id if results else None)
-                                            # gene_params=gene_params,
-                                            # output_fields=output_fields,
-                                            # include_de=include_de,
-                                            # de_params=de_params,
-                                            # cre_params=cre_params,
-                                            # cre_fields=cre_fields,
-                                            # tf_params=tf_params,
-                                            # tf_fields=tf_fields,
-                                            # error=error)
+                    return with_etag(Response(stream_template('results_fragment.html',
+                                                              table=table,
+                                                              condition=condition,
+                                                              cell_type=cell_type,
+                                                              active_tab=active_tab,
+                                                              export_query=export_query,
+                                                              result_id=result_id)), etag)
                 else:
-                    # original thml rendering for full page loads
-                    table_html = table_html
-                    return render_template('updated_search.html',
-                                           table_html=table_html,
-                                           condition=condition,
-                                           cell_type=cell_type,
-                                           active_tab=active_tab,
-                                           error=error,
-                                           result_id=result_id if results else None,
-                                           pagination_info=pagination_info)
+                    return with_etag(Response(stream_template('updated_search.html',
+                                                              table=table,
+                                                              condition=condition,
+                                                              cell_type=cell_type,
+                                                              active_tab=active_tab,
+                                                              error=error,
+                                                              result_id=result_id,
+                                                              export_query=export_query,
+                                                              pagination_info=pagination_info)), etag)
             else:
                 if is_ajax:
                     return jsonify({
                         'status': 'error',
                         'message': error or "No results found matching your criteria."
+                                   + identifier_suggestions(gene_params, tf_params)
                     })
                 else:
                     return render_template('updated_search.html',
-                                           error=error or "No results found matching your criteria.",
-                                           table_html=None,
+                                           error=error or "No results found matching your criteria."
+                                                 + identifier_suggestions(gene_params, tf_params),
+                                           table=None,
                                            condition=None,
                                            cell_type=None,
                                            active_tab=active_tab,
@@ -736,7 +1447,7 @@ def search():
         else:
             return render_template('updated_search.html',
                                   error=f"Application error: {str(e)}",
-                                  table_html=None,
+                                  table=None,
                                   condition=None,
                                   cell_type=None,
                                   active_tab=active_tab,
@@ -745,396 +1456,728 @@ def search():
     finally:
         if connection:
             cursor.close()
-            connection.close()
+            get_pool().release(connection)
             
-@app.route('/downloads')
+@route('/search_count', methods=['GET'])
+def search_count():
+    """Exact total for a search, requested by the results page of a count=later search."""
+    data = request.args
+    if not data.get('condition') or not data.get('cell_type'):
+        return jsonify({'status': 'error', 'message': "Both condition and cell type are required."}), 400
+    try:
+        per_page = int(data.get('per_page', 10))
+    except (ValueError, TypeError):
+        per_page = 10
+    
+    try:
+        base_query, params, _ = build_search_query(**parse_search_args(data))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    try:
+        # Usually joins the COUNT that /search started for the first page
+        count_future = submit_exact_count(base_query, params, get_data_version())
+        if count_future is None:
+            with db_cursor() as cursor:
+                total_count = get_exact_count(cursor, base_query, params)
+        else:
+            total_count = count_future.result()
+    except (mariadb.Error, PoolTimeout) as e:
+        return jsonify({'status': 'error', 'message': f"Database count query error: {str(e)}"}), 500
+    
+    return jsonify({
+        'status': 'success',
+        'total_records': total_count,
+        'total_pages': (total_count + per_page - 1) // per_page
+    })
+
+@route('/gene_list', methods=['POST'])
+def upload_gene_list():
+    """Store a pasted or uploaded gene list and report which identifiers match no gene.
+
+    Returns the list id that /search, /search_count and /export take as
+    gene-list-id, so a list of thousands of genes is one search, not thousands.
+    """
+    id_type = request.form.get('gene-id-type', 'hgnc')
+    text = request.form.get('gene-list', '')
+    upload = request.files.get('gene-list-file')
+    if upload and upload.filename:
+        text += '\n' + upload.read().decode('utf-8', errors='replace')
+    
+    try:
+        identifiers = parse_identifiers(text, id_type, get_config()['GENE_LIST_MAX_IDS'])
+    except GeneListError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    list_id = gene_list_id(id_type, identifiers)
+    record = get_gene_list_store().get(list_id)
+    if record is None:
+        # Resolve once to report unmatched identifiers; the table stays on this
+        # pooled connection, and others build their own when a search needs it
+        try:
+            with db_cursor() as cursor:
+                version = get_data_version(cursor)
+                cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {gene_list_table(list_id, version)}")
+                unmatched = load_gene_list_table(cursor, list_id, id_type, identifiers, version)
+        except (mariadb.Error, PoolTimeout) as e:
+            return jsonify({'status': 'error', 'message': f"Could not resolve the gene list: {str(e)}"}), 500
+        get_gene_list_store().save(id_type, identifiers, unmatched)
+    else:
+        unmatched = record['unmatched']
+    
+    return jsonify({
+        'status': 'success',
+        'list_id': list_id,
+        'id_type': id_type,
+        'submitted': len(identifiers),
+        'matched': len(identifiers) - len(unmatched),
+        'unmatched_count': len(unmatched),
+        'unmatched': unmatched[:GENE_LIST_REPORT_MAX]
+    })
+
+# Export formats: name -> (delimiter, mimetype, gzip)
+EXPORT_FORMATS = {
+    'csv': (',', 'text/csv', False),
+    'tsv': ('\t', 'text/tab-separated-values', False),
+    'csv.gz': (',', 'application/gzip', True),
+    'tsv.gz': ('\t', 'application/gzip', True)
+}
+EXPORT_BATCH_ROWS = 5000
+
+def open_export_cursor(pool, connection, query, params):
+    """Run an export query on a checked-out connection before any response is sent.
+
+    Returns (cursor, release). SQL errors raise here (the connection is
+    discarded), so the route can answer with an error status instead of a
+    truncated file. release(finished) returns the connection to the pool,
+    and discards it unless every row was read; calls after the first do
+    nothing.
+    """
+    try:
+        cursor = connection.cursor(buffered=False)
+        ensure_gene_list_tables(cursor, query, get_gene_list_store())
+        cursor.execute(query, params)
+    except Exception:
+        pool.release(connection, discard=True)
+        raise
+    released = []
+    
+    def release(finished=False):
+        if not released:
+            released.append(True)
+            pool.release(connection, discard=not finished)
+    return cursor, release
+
+def stream_export_rows(cursor, release, delimiter, compress):
+    """Yield encoded chunks of an executed export query's full result set.
+
+    Rows come from an unbuffered cursor in batches, so memory stays flat
+    however many rows the query returns. The pooled connection is held
+    until the last row is sent and discarded if the client disconnects
+    mid-stream, since it still has unread rows pending.
+    """
+    finished = False
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31: gzip container
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator='\n')
+    
+    def flush():
+        chunk = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(chunk) if compressor else chunk
+    
+    try:
+        writer.writerow([desc[0] for desc in cursor.description])
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_ROWS)
+            if not rows:
+                break
+            writer.writerows(rows)
+            chunk = flush()
+            if chunk:
+                yield chunk
+        chunk = flush()
+        if compressor:
+            chunk += compressor.flush()
+        if chunk:
+            yield chunk
+        cursor.close()
+        finished = True
+    finally:
+        release(finished)
+
+@route('/export', methods=['GET'])
+def export_results():
+    """Stream every row of a search (no pagination) as CSV/TSV, optionally gzipped."""
+    data = request.args
+    export_format = data.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return f"Unsupported export format: {export_format}", 400
+    
+    search_args = parse_search_args(data)
+    if not search_args['condition_name'] or not search_args['cell_type']:
+        return "Both condition and cell type are required.", 400
+    
+    try:
+        base_query, params, layout = build_search_query(**search_args)
+    except ValueError as e:
+        return f"Invalid search parameters: {str(e)}", 400
+    query = select_rows(base_query, layout)
+    
+    delimiter, mimetype, compress = EXPORT_FORMATS[export_format]
+    current_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = secure_filename(
+        f"{data.get('active_tab', 'gene')}_{search_args['condition_name']}_{search_args['cell_type']}_{current_time}.{export_format}")
+    
+    # Only row fetching streams; a failed connection or query still gets an error status
+    pool = get_pool()
+    try:
+        connection = pool.acquire()
+    except (mariadb.Error, PoolTimeout) as e:
+        return f"Could not connect to the database: {str(e)}", 503
+    try:
+        cursor, release = open_export_cursor(pool, connection, query, params)
+    except GeneListError as e:
+        return str(e), 400
+    except mariadb.Error as e:
+        return f"Database error occurred: {str(e)}", 500
+    
+    response = Response(stream_with_context(stream_export_rows(cursor, release, delimiter, compress)),
+                        mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Returns the connection even if the body is never iterated
+    response.call_on_close(release)
+    return response
+
+@route('/downloads')
 def downloads():
-    """Display the downloads page with saved files."""
-    # Load saved files metadata
-    saved_files = load_saved_files()
+    """Display one page of saved files, filtered by condition, cell type and date."""
+    filters = {
+        'condition': request.args.get('condition') or None,
+        'cell_type': request.args.get('cell_type') or None,
+        'date_from': request.args.get('date_from') or None,
+        'date_to': request.args.get('date_to') or None
+    }
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+    except ValueError:
+        page = 1
     
-    # Convert saved_files dict to list for template
-    files_list = list(saved_files.values())
-    return render_template('downloads.html', saved_files=files_list)
+    files_list, total = get_saved_store().list(page=page, per_page=SAVED_PER_PAGE, **filters)
+    filter_query = urlencode({key: value for key, value in filters.items() if value})
+    return render_template('downloads.html',
+                           saved_files=files_list,
+                           filters=filters,
+                           facets=get_saved_store().facets(),
+                           filter_query=filter_query,
+                           page=page,
+                           total_files=total,
+                           total_pages=max(1, (total + SAVED_PER_PAGE - 1) // SAVED_PER_PAGE))
 
-@app.route('/download/<file_id>')
+@route('/download/<file_id>')
 def download_file(file_id):
     """Download a specific saved file."""
-    # Load saved files metadata
-    saved_files = load_saved_files()
-    
-    if file_id not in saved_files:
+    file_data = get_saved_store().get(file_id)
+    if file_data is None:
         return "File not found", 404
     
-    file_data = saved_files[file_id]
-    return send_file(file_data['filepath'], 
-                    mimetype='text/csv',
-                    as_attachment=True,
-                    download_name=file_data['filename'])
+    # Saved files never change, so Range and If-None-Match requests can be answered from disk
+    gzipped = file_data['filename'].endswith('.gz')
+    return send_file(file_data['filepath'],
+                     mimetype='application/gzip' if gzipped else 'text/csv',
+                     as_attachment=True,
+                     download_name=file_data['filename'],
+                     conditional=True,
+                     etag=True,
+                     max_age=get_config()['SAVED_FILE_MAX_AGE'])
 
-@app.route('/delete-file/<file_id>', methods=['DELETE'])
+@route('/delete-file/<file_id>', methods=['DELETE'])
 def delete_file(file_id):
     """Delete a saved file."""
-    # Load saved files metadata
-    saved_files = load_saved_files()
-    
-    if file_id not in saved_files:
+    # Remove from the index first so no page lists a file that is going away
+    file_data = get_saved_store().delete(file_id)
+    if file_data is None:
         return "File not found", 404
     
     # Remove file from filesystem
-    filepath = saved_files[file_id]['filepath']
     try:
-        os.remove(filepath)
+        os.remove(file_data['filepath'])
     except OSError:
         pass  # File may not exist
     
-    # Remove file from metadata
-    del saved_files[file_id]
-    
-    # Save updated metadata
-    save_saved_files(saved_files)
-    
     return "File deleted", 200
 
-@app.route('/save_current_result/<result_id>', methods=['POST'])
+@route('/save_current_result/<result_id>', methods=['POST'])
 def save_current_result(result_id):
-    """Save currently displayed results to downloads."""
+    """Save every row of the displayed search to downloads as a gzipped CSV."""
     try:
-        # Check if results exist in the session
-        if 'current_results' not in session:
-            print("No results found in session")
-            return "No results to save", 400
-        
-        results = session['current_results']
+        # The results page posts its search as a query string; re-run it unpaginated
+        search_data = MultiDict(parse_qsl(request.form.get('search_query', '')))
+        search_args = parse_search_args(search_data)
+        condition = search_args['condition_name']
+        cell_type = search_args['cell_type']
+        if not condition or not cell_type:
+            return "No search to save", 400
+        try:
+            base_query, params, layout = build_search_query(**search_args)
+        except ValueError as e:
+            return f"Invalid search parameters: {str(e)}", 400
+        query = select_rows(base_query, layout)
         
         # Generate filename and save
         current_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         search_type = request.form.get('search_type', 'query')
-        condition = request.form.get('condition', 'unknown')
-        cell_type = request.form.get('cell_type', 'unknown')
+        filename = secure_filename(
+            f"{search_type}_{condition}_{cell_type}_{current_time}_{result_id}{SAVED_FILE_SUFFIX}")
+        filepath = os.path.join(get_save_dir(), filename)
         
-        filename = f"{search_type}_{condition}_{cell_type}_{current_time}_{result_id}.csv"
+        with metrics.span('save_query'), db_cursor(buffered=False) as cursor:
+            ensure_gene_list_tables(cursor, query, get_gene_list_store())
+            cursor.execute(query, params)
+            headers = [desc[0] for desc in cursor.description]
+            batches = iter(lambda: cursor.fetchmany(EXPORT_BATCH_ROWS), [])
+            row_count, size_bytes, preview_rows = write_saved_result(filepath, headers, batches)
         
-        if save_results_to_csv(results, filename):
-            # Store file metadata
-            filepath = os.path.join(SAVE_DIR, filename)
-            file_size = get_file_size(filepath)
-            preview = get_preview(filepath)
-            
-            title = f"{search_type.capitalize()} Results ({condition}, {cell_type})"
-            description = f"Search for {condition} in {cell_type} cells"
-            
-            # Load current saved files
-            saved_files = load_saved_files()
-            
-            # Add the new file
-            saved_files[result_id] = {
-                'id': result_id,
-                'filename': filename,
-                'filepath': filepath,
-                'title': title,
-                'description': description,
-                'type': search_type.capitalize(),
-                'date': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'size': file_size,
-                'preview': preview,
-                'condition': condition,
-                'cell_type': cell_type
-            }
-            
-            # Save updated metadata
-            save_saved_files(saved_files)
-            
-            return redirect(url_for('downloads'))
-        else:
-            print("Failed to save results to CSV")
-            return "Failed to save results", 500
+        if not row_count:
+            os.remove(filepath)
+            return "No results to save", 400
+        
+        get_saved_store().add({
+            'id': result_id,
+            'filename': filename,
+            'filepath': filepath,
+            'title': f"{search_type.capitalize()} Results ({condition}, {cell_type})",
+            'description': f"Search for {condition} in {cell_type} cells ({row_count:,} rows)",
+            'type': search_type.capitalize(),
+            'date': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'size': format_file_size(size_bytes),
+            'preview': format_preview(headers, preview_rows),
+            'condition': condition,
+            'cell_type': cell_type,
+            'row_count': row_count,
+            'size_bytes': size_bytes
+        })
+        
+        return redirect(url_for('downloads'))
     except Exception as e:
         print(f"Error in save_current_result: {str(e)}")
-        import traceback
         traceback.print_exc()
         return f"Error: {str(e)}", 500
 
-@app.route('/students_25/yhkwok/HW3_folder/yhkwok_visualization/volcano_plot', methods=['POST'])
-@app.route('/volcano_plot', methods=['POST'])
+# DE rows of one condition/cell type for /volcano_plot
+VOLCANO_QUERY = """
+SELECT g.gene_symbol, de.log2foldchange, de.p_value, de.padj
+FROM Differential_Expression de
+JOIN Genes g ON de.gid = g.gid
+JOIN Conditions c ON de.cdid = c.cdid
+JOIN Cell_Type ct ON de.cell_id = ct.cell_id
+WHERE c.name = ? AND ct.cell = ?
+ORDER BY g.gene_symbol
+"""
+
+@route('/students_25/yhkwok/HW3_folder/yhkwok_visualization/volcano_plot', methods=['GET', 'POST'])
+@route('/volcano_plot', methods=['GET', 'POST'])
 def volcano_plot():
-    if request.method == 'POST':
-        condition_name = request.form.get('condition_name')
-        cell_type = request.form.get('cell_type')
+    condition_name = request.values.get('condition_name')
+    cell_type = request.values.get('cell_type')
+    
+    if not condition_name or not cell_type:
+        return jsonify([])
+    
+    etag = data_etag('volcano_plot', normalized_params(request.values))
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+    
+    try:
+        def fetch():
+            with db_cursor() as cursor:
+                return metrics.timed_execute(cursor, VOLCANO_QUERY, (condition_name, cell_type))
         
-        if not condition_name or not cell_type:
-            return jsonify([])
+        with metrics.span('fetch'):
+            rows = cached_results('volcano_plot', (condition_name, cell_type), fetch)
         
-        conn = None
-        cursor = None
-        try:
-            conn = connect_database()
-            cursor = conn.cursor(dictionary=True)  
-            
-            query = """
-            SELECT g.gene_symbol, de.log2foldchange, de.p_value, de.padj
-            FROM Differential_Expression de
-            JOIN Genes g ON de.gid = g.gid
-            JOIN Conditions c ON de.cdid = c.cdid
-            JOIN Cell_Type ct ON de.cell_id = ct.cell_id
-            WHERE c.name = ? AND ct.cell = ?
-            ORDER BY g.gene_symbol
-            """
-            
-            cursor.execute(query, (condition_name, cell_type))
-            results = cursor.fetchall()
-            
-            return jsonify(results)
-        
-        except Exception as e:
-            return jsonify({"error": f"Database error occurred: {str(e)}"}), 500
-            
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-            
-    return jsonify([])
-
-@app.route('/students_25/yhkwok/HW3_folder/yhkwok_visualization/fgsea_plot', methods=['POST'])
-@app.route('/fgsea_plot', methods=['POST'])
-def fgsea_plot():
-    if request.method == 'POST':
-        condition_name = request.form.get('condition_name')
-        cell_type = request.form.get('cell_type')
-        pathway_count = request.form.get('pathway_count', 10)
+        if request.values.get('format') != 'columnar':
+            with metrics.span('serialize'):
+                return with_etag(jsonify([dict(zip(VOLCANO_COLUMNS, row)) for row in rows]), etag)
         
         try:
-            pathway_count = int(pathway_count)
-            if pathway_count < 1:
-                pathway_count = 10
-            elif pathway_count > 50:
-                pathway_count = 50
+            padj_threshold = min(1.0, max(0.0, float(request.values.get('padj_threshold', 0.05))))
         except ValueError:
-            pathway_count = 10
-            
-        if not condition_name or not cell_type:
-            return jsonify([])
-        
-        conn = None
-        cursor = None
+            padj_threshold = 0.05
         try:
-            conn = connect_database()
-            cursor = conn.cursor(dictionary=True)
-            
-            up_query = """
-            SELECT 
-                bp.name AS pathway_name, 
-                COUNT(DISTINCT g.gid) AS gene_count,
-                SUM(CASE WHEN de.log2foldchange > 0 THEN 1 ELSE 0 END) AS up_regulated,
-                SUM(CASE WHEN de.log2foldchange < 0 THEN 1 ELSE 0 END) AS down_regulated,
-                AVG(de.log2foldchange) AS avg_fold_change,
-                -LOG10(GREATEST(MIN(COALESCE(de.padj, 1)), 0.000001)) AS neg_log_padj,
-                'up' AS regulation_direction
-            FROM Biological_Pathways bp
-            JOIN Gene_Pathway_Associations gpa ON bp.pid = gpa.pid
-            JOIN Genes g ON gpa.gid = g.gid
-            JOIN Differential_Expression de ON g.gid = de.gid
-            JOIN Conditions c ON de.cdid = c.cdid
-            JOIN Cell_Type ct ON de.cell_id = ct.cell_id
-            WHERE 
-                c.name = ? 
-                AND ct.cell = ?
-                AND de.padj < 0.05
-            GROUP BY bp.name
-            HAVING 
-                COUNT(DISTINCT g.gid) >= 3
-                AND SUM(CASE WHEN de.log2foldchange > 0 THEN 1 ELSE 0 END) > SUM(CASE WHEN de.log2foldchange < 0 THEN 1 ELSE 0 END)
-            ORDER BY neg_log_padj DESC
-            LIMIT ?
-            """
-            
-            down_query = """
-            SELECT 
-                bp.name AS pathway_name, 
-                COUNT(DISTINCT g.gid) AS gene_count,
-                SUM(CASE WHEN de.log2foldchange > 0 THEN 1 ELSE 0 END) AS up_regulated,
-                SUM(CASE WHEN de.log2foldchange < 0 THEN 1 ELSE 0 END) AS down_regulated,
-                AVG(de.log2foldchange) AS avg_fold_change,
-                -LOG10(GREATEST(MIN(COALESCE(de.padj, 1)), 0.000001)) AS neg_log_padj,
-                'down' AS regulation_direction
-            FROM Biological_Pathways bp
-            JOIN Gene_Pathway_Associations gpa ON bp.pid = gpa.pid
-            JOIN Genes g ON gpa.gid = g.gid
-            JOIN Differential_Expression de ON g.gid = de.gid
-            JOIN Conditions c ON de.cdid = c.cdid
-            JOIN Cell_Type ct ON de.cell_id = ct.cell_id
-            WHERE 
-                c.name = ? 
-                AND ct.cell = ?
-                AND de.padj < 0.05
-            GROUP BY bp.name
-            HAVING 
-                COUNT(DISTINCT g.gid) >= 3
-                AND SUM(CASE WHEN de.log2foldchange > 0 THEN 1 ELSE 0 END) <= SUM(CASE WHEN de.log2foldchange < 0 THEN 1 ELSE 0 END)
-            ORDER BY neg_log_padj DESC
-            LIMIT ?
-            """
-            
-            cursor.execute(up_query, (condition_name, cell_type, pathway_count))
-            up_results = cursor.fetchall()
-            
-            cursor.execute(down_query, (condition_name, cell_type, pathway_count))
-            down_results = cursor.fetchall()
-            
-            results = up_results + down_results
-            
-            return jsonify(results)
-        
-        except Exception as e:
-            return jsonify({"error": f"Database error occurred: {str(e)}"}), 500
-            
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-            
-    return jsonify([])
-
-@app.route('/students_25/yhkwok/HW3_folder/yhkwok_visualization/cre_gene_scatter', methods=['POST'])
-@app.route('/cre_gene_scatter', methods=['POST'])
-def cre_gene_scatter():
-    if request.method == 'POST':
-        condition_name = request.form.get('condition_name')
-        cell_type = request.form.get('cell_type')
-        
-        if not condition_name or not cell_type:
-            return jsonify([])
-        
-        conn = None
-        cursor = None
+            log2fc_threshold = max(0.0, float(request.values.get('log2fc_threshold', 1)))
+        except ValueError:
+            log2fc_threshold = 1.0
         try:
-            conn = connect_database()
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """
-            SELECT 
-                g.gene_symbol, 
-                de.log2foldchange as gene_log2fc, 
-                cre.cre_log2foldchange as cre_log2fc,
-                de.padj as gene_padj,
-                0.05 as cre_padj,
-                cgi.distance_to_TSS,
-                cre.chromosome as cre_chr,
-                cre.start_position as cre_start,
-                cre.end_position as cre_end
-            FROM Genes g
-            JOIN Differential_Expression de ON g.gid = de.gid
-            JOIN Conditions c ON de.cdid = c.cdid AND c.name = ?
-            JOIN Cell_Type ct ON de.cell_id = ct.cell_id AND ct.cell = ?
-            JOIN CRE_Gene_Interactions cgi ON g.gid = cgi.gid
-            JOIN Cis_Regulatory_Elements cre ON cgi.cid = cre.cid
-                AND cre.cdid = c.cdid 
-                AND cre.cell_id = ct.cell_id
-            ORDER BY g.gene_symbol
-            """
-            
-            cursor.execute(query, (condition_name, cell_type))
-            results = cursor.fetchall()
-            
-            return jsonify(results)
+            max_points = max(0, int(request.values.get('max_points', 0)))
+        except ValueError:
+            max_points = 0
         
-        except Exception as e:
-            try:
-                fallback_query = """
-                SELECT 
-                    g.gene_symbol, 
-                    de.log2foldchange as gene_log2fc, 
-                    cre.cre_log2foldchange as cre_log2fc,
-                    de.padj as gene_padj,
-                    0.05 as cre_padj,
-                    cgi.distance_to_TSS,
-                    cre.chromosome as cre_chr,
-                    cre.start_position as cre_start,
-                    cre.end_position as cre_end
-                FROM Genes g
-                JOIN Differential_Expression de ON g.gid = de.gid
-                JOIN Conditions c ON de.cdid = c.cdid 
-                JOIN Cell_Type ct ON de.cell_id = ct.cell_id
-                JOIN CRE_Gene_Interactions cgi ON g.gid = cgi.gid
-                JOIN Cis_Regulatory_Elements cre ON cgi.cid = cre.cid
-                WHERE c.name = ? AND ct.cell = ?
-                ORDER BY g.gene_symbol
-                LIMIT 100
-                """
-                cursor.execute(fallback_query, (condition_name, cell_type))
-                results = cursor.fetchall()
-                return jsonify(results)
-            except Exception:
-                return jsonify({"error": f"Database error occurred: {str(e)}"}), 500
-            
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-            
-    return jsonify([])
+        with metrics.span('serialize'):
+            return with_etag(jsonify(build_columnar_payload(
+                rows,
+                padj_threshold=padj_threshold,
+                log2fc_threshold=log2fc_threshold,
+                max_points=max_points,
+                encoding=request.values.get('encoding', 'json')
+            )), etag)
+    
+    except Exception as e:
+        return jsonify({"error": f"Database error occurred: {str(e)}"}), 500
 
-@app.route('/students_25/yhkwok/HW3_folder/yhkwok_visualization/get_conditions', methods=['GET'])
-@app.route('/get_conditions', methods=['GET'])
-def get_conditions():
-    conn = None
-    cursor = None
+# Top-N up and down pathways from the precomputed summary, one indexed query
+FGSEA_SUMMARY_QUERY = """
+(SELECT
+    bp.name AS pathway_name,
+    s.gene_count,
+    s.up_regulated,
+    s.down_regulated,
+    s.avg_fold_change,
+    -LOG10(GREATEST(s.min_padj, 0.000001)) AS neg_log_padj,
+    s.regulation_direction
+FROM Pathway_DE_Summary s
+JOIN Conditions c ON s.cdid = c.cdid
+JOIN Cell_Type ct ON s.cell_id = ct.cell_id
+JOIN Biological_Pathways bp ON s.pid = bp.pid
+WHERE c.name = ? AND ct.cell = ?
+    AND s.regulation_direction = 'up'
+    AND s.gene_count >= 3
+ORDER BY s.min_padj
+LIMIT ?)
+UNION ALL
+(SELECT
+    bp.name AS pathway_name,
+    s.gene_count,
+    s.up_regulated,
+    s.down_regulated,
+    s.avg_fold_change,
+    -LOG10(GREATEST(s.min_padj, 0.000001)) AS neg_log_padj,
+    s.regulation_direction
+FROM Pathway_DE_Summary s
+JOIN Conditions c ON s.cdid = c.cdid
+JOIN Cell_Type ct ON s.cell_id = ct.cell_id
+JOIN Biological_Pathways bp ON s.pid = bp.pid
+WHERE c.name = ? AND ct.cell = ?
+    AND s.regulation_direction = 'down'
+    AND s.gene_count >= 3
+ORDER BY s.min_padj
+LIMIT ?)
+"""
+
+# Live aggregation, used only if the summary table has not been built
+FGSEA_UP_QUERY = """
+SELECT
+    bp.name AS pathway_name,
+    COUNT(DISTINCT g.gid) AS gene_count,
+    SUM(CASE WHEN de.log2foldchange > 0 THEN 1 ELSE 0 END) AS up_regulated,
+    SUM(CASE WHEN de.log2foldchange < 0 THEN 1 ELSE 0 END) AS down_regulated,
+    AVG(de.log2foldchange) AS avg_fold_change,
+    -LOG10(GREATEST(MIN(COALESCE(de.padj, 1)), 0.000001)) AS neg_log_padj,
+    'up' AS regulation_direction
+FROM Biological_Pathways bp
+JOIN Gene_Pathway_Associations gpa ON bp.pid = gpa.pid
+JOIN Genes g ON gpa.gid = g.gid
+JOIN Differential_Expression de ON g.gid = de.gid
+JOIN Conditions c ON de.cdid = c.cdid
+JOIN Cell_Type ct ON de.cell_id = ct.cell_id
+WHERE
+    c.name = ?
+    AND ct.cell = ?
+    AND de.padj < 0.05
+GROUP BY bp.name
+HAVING
+    COUNT(DISTINCT g.gid) >= 3
+    AND SUM(CASE WHEN de.log2foldchange > 0 THEN 1 ELSE 0 END) > SUM(CASE WHEN de.log2foldchange < 0 THEN 1 ELSE 0 END)
+ORDER BY neg_log_padj DESC
+LIMIT ?
+"""
+
+FGSEA_DOWN_QUERY = """
+SELECT
+    bp.name AS pathway_name,
+    COUNT(DISTINCT g.gid) AS gene_count,
+    SUM(CASE WHEN de.log2foldchange > 0 THEN 1 ELSE 0 END) AS up_regulated,
+    SUM(CASE WHEN de.log2foldchange < 0 THEN 1 ELSE 0 END) AS down_regulated,
+    AVG(de.log2foldchange) AS avg_fold_change,
+    -LOG10(GREATEST(MIN(COALESCE(de.padj, 1)), 0.000001)) AS neg_log_padj,
+    'down' AS regulation_direction
+FROM Biological_Pathways bp
+JOIN Gene_Pathway_Associations gpa ON bp.pid = gpa.pid
+JOIN Genes g ON gpa.gid = g.gid
+JOIN Differential_Expression de ON g.gid = de.gid
+JOIN Conditions c ON de.cdid = c.cdid
+JOIN Cell_Type ct ON de.cell_id = ct.cell_id
+WHERE
+    c.name = ?
+    AND ct.cell = ?
+    AND de.padj < 0.05
+GROUP BY bp.name
+HAVING
+    COUNT(DISTINCT g.gid) >= 3
+    AND SUM(CASE WHEN de.log2foldchange > 0 THEN 1 ELSE 0 END) <= SUM(CASE WHEN de.log2foldchange < 0 THEN 1 ELSE 0 END)
+ORDER BY neg_log_padj DESC
+LIMIT ?
+"""
+
+@route('/students_25/yhkwok/HW3_folder/yhkwok_visualization/fgsea_plot', methods=['GET', 'POST'])
+@route('/fgsea_plot', methods=['GET', 'POST'])
+def fgsea_plot():
+    condition_name = request.values.get('condition_name')
+    cell_type = request.values.get('cell_type')
+    pathway_count = request.values.get('pathway_count', 10)
+    
     try:
-        conn = connect_database()
-        cursor = conn.cursor(dictionary=True)
+        pathway_count = int(pathway_count)
+        if pathway_count < 1:
+            pathway_count = 10
+        elif pathway_count > 50:
+            pathway_count = 50
+    except ValueError:
+        pathway_count = 10
         
-        query = "SELECT name FROM Conditions ORDER BY name"
-        cursor.execute(query)
-        results = cursor.fetchall()
+    if not condition_name or not cell_type:
+        return jsonify([])
+    
+    etag = data_etag('fgsea_plot', normalized_params(request.values))
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+    
+    try:
+        def fetch():
+            with db_cursor(dictionary=True) as cursor:
+                try:
+                    return metrics.timed_execute(cursor, FGSEA_SUMMARY_QUERY,
+                                                 (condition_name, cell_type, pathway_count,
+                                                  condition_name, cell_type, pathway_count))
+                except mariadb.Error:
+                    pass
+                
+                up_results = metrics.timed_execute(cursor, FGSEA_UP_QUERY,
+                                                   (condition_name, cell_type, pathway_count))
+                down_results = metrics.timed_execute(cursor, FGSEA_DOWN_QUERY,
+                                                     (condition_name, cell_type, pathway_count))
+            return up_results + down_results
         
-        return jsonify([item['name'] for item in results])
+        with metrics.span('fetch'):
+            results = cached_results('fgsea_plot', (condition_name, cell_type, pathway_count), fetch)
+        with metrics.span('serialize'):
+            return with_etag(jsonify(results), etag)
+    
     except Exception as e:
         return jsonify({"error": f"Database error occurred: {str(e)}"}), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-            
-@app.route('/students_25/yhkwok/HW3_folder/yhkwok_visualization/get_cell_types', methods=['GET'])
-@app.route('/get_cell_types', methods=['GET'])
-def get_cell_types():
-    conn = None
-    cursor = None
+
+# Gene/CRE pairs of one condition/cell type for /cre_gene_scatter
+CRE_GENE_SCATTER_QUERY = """
+SELECT
+    g.gene_symbol,
+    de.log2foldchange as gene_log2fc,
+    cre.cre_log2foldchange as cre_log2fc,
+    de.padj as gene_padj,
+    0.05 as cre_padj,
+    cgi.distance_to_TSS,
+    cre.chromosome as cre_chr,
+    cre.start_position as cre_start,
+    cre.end_position as cre_end
+FROM Genes g
+JOIN Differential_Expression de ON g.gid = de.gid
+JOIN Conditions c ON de.cdid = c.cdid AND c.name = ?
+JOIN Cell_Type ct ON de.cell_id = ct.cell_id AND ct.cell = ?
+JOIN CRE_Gene_Interactions cgi ON g.gid = cgi.gid
+JOIN Cis_Regulatory_Elements cre ON cgi.cid = cre.cid
+    AND cre.cdid = c.cdid
+    AND cre.cell_id = ct.cell_id
+ORDER BY g.gene_symbol
+"""
+
+CRE_GENE_SCATTER_FALLBACK_QUERY = """
+SELECT
+    g.gene_symbol,
+    de.log2foldchange as gene_log2fc,
+    cre.cre_log2foldchange as cre_log2fc,
+    de.padj as gene_padj,
+    0.05 as cre_padj,
+    cgi.distance_to_TSS,
+    cre.chromosome as cre_chr,
+    cre.start_position as cre_start,
+    cre.end_position as cre_end
+FROM Genes g
+JOIN Differential_Expression de ON g.gid = de.gid
+JOIN Conditions c ON de.cdid = c.cdid
+JOIN Cell_Type ct ON de.cell_id = ct.cell_id
+JOIN CRE_Gene_Interactions cgi ON g.gid = cgi.gid
+JOIN Cis_Regulatory_Elements cre ON cgi.cid = cre.cid
+WHERE c.name = ? AND ct.cell = ?
+ORDER BY g.gene_symbol
+LIMIT 100
+"""
+
+@route('/students_25/yhkwok/HW3_folder/yhkwok_visualization/cre_gene_scatter', methods=['GET', 'POST'])
+@route('/cre_gene_scatter', methods=['GET', 'POST'])
+def cre_gene_scatter():
+    condition_name = request.values.get('condition_name')
+    cell_type = request.values.get('cell_type')
+    
+    if not condition_name or not cell_type:
+        return jsonify([])
+    
+    etag = data_etag('cre_gene_scatter', normalized_params(request.values))
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+    
     try:
-        conn = connect_database()
-        cursor = conn.cursor(dictionary=True)
-        
-        query = "SELECT cell FROM Cell_Type ORDER BY cell"
-        cursor.execute(query)
-        results = cursor.fetchall()
+        def fetch():
+            with db_cursor(dictionary=True) as cursor:
+                try:
+                    return metrics.timed_execute(cursor, CRE_GENE_SCATTER_QUERY, (condition_name, cell_type))
+                except mariadb.Error:
+                    return metrics.timed_execute(cursor, CRE_GENE_SCATTER_FALLBACK_QUERY,
+                                                 (condition_name, cell_type))
         
-        return jsonify([item['cell'] for item in results])
+        with metrics.span('fetch'):
+            results = cached_results('cre_gene_scatter', (condition_name, cell_type), fetch)
+        with metrics.span('serialize'):
+            return with_etag(jsonify(results), etag)
+    
     except Exception as e:
         return jsonify({"error": f"Database error occurred: {str(e)}"}), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+
+@route('/pathway_suggest', methods=['GET'])
+def pathway_suggest():
+    """Autocomplete for the pathway filter: names containing the typed term."""
+    term = request.args.get('q', '').strip()
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), PATHWAY_SUGGEST_MAX)
+    except ValueError:
+        limit = 10
+    get_data_version()
+    index = get_pathway_index()
+    if index is None:
+        # Still building; the form just shows no suggestions yet
+        return jsonify({'status': 'loading', 'suggestions': []})
+    return jsonify({'status': 'success', 'suggestions': index.suggest(term, limit) if term else []})
+
+@route('/students_25/yhkwok/HW3_folder/yhkwok_visualization/get_conditions', methods=['GET'])
+@route('/get_conditions', methods=['GET'])
+def get_conditions():
+    snapshot = get_dimensions()
+    if snapshot is None:
+        return jsonify({"error": "Database error occurred: could not read the conditions"}), 500
+    return dimension_response(snapshot.conditions, snapshot)
+            
+@route('/students_25/yhkwok/HW3_folder/yhkwok_visualization/get_cell_types', methods=['GET'])
+@route('/get_cell_types', methods=['GET'])
+def get_cell_types():
+    snapshot = get_dimensions()
+    if snapshot is None:
+        return jsonify({"error": "Database error occurred: could not read the cell types"}), 500
+    return dimension_response(snapshot.cell_types, snapshot)
+
+@route('/get_transcription_factors', methods=['GET'])
+def get_transcription_factors():
+    snapshot = get_dimensions()
+    if snapshot is None:
+        return jsonify({"error": "Database error occurred: could not read the transcription factors"}), 500
+    return dimension_response(snapshot.transcription_factors, snapshot)
         
-@app.route('/test_db_connection', methods=['GET'])
+@route('/test_db_connection', methods=['GET'])
 def test_db_connection():
     try:
-        conn = connect_database()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        result = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        return jsonify({"status": "success", "message": "Database connection successful", "result": result})
+        with db_cursor() as cursor:
+            cursor.execute("SELECT 1")
+            result = cursor.fetchone()
+        return jsonify({"status": "success", "message": "Database connection successful",
+                        "result": result, "pool": get_pool().metrics()})
     except Exception as e:
-        return jsonify({"status": "error", "message": f"Database connection failed: {str(e)}"}), 500
+        return jsonify({"status": "error", "message": f"Database connection failed: {str(e)}",
+                        "pool": get_pool().metrics()}), 500
+
+@route('/pool_metrics', methods=['GET'])
+def pool_metrics():
+    """Connection pool usage for this worker process."""
+    return jsonify(get_pool().metrics())
+
+@route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request, phase and SQL timing histograms for this worker process, in Prometheus text format."""
+    return Response(metrics.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@route('/cache_metrics', methods=['GET'])
+def cache_metrics():
+    """Result cache hit/miss counters for this worker process."""
+    return jsonify({
+        'data_version': _data_version,
+        'results': get_result_cache().stats(),
+        'counts': get_count_cache().stats(),
+        'counts_running': len(_pending_counts)
+    })
+
+
+def _reset_lazy_state():
+    """Forget the pool, stores, caches and indexes built from the previous settings.
+
+    Each is rebuilt from the current settings on its next use.
+    """
+    global _pool, _save_dir, _saved_store, _gene_list_store, _result_cache, _count_cache
+    global _count_executor, _data_version, _data_version_checked, _dimensions
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close()
+        _pool = None
+    with _storage_lock:
+        _save_dir = _saved_store = _gene_list_store = None
+    with _cache_lock:
+        _result_cache = _count_cache = None
+    with _pending_counts_lock:
+        if _count_executor is not None and _count_executor_pid == os.getpid():
+            _count_executor.shutdown(wait=False)
+        _count_executor = None
+        _pending_counts.clear()
+    with _data_version_lock:
+        _data_version = None
+        _data_version_checked = 0.0
+    with _dimensions_lock:
+        _dimensions = None
+    for state, lock in ((_interval_indexes, _interval_index_lock),
+                        (_identifier_resolver, _identifier_resolver_lock),
+                        (_pathway_index, _pathway_index_lock)):
+        with lock:
+            state['version'] = None
+
+def create_app(config=None):
+    """Build the Flask app: settings from the environment, updated with ``config``.
+
+    Nothing here touches the database or the file system; the pool, the
+    save directory and the indexes are all set up on first use. An app
+    created with different settings than the last one replaces them.
+    """
+    global _config
+    app = Flask(__name__, template_folder='templates', static_folder='static')
+    app.config.update(config_from_env())
+    if config:
+        app.config.update(config)
+    previous, _config = _config, app.config
+    if previous is not None and dict(previous) != dict(app.config):
+        _reset_lazy_state()
+    metrics.configure_slow_query_log(app.config['SLOW_QUERY_LOG_MS'], app.config['SLOW_QUERY_LOG'])
+    app.before_request(start_request_metrics)
+    app.after_request(record_request_metrics)
+    # Registered last so it runs first: the metrics see the bytes actually sent
+    app.after_request(compress_response)
+    for rule, options, view in _routes:
+        app.add_url_rule(rule, view_func=view, **options)
+    return app
+
+_app = None
+
+def __getattr__(name):
+    """``base.app`` (e.g. gunicorn base:app): an app built from the environment on first access."""
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
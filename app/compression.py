@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Content-negotiated gzip/Brotli compression of response bodies.
+
+Brotli is used when the ``brotli`` package is installed and the client
+accepts it; otherwise gzip. Streamed bodies are compressed chunk by chunk
+with a flush every STREAM_FLUSH_BYTES of input, so the browser can render
+the top of a result page while the rest is still being generated.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # higher qualities cost far more CPU for a few percent
+# Flushing after every small template chunk would wreck the ratio
+STREAM_FLUSH_BYTES = 8192
+
+
+def accepted_encodings(accept_encoding):
+    """Encodings named in an Accept-Encoding header with a non-zero q-value."""
+    accepted = set()
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding):
+    """'br', 'gzip' or None for a request's Accept-Encoding header."""
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding):
+    """Compress a whole body."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of str/bytes chunks, flushing every STREAM_FLUSH_BYTES.
+
+    Closes the inner iterable when done, so streamed templates and their
+    database cursors are released as they would be uncompressed.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        flush = compressor.flush
+        finish = compressor.finish
+        compress_chunk = compressor.process
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+        compress_chunk = compressor.compress
+    try:
+        pending = 0
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            data = compress_chunk(chunk)
+            pending += len(chunk)
+            if pending >= STREAM_FLUSH_BYTES:
+                data += flush()
+                pending = 0
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Process-wide MariaDB connection pool shared by every Flask route."""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import mariadb
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available before the checkout timeout."""
+
+
+class ConnectionPool:
+    """Fixed-size pool of MariaDB connections.
+
+    Connections are opened lazily up to ``size``. Idle connections are
+    pinged on checkout once they have been idle longer than
+    ``ping_interval`` seconds, and connections older than ``recycle``
+    seconds are replaced, so a worker never hands out a connection the
+    server has already dropped.
+    """
+
+    def __init__(self, size=5, timeout=10.0, recycle=1800, ping_interval=5.0,
+                 **connect_kwargs):
+        self.size = int(size)
+        self.timeout = float(timeout)
+        self.recycle = float(recycle)
+        self.ping_interval = float(ping_interval)
+        self.connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition()
+        self._idle = []           # (connection, created_at, last_used) - LIFO
+        self._created_at = {}     # id(connection) -> creation time
+        self._open = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        # Counters exposed through metrics()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._checkout_seconds_total = 0.0
+        self._checkout_seconds_max = 0.0
+
+    def _connect(self):
+        """Open a new autocommit connection."""
+        conn = mariadb.connect(**self.connect_kwargs)
+        # Read-only traffic: never hold a snapshot open between checkouts
+        conn.autocommit = True
+        self._created_at[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn):
+        """Close a connection without raising."""
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except mariadb.Error:
+            pass
+
+    def _is_healthy(self, conn):
+        """Round-trip a ping to detect connections dropped by the server."""
+        try:
+            conn.ping()
+            return True
+        except mariadb.Error:
+            return False
+
+    def acquire(self, wait=True):
+        """Check out a connection, waiting up to ``timeout`` seconds.
+
+        With ``wait=False`` returns None at once when every connection is
+        in use, instead of waiting or raising PoolTimeout.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        conn = None
+        last_used = None
+
+        with self._cond:
+            if self._closed:
+                raise PoolTimeout("Connection pool is closed")
+            self._waiting += 1
+            try:
+                while True:
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._open < self.size:
+                        # Reserve a slot; the connection is opened outside the lock
+                        self._open += 1
+                        break
+                    if not wait:
+                        return None
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"Timed out after {self.timeout:.1f}s waiting for a "
+                            f"database connection (pool size {self.size})")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._in_use += 1
+
+        try:
+            now = time.monotonic()
+            if conn is not None:
+                too_old = now - self._created_at.get(id(conn), now) > self.recycle
+                needs_ping = now - last_used > self.ping_interval
+                if too_old or (needs_ping and not self._is_healthy(conn)):
+                    self._discard(conn)
+                    conn = None
+                    self._reconnects += 1
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            # Give the slot back so waiters are not starved by a failed connect
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            self._checkout_seconds_total += elapsed
+            self._checkout_seconds_max = max(self._checkout_seconds_max, elapsed)
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, or close it if ``discard`` is set."""
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._open -= 1
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and always returns it."""
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except (mariadb.InterfaceError, mariadb.OperationalError):
+            # The connection itself may be unusable; do not hand it out again
+            broken = True
+            raise
+        finally:
+            self.release(conn, discard=broken)
+
+    def metrics(self):
+        """Snapshot of pool usage and checkout latency."""
+        with self._cond:
+            checkouts = self._checkouts
+            return {
+                'size': self.size,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'checkouts': checkouts,
+                'timeouts': self._timeouts,
+                'reconnects': self._reconnects,
+                'checkout_latency_avg_ms': (self._checkout_seconds_total / checkouts * 1000) if checkouts else 0.0,
+                'checkout_latency_max_ms': self._checkout_seconds_max * 1000,
+            }
+
+    def close(self):
+        """Close all idle connections and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._open -= 1
+                self._discard(conn)
+            self._cond.notify_all()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Immutable per-worker snapshot of the small dimension tables.
+
+Conditions, Cell_Type and Transcription_Factors only change when
+load_data.py runs, which bumps Data_Version. A snapshot is read once per
+data version and serves the dropdown endpoints and the search's condition
+and cell-type validation without a database round trip. Names are looked
+up case-insensitively, as the database collation compares them.
+"""
+
+import hashlib
+import json
+from types import MappingProxyType
+
+
+def dimension_key(name):
+    return str(name).strip().upper()
+
+
+def sorted_names(rows):
+    """Names of (id, name) rows in case-insensitive order, like ORDER BY name."""
+    return tuple(sorted((name for _, name in rows), key=lambda name: (dimension_key(name), name)))
+
+
+class DimensionSnapshot:
+    """Names and ids of the dimension tables for one data version."""
+
+    def __init__(self, version, conditions, cell_types, transcription_factors):
+        """Each table is given as (id, name) rows."""
+        self.version = version
+        self.conditions = sorted_names(conditions)
+        self.cell_types = sorted_names(cell_types)
+        self.transcription_factors = sorted_names(transcription_factors)
+        self._condition_ids = MappingProxyType({dimension_key(name): cdid for cdid, name in conditions})
+        self._cell_type_ids = MappingProxyType({dimension_key(name): cell_id for cell_id, name in cell_types})
+        self._tf_ids = MappingProxyType({dimension_key(name): tfid for tfid, name in transcription_factors})
+        # Content hash, so workers that loaded the same data agree on the ETag
+        payload = json.dumps([self.conditions, self.cell_types, self.transcription_factors])
+        self.etag = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def load(cls, cursor, version):
+        cursor.execute("SELECT cdid, name FROM Conditions")
+        conditions = cursor.fetchall()
+        cursor.execute("SELECT cell_id, cell FROM Cell_Type")
+        cell_types = cursor.fetchall()
+        cursor.execute("SELECT tfid, name FROM Transcription_Factors")
+        transcription_factors = cursor.fetchall()
+        return cls(version, conditions, cell_types, transcription_factors)
+
+    def condition_id(self, name):
+        """cdid of a condition name, or None if there is no such condition."""
+        return self._condition_ids.get(dimension_key(name))
+
+    def cell_type_id(self, name):
+        """cell_id of a cell type, or None if there is no such cell type."""
+        return self._cell_type_ids.get(dimension_key(name))
+
+    def tf_id(self, name):
+        """tfid of a transcription factor name, or None."""
+        return self._tf_ids.get(dimension_key(name))
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Uploaded gene lists, joined into searches through temporary tables.
+
+A list is stored once under a content hash (its list id) so that every
+worker process can find it. Search SQL refers to it as the table
+gene_list_<id>_v<data version>. Temporary tables belong to one connection,
+so ensure_gene_list_tables() creates and fills the table on whichever
+pooled connection is about to run the query. The table then stays on that
+connection, and later pages and counts reuse it, until it falls out of the
+connection's MAX_GENE_LIST_TABLES most recently used lists or a reload
+makes it stale. A reload gives searches a new table name, so gids resolved
+against older data are never reused. Identifiers resolve through
+Identifier_Lookup, as single-gene searches do.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import mariadb
+
+from identifiers import GENE_ID_TYPES, normalize_identifier
+
+MAX_GENE_LIST_IDS = 50000  # default; the app passes its GENE_LIST_MAX_IDS setting
+INSERT_BATCH_ROWS = 1000
+MAX_GENE_LIST_TABLES = 8  # MEMORY tables kept per pooled connection
+
+LIST_ID = re.compile(r'^[0-9a-f]{16}$')
+GENE_LIST_TABLE = re.compile(r'\bgene_list_([0-9a-f]{16})_v(\d+)\b')
+ER_TABLE_EXISTS_ERROR = 1050
+
+
+class GeneListError(ValueError):
+    """Raised for empty, oversized or unknown gene lists."""
+
+
+def parse_identifiers(text, id_type, max_ids=MAX_GENE_LIST_IDS):
+    """Identifiers from pasted or uploaded text, in order, without duplicates.
+
+    Accepts any mix of newlines, commas, semicolons, tabs and spaces.
+    Duplicates are found in the normalized form Identifier_Lookup stores:
+    upper-cased, with Ensembl version suffixes (ENSG...\\.12) dropped.
+    """
+    if id_type not in GENE_ID_TYPES:
+        raise GeneListError(f"Unknown identifier type: {id_type}")
+    identifiers = {}
+    for token in re.split(r'[\s,;]+', text or ''):
+        token = token.strip('"\'')
+        if not token:
+            continue
+        identifiers.setdefault(normalize_identifier(token, id_type), token)
+    if not identifiers:
+        raise GeneListError("The gene list is empty.")
+    if len(identifiers) > max_ids:
+        raise GeneListError(f"The gene list has {len(identifiers):,} identifiers; "
+                            f"the limit is {max_ids:,}.")
+    return list(identifiers.values())
+
+
+def gene_list_id(id_type, identifiers):
+    """Content hash naming a list, so re-uploading the same list reuses its tables and caches."""
+    payload = id_type + '\n' + '\n'.join(identifiers)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def gene_list_table(list_id, version):
+    return f"gene_list_{list_id}_v{version}"
+
+
+def _connection_tables(cursor):
+    """Gene list tables created on the cursor's connection, least recently used first."""
+    connection = cursor.connection
+    tables = getattr(connection, '_gene_list_tables', None)
+    if tables is None:
+        tables = connection._gene_list_tables = OrderedDict()
+    return tables
+
+
+def _track_table(cursor, table):
+    """Mark ``table`` as just used and drop the tables it makes stale or evicts.
+
+    Tables from older data versions are dropped at once; beyond
+    MAX_GENE_LIST_TABLES the least recently used are dropped.
+    """
+    tables = _connection_tables(cursor)
+    version = int(GENE_LIST_TABLE.match(table).group(2))
+    tables[table] = version
+    tables.move_to_end(table)
+    for name, seen in list(tables.items()):
+        if seen < version or len(tables) > MAX_GENE_LIST_TABLES:
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {name}")
+            del tables[name]
+
+
+class GeneListStore:
+    """Gene lists as JSON files in a directory shared by the worker processes."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def _path(self, list_id):
+        return os.path.join(self.directory, f"{list_id}.json")
+
+    def save(self, id_type, identifiers, unmatched):
+        """Store a list with the identifiers that matched no gene; returns its list id."""
+        list_id = gene_list_id(id_type, identifiers)
+        record = {'id_type': id_type, 'identifiers': identifiers, 'unmatched': unmatched}
+        os.makedirs(self.directory, exist_ok=True)
+        partial_path = f"{self._path(list_id)}.{os.getpid()}.partial"
+        with open(partial_path, 'w') as f:
+            json.dump(record, f)
+        os.replace(partial_path, self._path(list_id))
+        with self._lock:
+            self._cache[list_id] = record
+        return list_id
+
+    def get(self, list_id):
+        """The stored record ({id_type, identifiers, unmatched}), or None."""
+        if not LIST_ID.match(list_id or ''):
+            return None
+        with self._lock:
+            record = self._cache.get(list_id)
+        if record is None:
+            try:
+                with open(self._path(list_id)) as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                return None
+            with self._lock:
+                self._cache[list_id] = record
+        return record
+
+
+def load_gene_list_table(cursor, list_id, id_type, identifiers, version):
+    """Create and fill gene_list_<id>_v<version> (gid) on the cursor's connection.
+
+    Identifiers resolve as IdentifierResolver.resolve_gene does, so symbols
+    fall back to aliases and versioned Ensembl IDs match. Returns the
+    identifiers that matched no gene. Raises mariadb.Error with errno
+    ER_TABLE_EXISTS_ERROR if the table is already on this connection.
+    """
+    table = gene_list_table(list_id, version)
+    staging = f"{table}_ids"
+    # identifier_lookup.sql leaves out aliases equal to an approved symbol, so
+    # matching symbols and aliases together is the resolver's symbol-then-alias order
+    lookup = (f"Identifier_Lookup il ON il.kind = 'gene' AND il.identifier = s.identifier "
+              f"AND il.id_type IN ({', '.join(repr(t) for t in GENE_ID_TYPES[id_type])})")
+    # Tracked again only once filled, so a failed load is retried by the next query
+    _connection_tables(cursor).pop(table, None)
+    cursor.execute(f"CREATE TEMPORARY TABLE {table} (gid INT NOT NULL PRIMARY KEY) ENGINE=MEMORY")
+    try:
+        cursor.execute(f"CREATE TEMPORARY TABLE {staging} (identifier VARCHAR(64) NOT NULL PRIMARY KEY) "
+                       f"ENGINE=MEMORY")
+        keys = [normalize_identifier(identifier, id_type) for identifier in identifiers]
+        for i in range(0, len(keys), INSERT_BATCH_ROWS):
+            batch = keys[i:i + INSERT_BATCH_ROWS]
+            cursor.execute(f"INSERT IGNORE INTO {staging} (identifier) VALUES "
+                           + ", ".join(["(?)"] * len(batch)), batch)
+        cursor.execute(f"INSERT IGNORE INTO {table} (gid) "
+                       f"SELECT il.target_id FROM {staging} s JOIN {lookup}")
+        cursor.execute(f"SELECT s.identifier FROM {staging} s LEFT JOIN {lookup} "
+                       f"WHERE il.target_id IS NULL")
+        unmatched = {row[0] for row in cursor.fetchall()}
+        cursor.execute(f"DROP TEMPORARY TABLE {staging}")
+    except Exception:
+        # Never leave a half-filled list table behind for the next query on this connection
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {staging}")
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {table}")
+        raise
+    _track_table(cursor, table)
+    return [identifier for identifier, key in zip(identifiers, keys) if key in unmatched]
+
+
+def ensure_gene_list_tables(cursor, sql, store):
+    """Make every gene_list_<id>_v<version> table ``sql`` refers to exist on the cursor's connection."""
+    for list_id, version in set(GENE_LIST_TABLE.findall(sql)):
+        table = gene_list_table(list_id, version)
+        if table in _connection_tables(cursor):
+            _track_table(cursor, table)
+            continue
+        record = store.get(list_id)
+        if record is None:
+            raise GeneListError(f"Gene list {list_id} is no longer available; upload it again.")
+        try:
+            load_gene_list_table(cursor, list_id, record['id_type'], record['identifiers'], int(version))
+        except mariadb.Error as e:
+            if getattr(e, 'errno', None) != ER_TABLE_EXISTS_ERROR:
+                raise
+            _track_table(cursor, table)
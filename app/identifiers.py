@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""In-memory resolver from gene and TF identifiers to gid/tfid.
+
+Built from Identifier_Lookup (migrations/002_identifier_lookup.sql, kept up
+to date by load_data.py). That table holds every HGNC symbol, alias,
+Entrez ID, Ensembl ID and TF name in one normalized form: upper-cased, with
+Ensembl version suffixes dropped. Searches can then filter on integer keys
+instead of wrapping the indexed name columns in lower().
+"""
+
+import difflib
+
+# Identifier_Lookup.id_type values tried, in order, for each gene-id-type
+GENE_ID_TYPES = {
+    'hgnc': ('hgnc', 'alias'),
+    'entrez': ('entrez',),
+    'ensembl': ('ensembl',),
+}
+SUGGEST_TYPES = {'gene': ('hgnc', 'alias'), 'tf': ('tf',)}
+
+
+def normalize_identifier(value, id_type=None):
+    """The form identifiers are stored in: trimmed, upper-cased, Ensembl version dropped."""
+    value = str(value).strip().upper()
+    if id_type == 'ensembl' or (id_type is None and value.startswith('ENS')):
+        value = value.split('.', 1)[0]
+    return value
+
+
+class IdentifierResolver:
+    """Lookup dicts of one data version: (kind, id_type) -> identifier -> ids."""
+
+    def __init__(self, rows):
+        self.tables = {}
+        for kind, id_type, identifier, target_id in rows:
+            table = self.tables.setdefault((kind, id_type), {})
+            table.setdefault(identifier, []).append(target_id)
+        self._suggest_candidates = {}
+
+    @classmethod
+    def load(cls, cursor):
+        cursor.execute("SELECT kind, id_type, identifier, target_id FROM Identifier_Lookup")
+        return cls(cursor.fetchall())
+
+    def __len__(self):
+        return sum(len(table) for table in self.tables.values())
+
+    def _lookup(self, kind, id_types, value):
+        for id_type in id_types:
+            ids = self.tables.get((kind, id_type), {}).get(value)
+            if ids:
+                return sorted(set(ids))
+        return []
+
+    def resolve_gene(self, id_type, value):
+        """gids for an identifier of the gene tab's id type; symbols fall back to aliases."""
+        id_types = GENE_ID_TYPES.get(id_type)
+        if not id_types:
+            return []
+        return self._lookup('gene', id_types, normalize_identifier(value, id_type))
+
+    def resolve_tf(self, name):
+        """tfids of a transcription factor name."""
+        return self._lookup('tf', ('tf',), normalize_identifier(name, 'tf'))
+
+    def suggest(self, kind, value, limit=5):
+        """Close spellings of a gene symbol/alias or TF name that did not resolve."""
+        value = normalize_identifier(value)
+        if not value:
+            return []
+        candidates = self._suggest_candidates.get(kind)
+        if candidates is None:
+            # Bucketed by first character: typos rarely change it, and it keeps difflib fast
+            candidates = {}
+            for id_type in SUGGEST_TYPES[kind]:
+                for identifier in self.tables.get((kind, id_type), {}):
+                    candidates.setdefault(identifier[:1], set()).add(identifier)
+            self._suggest_candidates[kind] = candidates
+        return difflib.get_close_matches(value, sorted(candidates.get(value[:1], ())), n=limit, cutoff=0.75)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Read-only genomic interval index for CRE, merged CRE and gene coordinates.
+
+Each chromosome keeps its intervals as parallel numpy arrays sorted by
+start, so range lookups are two binary searches plus a scan of the
+candidates. Requires numpy; callers should treat the index as
+unavailable when it is not installed.
+"""
+
+import os
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# Table -> id column for every index the web app keeps
+INTERVAL_INDEX_TABLES = {
+    'cre': ('Cis_Regulatory_Elements', 'cid'),
+    'merged_cre': ('Merged_CRES', 'mcid'),
+    'gene': ('Genes', 'gid')
+}
+
+
+def chromosome_key(chrom):
+    """Normalise a chromosome name the way MariaDB's case-insensitive = compares it."""
+    return str(chrom).strip().upper()
+
+
+class IntervalIndex:
+    """Per-chromosome sorted interval arrays with containment and overlap queries."""
+
+    def __init__(self, chromosomes):
+        # chromosome -> (starts, ends, ids, longest interval length)
+        self.chromosomes = chromosomes
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from an iterable of (id, chromosome, start, end) rows."""
+        grouped = {}
+        for row_id, chrom, start, end in rows:
+            if chrom is None or start is None or end is None:
+                continue
+            grouped.setdefault(chromosome_key(chrom), []).append((start, end, row_id))
+
+        chromosomes = {}
+        for chrom, intervals in grouped.items():
+            data = np.array(intervals, dtype=np.int64)
+            order = np.argsort(data[:, 0], kind='stable')
+            data = data[order]
+            starts = data[:, 0].copy()
+            ends = data[:, 1].copy()
+            ids = data[:, 2].astype(np.int32)
+            max_length = int((ends - starts).max()) if len(starts) else 0
+            chromosomes[chrom] = (starts, ends, ids, max_length)
+        return cls(chromosomes)
+
+    def __len__(self):
+        return sum(len(arrays[0]) for arrays in self.chromosomes.values())
+
+    def _targets(self, chrom):
+        if chrom is None:
+            return list(self.chromosomes.values())
+        arrays = self.chromosomes.get(chromosome_key(chrom))
+        return [arrays] if arrays is not None else []
+
+    def contained(self, chrom=None, start=None, end=None):
+        """IDs of intervals with start >= ``start`` and end <= ``end``.
+
+        Either bound may be None; ``chrom=None`` searches every chromosome.
+        Matches the search form's start_position >= / end_position <= filters.
+        """
+        matches = []
+        for starts, ends, ids, _ in self._targets(chrom):
+            lo = 0 if start is None else np.searchsorted(starts, start, side='left')
+            # An interval ending by ``end`` must also start by ``end``
+            hi = len(starts) if end is None else np.searchsorted(starts, end, side='right')
+            if hi <= lo:
+                continue
+            if end is None:
+                matches.append(ids[lo:hi])
+            else:
+                matches.append(ids[lo:hi][ends[lo:hi] <= end])
+        return np.concatenate(matches) if matches else np.empty(0, dtype=np.int32)
+
+    def overlapping(self, chrom, start, end):
+        """IDs of intervals on ``chrom`` that overlap [start, end]."""
+        matches = []
+        for starts, ends, ids, max_length in self._targets(chrom):
+            # Nothing starting before start - max_length can still reach start
+            lo = np.searchsorted(starts, start - max_length, side='left')
+            hi = np.searchsorted(starts, end, side='right')
+            if hi <= lo:
+                continue
+            matches.append(ids[lo:hi][ends[lo:hi] >= start])
+        return np.concatenate(matches) if matches else np.empty(0, dtype=np.int32)
+
+    def save(self, path):
+        """Write a snapshot that load() can read back without the database."""
+        arrays = {}
+        for i, (chrom, (starts, ends, ids, _)) in enumerate(self.chromosomes.items()):
+            arrays[f'chrom_{i}'] = np.array(chrom)
+            arrays[f'starts_{i}'] = starts
+            arrays[f'ends_{i}'] = ends
+            arrays[f'ids_{i}'] = ids
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a snapshot written by save()."""
+        chromosomes = {}
+        with np.load(path) as data:
+            i = 0
+            while f'chrom_{i}' in data:
+                starts = data[f'starts_{i}']
+                ends = data[f'ends_{i}']
+                max_length = int((ends - starts).max()) if len(starts) else 0
+                chromosomes[str(data[f'chrom_{i}'])] = (starts, ends, data[f'ids_{i}'], max_length)
+                i += 1
+        return cls(chromosomes)
+
+
+def load_interval_indexes(cursor, snapshot_dir=None, version=None):
+    """Build (or load from snapshots) every index in INTERVAL_INDEX_TABLES.
+
+    Snapshots are named <index>_v<version>.npz, so a data reload never
+    reuses coordinates from a previous version.
+    """
+    indexes = {}
+    for name, (table, id_column) in INTERVAL_INDEX_TABLES.items():
+        snapshot = None
+        if snapshot_dir and version is not None:
+            snapshot = os.path.join(snapshot_dir, f"{name}_v{version}.npz")
+            if os.path.exists(snapshot):
+                indexes[name] = IntervalIndex.load(snapshot)
+                continue
+
+        cursor.execute(f"SELECT {id_column}, chromosome, start_position, end_position FROM {table}")
+        indexes[name] = IntervalIndex.from_rows(cursor.fetchall())
+
+        if snapshot:
+            os.makedirs(snapshot_dir, exist_ok=True)
+            indexes[name].save(snapshot)
+    return indexes
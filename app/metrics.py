@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Request timing spans, SQL fingerprints and Prometheus-format histograms.
+
+Routes wrap each phase in ``span(phase)``, and queries go through
+``sql_span`` / ``timed_execute``, which also records the statement's
+fingerprint and row count. ``render_metrics()`` produces the text
+exposition served by /metrics. A SLOW_QUERY_LOG_MS threshold, set through
+configure_slow_query_log() from the app settings, turns on a slow query
+log (JSON lines, with parameters and EXPLAIN plan) written to
+SLOW_QUERY_LOG, or to stderr when that is unset.
+"""
+
+import bisect
+import contextvars
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 1000000)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+SLOW_QUERY_LOG_MS = 0  # 0 = off
+SLOW_QUERY_LOG = None
+
+# Route label of the request being served on this thread (or copied into a worker)
+current_route = contextvars.ContextVar('current_route', default='none')
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class Histogram:
+    """Thread-safe Prometheus histogram with a fixed label set."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}   # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labelvalues, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = format_labels(self.labelnames + ('le',), labelvalues + (repr(float(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labelnames + ('le',), labelvalues + ('+Inf',))
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            labels = format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {series[-2]}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Counter:
+    """Thread-safe Prometheus counter with a fixed label set."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for labelvalues, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{format_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram('app_request_seconds', 'Request time including streamed rendering.',
+                            ('route', 'status'))
+PHASE_SECONDS = Histogram('app_phase_seconds', 'Time spent in each phase of a request.', ('route', 'phase'))
+RESPONSE_BYTES = Histogram('app_response_bytes', 'Response body size.', ('route',), BYTE_BUCKETS)
+SQL_SECONDS = Histogram('app_sql_seconds', 'SQL execution and fetch time by statement fingerprint.',
+                        ('route', 'fingerprint'))
+SQL_ROWS = Histogram('app_sql_rows', 'Rows returned by statement fingerprint.', ('route', 'fingerprint'),
+                     ROW_BUCKETS)
+SLOW_QUERIES = Counter('app_slow_queries_total', 'Statements slower than SLOW_QUERY_LOG_MS.',
+                       ('route', 'fingerprint'))
+SQL_ERRORS = Counter('app_sql_errors_total', 'Statements that raised, by fingerprint.', ('route', 'fingerprint'))
+REGISTRY = [REQUEST_SECONDS, PHASE_SECONDS, RESPONSE_BYTES, SQL_SECONDS, SQL_ROWS, SLOW_QUERIES, SQL_ERRORS]
+
+_fingerprints = {}   # fingerprint -> normalized SQL, exposed as app_sql_fingerprint_info
+_fingerprints_lock = threading.Lock()
+_slow_log_lock = threading.Lock()
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+# Per-upload temporary tables (gene_lists.py); one series per list would grow without bound
+_GENE_LIST_TABLE = re.compile(r"\bgene_list_\w+")
+
+
+def normalize_sql(sql):
+    """SQL with literals and placeholders replaced by ?, so equal shapes compare equal."""
+    text = '\n'.join(line.split('--', 1)[0] for line in sql.splitlines())
+    text = _STRING_LITERAL.sub('?', text)
+    text = _GENE_LIST_TABLE.sub('gene_list_?', text)
+    text = text.replace('%s', '?')
+    text = _NUMBER.sub('?', text)
+    text = _PLACEHOLDER_LIST.sub('(?+)', text)
+    return ' '.join(text.split())
+
+
+def fingerprint(sql):
+    """Short stable id of a statement's shape; the full text is kept for the info metric."""
+    normalized = normalize_sql(sql)
+    digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+    with _fingerprints_lock:
+        _fingerprints.setdefault(digest, normalized)
+    return digest
+
+
+@contextmanager
+def span(phase, route=None):
+    """Time a block into app_phase_seconds{route, phase}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_SECONDS.observe(time.perf_counter() - start, route or current_route.get(), phase)
+
+
+class SQLSpan:
+    """What sql_span callers fill in: the number of rows they fetched."""
+
+    def __init__(self):
+        self.rows = 0
+
+
+@contextmanager
+def sql_span(cursor, sql, params=()):
+    """Time execute + fetch of one statement run inside the block.
+
+    Set ``.rows`` on the yielded object to record the row count. Statements
+    slower than SLOW_QUERY_LOG_MS are logged with their parameters and the
+    EXPLAIN plan, which is run on the same cursor after the block.
+    """
+    digest = fingerprint(sql)
+    route = current_route.get()
+    record = SQLSpan()
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield record
+        failed = False
+    finally:
+        # Failed statements are timed too; a query that times out is the one worth seeing
+        elapsed = time.perf_counter() - start
+        SQL_SECONDS.observe(elapsed, route, digest)
+        SQL_ROWS.observe(record.rows, route, digest)
+        if failed:
+            SQL_ERRORS.inc(route, digest)
+    if SLOW_QUERY_LOG_MS and elapsed * 1000 >= SLOW_QUERY_LOG_MS:
+        SLOW_QUERIES.inc(route, digest)
+        log_slow_query(cursor, route, digest, sql, params, elapsed, record.rows)
+
+
+def timed_execute(cursor, sql, params=(), fetch='all'):
+    """cursor.execute + fetchall/fetchone under sql_span; returns what was fetched."""
+    with sql_span(cursor, sql, params) as record:
+        cursor.execute(sql, params)
+        if fetch == 'one':
+            result = cursor.fetchone()
+            record.rows = 0 if result is None else 1
+        else:
+            result = cursor.fetchall()
+            record.rows = len(result)
+    return result
+
+
+def explain_plan(cursor, sql, params):
+    """EXPLAIN rows as dicts, or an error string; never raises."""
+    try:
+        cursor.execute(f"EXPLAIN {sql}", params)
+        columns = [desc[0] for desc in cursor.description]
+        return [row if isinstance(row, dict) else dict(zip(columns, row)) for row in cursor.fetchall()]
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+
+
+def log_slow_query(cursor, route, digest, sql, params, elapsed, rows):
+    entry = json.dumps({
+        'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'route': route,
+        'fingerprint': digest,
+        'ms': round(elapsed * 1000, 1),
+        'rows': rows,
+        'sql': ' '.join(sql.split()),
+        'params': list(params or ()),
+        'plan': explain_plan(cursor, sql, params),
+    }, default=str)
+    with _slow_log_lock:
+        if SLOW_QUERY_LOG:
+            with open(SLOW_QUERY_LOG, 'a') as handle:
+                handle.write(entry + '\n')
+        else:
+            print(f"Slow query: {entry}", file=sys.stderr)
+
+
+def configure_slow_query_log(threshold_ms, path=None):
+    """Log statements slower than ``threshold_ms`` (0 turns the log off) to ``path``, or stderr."""
+    global SLOW_QUERY_LOG_MS, SLOW_QUERY_LOG
+    SLOW_QUERY_LOG_MS = threshold_ms
+    SLOW_QUERY_LOG = path
+
+
+def count_streamed_bytes(iterable, on_close):
+    """Pass a streamed body through as bytes, calling on_close(total bytes) once it is exhausted or closed."""
+    total = 0
+    try:
+        for chunk in iterable:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            total += len(chunk)
+            yield chunk
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+        on_close(total)
+
+
+def render_metrics():
+    """Every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.append("# HELP app_sql_fingerprint_info Normalized SQL text of each fingerprint.")
+    lines.append("# TYPE app_sql_fingerprint_info gauge")
+    with _fingerprints_lock:
+        fingerprints = sorted(_fingerprints.items())
+    for digest, normalized in fingerprints:
+        lines.append(f"app_sql_fingerprint_info{format_labels(('fingerprint', 'sql'), (digest, normalized))} 1")
+    return '\n'.join(lines) + '\n'
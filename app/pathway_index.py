@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""In-memory trigram index over Biological_Pathways names.
+
+Resolves a pathway search term to the pids whose names contain it, and
+ranks names for the search form's autocomplete. Names and terms are
+compared upper-cased, with runs of spaces and underscores folded to one
+space, so "tnf alpha" finds HALLMARK_TNF_ALPHA_SIGNALING_VIA_NFKB.
+Each trigram maps to the sorted positions of the names containing it. A
+term's candidates are the intersection of its trigrams' postings, and
+only those candidates are checked with a substring test.
+"""
+
+import heapq
+import re
+from array import array
+
+TRIGRAM = 3
+SEPARATORS = re.compile(r'[\s_]+')
+
+
+def normalize_pathway_text(text):
+    """Upper-cased, with spaces and underscores folded, as names are indexed."""
+    return SEPARATORS.sub(' ', str(text)).strip().upper()
+
+
+def trigrams(text):
+    return {text[i:i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+
+class PathwayIndex:
+    """Trigram postings over the normalized names of one data version."""
+
+    def __init__(self, rows):
+        """Build from an iterable of (pid, name) rows."""
+        self.pids = []
+        self.names = []
+        self.keys = []
+        postings = {}
+        for pid, name in rows:
+            if not name:
+                continue
+            position = len(self.pids)
+            key = normalize_pathway_text(name)
+            self.pids.append(pid)
+            self.names.append(name)
+            self.keys.append(key)
+            for gram in trigrams(key):
+                postings.setdefault(gram, []).append(position)
+        # Positions are appended in order, so every posting list is already sorted
+        self.postings = {gram: array('i', positions) for gram, positions in postings.items()}
+
+    @classmethod
+    def load(cls, cursor):
+        cursor.execute("SELECT pid, name FROM Biological_Pathways")
+        return cls(cursor.fetchall())
+
+    def __len__(self):
+        return len(self.pids)
+
+    def _positions(self, term):
+        """Positions of the names containing the normalized term."""
+        if not term:
+            return []
+        grams = trigrams(term)
+        if not grams:
+            # Too short for a trigram: a scan of the names is still only a few ms
+            return [i for i, key in enumerate(self.keys) if term in key]
+        postings = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        return sorted(i for i in candidates if term in self.keys[i])
+
+    def search(self, term):
+        """pids of every pathway whose name contains ``term``."""
+        return [self.pids[i] for i in self._positions(normalize_pathway_text(term))]
+
+    def suggest(self, term, limit=10):
+        """Names containing ``term``: prefix matches first, then word starts, then the rest.
+
+        Shorter names come first within each group.
+        """
+        term = normalize_pathway_text(term)
+
+        def rank(i):
+            key = self.keys[i]
+            if key.startswith(term):
+                group = 0
+            elif f" {term}" in key:
+                group = 1
+            else:
+                group = 2
+            return group, len(key), key
+
+        positions = heapq.nsmallest(limit, self._positions(term), key=rank)
+        return [self.names[i] for i in positions]
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""In-process LRU + TTL cache for query results."""
+
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_cache_key(*parts):
+    """Hash JSON-serialisable parts into a stable cache key."""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def approximate_size(value, _depth=0):
+    """Rough deep size in bytes of lists/tuples/dicts of scalars."""
+    size = sys.getsizeof(value)
+    if _depth > 4:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += approximate_size(k, _depth + 1) + approximate_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += approximate_size(item, _depth + 1)
+    return size
+
+
+class ResultCache:
+    """Thread-safe LRU cache with per-entry TTL and a total memory budget.
+
+    Entries larger than the whole budget are never stored. Eviction removes
+    least recently used entries until both the entry and byte limits hold.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600, max_bytes=64 * 1024 * 1024):
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl)
+        self.max_bytes = int(max_bytes)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (value, size, stored_at)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return (hit, value); expired entries count as misses."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[2] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        """Store a value, evicting least recently used entries as needed."""
+        size = approximate_size(value)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': (self.hits / lookups) if lookups else 0.0,
+            }
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""SQLite index of saved result files, shared by every worker process.
+
+The database runs in WAL mode, so page views read while another worker
+saves or deletes. Each insert and delete is a single transaction, which
+means concurrent saves no longer overwrite each other the way rewriting
+saved_files.json did. A saved_files.json left by older versions is
+imported once, on first use, and then renamed to saved_files.json.migrated.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+SAVED_COLUMNS = ('id', 'filename', 'filepath', 'title', 'description', 'type', 'date',
+                 'size', 'preview', 'condition', 'cell_type', 'row_count', 'size_bytes')
+
+# Columns added after the first release: name -> definition for ALTER TABLE
+ADDED_COLUMNS = {
+    'row_count': 'INTEGER',
+    'size_bytes': 'INTEGER',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS saved_results (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    filepath TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    type TEXT,
+    date TEXT NOT NULL,          -- 'YYYY-MM-DD HH:MM:SS', sorts as text
+    size TEXT,
+    preview TEXT,
+    condition TEXT,
+    cell_type TEXT,
+    row_count INTEGER,
+    size_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_saved_date ON saved_results (date);
+CREATE INDEX IF NOT EXISTS idx_saved_scope_date ON saved_results (condition, cell_type, date);
+CREATE INDEX IF NOT EXISTS idx_saved_cell_date ON saved_results (cell_type, date);
+CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class SavedResultStore:
+    """Saved-result metadata in SQLite; one connection per thread and process."""
+
+    def __init__(self, path, legacy_json=None, busy_timeout=10.0):
+        self.path = path
+        self.legacy_json = legacy_json
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # Forked workers must open their own connection, as with the DB pool
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._add_missing_columns(conn)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._import_legacy_json(conn)
+        return conn
+
+    def _add_missing_columns(self, conn):
+        existing = {row['name'] for row in conn.execute("PRAGMA table_info(saved_results)")}
+        for name, definition in ADDED_COLUMNS.items():
+            if name not in existing:
+                try:
+                    conn.execute(f"ALTER TABLE saved_results ADD COLUMN {name} {definition}")
+                except sqlite3.OperationalError:
+                    pass  # another worker added it first
+
+    def _import_legacy_json(self, conn):
+        """Copy saved_files.json into the table once; the meta flag makes it a no-op afterwards."""
+        if not self.legacy_json:
+            return
+        if conn.execute("SELECT 1 FROM store_meta WHERE key = 'json_imported'").fetchone():
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another worker may have imported it while we waited for the lock
+            if conn.execute("SELECT 1 FROM store_meta WHERE key = 'json_imported'").fetchone():
+                conn.execute("COMMIT")
+                return
+            records = {}
+            if os.path.exists(self.legacy_json):
+                with open(self.legacy_json) as f:
+                    records = json.load(f)
+            conn.executemany(
+                f"INSERT OR IGNORE INTO saved_results ({', '.join(SAVED_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(SAVED_COLUMNS))})",
+                [tuple(dict(record, id=record.get('id', file_id)).get(column) for column in SAVED_COLUMNS)
+                 for file_id, record in records.items() if record.get('filepath')]
+            )
+            conn.execute("INSERT INTO store_meta (key, value) VALUES ('json_imported', ?)", (str(len(records)),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if records:
+            os.replace(self.legacy_json, self.legacy_json + '.migrated')
+            print(f"Imported {len(records)} saved results from {self.legacy_json}")
+
+    def add(self, record):
+        """Insert one saved result; ``record`` is keyed by SAVED_COLUMNS."""
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO saved_results ({', '.join(SAVED_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(SAVED_COLUMNS))})",
+            tuple(record.get(column) for column in SAVED_COLUMNS)
+        )
+
+    def get(self, file_id):
+        """The saved result as a dict, or None."""
+        row = self._connection().execute("SELECT * FROM saved_results WHERE id = ?", (file_id,)).fetchone()
+        return dict(row) if row else None
+
+    def delete(self, file_id):
+        """Remove a saved result and return its record, or None if it was not there."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT * FROM saved_results WHERE id = ?", (file_id,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM saved_results WHERE id = ?", (file_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return dict(row) if row else None
+
+    def list(self, condition=None, cell_type=None, date_from=None, date_to=None, page=1, per_page=20):
+        """(records newest first, total matching) for one page of the filtered listing.
+
+        ``date_from`` and ``date_to`` are inclusive 'YYYY-MM-DD' days.
+        """
+        where, params = [], []
+        if condition:
+            where.append("condition = ?")
+            params.append(condition)
+        if cell_type:
+            where.append("cell_type = ?")
+            params.append(cell_type)
+        if date_from:
+            where.append("date >= ?")
+            params.append(date_from)
+        if date_to:
+            # Every time on the last day sorts before the day followed by '~'
+            where.append("date <= ?")
+            params.append(f"{date_to}~")
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+        conn = self._connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM saved_results{clause}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM saved_results{clause} ORDER BY date DESC, id LIMIT ? OFFSET ?",
+            params + [per_page, (page - 1) * per_page]
+        ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def facets(self):
+        """Distinct conditions and cell types that have saved results, for the filter menus."""
+        conn = self._connection()
+        conditions = [row[0] for row in conn.execute(
+            "SELECT DISTINCT condition FROM saved_results WHERE condition IS NOT NULL ORDER BY condition")]
+        cell_types = [row[0] for row in conn.execute(
+            "SELECT DISTINCT cell_type FROM saved_results WHERE cell_type IS NOT NULL ORDER BY cell_type")]
+        return {'conditions': conditions, 'cell_types': cell_types}
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Columnar encoding and grid decimation for volcano plot data.
+
+Rows come from the volcano query as (gene_symbol, log2foldchange, p_value,
+padj) tuples. The columnar payload sends one array per column instead of
+one object per gene, with p-values already transformed to -log10 so they
+survive float32 encoding (p-values below ~1e-38 would underflow to 0).
+"""
+
+import base64
+import math
+import sys
+from array import array
+
+VOLCANO_COLUMNS = ('gene_symbol', 'log2foldchange', 'p_value', 'padj')
+
+
+def neg_log10(value):
+    """-log10 of a p-value, treating missing values as 1 like the plot does."""
+    if value is None or value <= 0:
+        return 0.0
+    return -math.log10(value)
+
+
+def encode_float32(values):
+    """Little-endian float32 array as base64 text (Float32Array in the browser)."""
+    packed = array('f', values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode('ascii')
+
+
+def decimate_indices(xs, ys, candidates, budget):
+    """Thin ``candidates`` to at most ``budget`` points, one per occupied grid cell.
+
+    The x/y range of the candidates is cut into a sqrt(budget) square grid
+    and the first point seen in each cell is kept, so sparse edges of the
+    cloud survive while its dense centre collapses.
+    """
+    if budget <= 0 or len(candidates) <= budget:
+        return list(candidates)
+
+    cells = math.isqrt(budget)
+    if cells == 0:
+        return []
+    min_x = min(xs[i] for i in candidates)
+    max_x = max(xs[i] for i in candidates)
+    min_y = min(ys[i] for i in candidates)
+    max_y = max(ys[i] for i in candidates)
+    scale_x = cells / (max_x - min_x) if max_x > min_x else 0.0
+    scale_y = cells / (max_y - min_y) if max_y > min_y else 0.0
+
+    seen = set()
+    kept = []
+    for i in candidates:
+        cell = (min(int((xs[i] - min_x) * scale_x), cells - 1),
+                min(int((ys[i] - min_y) * scale_y), cells - 1))
+        if cell not in seen:
+            seen.add(cell)
+            kept.append(i)
+    return kept
+
+
+def build_columnar_payload(rows, padj_threshold=0.05, log2fc_threshold=1.0,
+                           max_points=0, encoding='json'):
+    """Columnar volcano payload, optionally decimated and float32-encoded.
+
+    Points with padj < ``padj_threshold`` and |log2FC| > ``log2fc_threshold``
+    (the ones the plot colours as significant) are always kept; the rest
+    are thinned to ``max_points`` when it is positive. Rows with a p-value
+    of exactly 0 are dropped, matching the plot legend.
+    """
+    genes, log2fc, neg_log_p, neg_log_padj = [], [], [], []
+    for gene, fold_change, p_value, padj in rows:
+        if p_value is not None and p_value == 0:
+            continue
+        genes.append(gene or 'Unknown')
+        log2fc.append(float(fold_change) if fold_change is not None else 0.0)
+        neg_log_p.append(neg_log10(p_value))
+        neg_log_padj.append(neg_log10(padj))
+    total = len(genes)
+
+    min_neg_log_padj = -math.log10(padj_threshold) if padj_threshold > 0 else math.inf
+    significant, background = [], []
+    for i in range(total):
+        if neg_log_padj[i] > min_neg_log_padj and abs(log2fc[i]) > log2fc_threshold:
+            significant.append(i)
+        else:
+            background.append(i)
+
+    kept_background = decimate_indices(log2fc, neg_log_p, background, max_points)
+    if len(kept_background) < len(background):
+        keep = sorted(significant + kept_background)
+        genes = [genes[i] for i in keep]
+        log2fc = [log2fc[i] for i in keep]
+        neg_log_p = [neg_log_p[i] for i in keep]
+        neg_log_padj = [neg_log_padj[i] for i in keep]
+
+    payload = {
+        'format': 'columnar',
+        'encoding': 'json',
+        'n': len(genes),
+        'total': total,
+        'significant': len(significant),
+        'decimated': len(genes) < total,
+        'gene_symbol': genes,
+    }
+    numeric = {
+        'log2foldchange': log2fc,
+        'neg_log10_p_value': neg_log_p,
+        'neg_log10_padj': neg_log_padj,
+    }
+    if encoding == 'base64':
+        payload['encoding'] = 'base64-float32'
+        numeric = {name: encode_float32(values) for name, values in numeric.items()}
+    payload.update(numeric)
+    return payload
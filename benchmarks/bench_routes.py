@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Benchmark every data route of the Flask app through its test client.
+
+Drives /search across tab, filter, pagination and count-mode
+combinations, plus /search_count, /volcano_plot (list and columnar),
+/fgsea_plot and /cre_gene_scatter. They run against a real database,
+usually one loaded from generate_synthetic_data.py. Each case reports
+latency percentiles, rows returned and response bytes. Results are
+written to benchmarks/results/ under the current commit so runs can be
+compared across commits.
+
+    python generate_synthetic_data.py synthetic/ --scale 10
+    python load_data.py synthetic/manifest.json --host localhost --user bench
+    DB_PASSWORD=... python benchmarks/bench_routes.py --host localhost --user bench --save
+    python benchmarks/bench_routes.py ... --compare benchmarks/results/routes-<commit>.json
+
+By default the app's result caches are cleared before every request, so
+the numbers are database time. Use --warm to measure cache hits instead.
+"""
+
+import argparse
+import datetime
+import getpass
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+import base  # noqa: E402
+
+GENE_FIELDS = ['hgnc', 'entrez', 'chr', 'start', 'end']
+CRE_FIELDS = ['cre_chr', 'cre_start', 'cre_end', 'cre_log2fc', 'cre_distance']
+
+
+def search_cases(gene, tf, chromosome):
+    """(name, query args) for /search: every tab, the main filters, deep pages and count modes."""
+    gene_tab = {'active_tab': 'gene', 'output-fields': GENE_FIELDS}
+    return [
+        ('gene tab', gene_tab),
+        ('gene tab, DE filters', dict(gene_tab, include_de='on', de_fields=['log2foldchange', 'padj'],
+                                      padj_filter='0.05', logfc_filter='1')),
+        ('gene tab, pathway column', dict(gene_tab, **{'output-fields': ['hgnc', 'pathway']})),
+        ('gene tab, pathway filter', dict(gene_tab, **{'gene-pathway': 'HALLMARK'})),
+        ('gene tab, one gene', dict(gene_tab, **{'gene-id-type': 'hgnc', 'gene-identifier': gene})),
+        ('gene tab, region', dict(gene_tab, **{'gene-chr': chromosome, 'gene-start': '1',
+                                               'gene-end': '50000000'})),
+        ('gene tab, page 20', dict(gene_tab, page='20')),
+        ('gene tab, estimated count', dict(gene_tab, count='estimate')),
+        ('gene tab, count later', dict(gene_tab, count='later')),
+        ('gene tab, no count', dict(gene_tab, count='none')),
+        ('gene tab + CREs', dict(gene_tab, **{'cre-output-fields': CRE_FIELDS})),
+        ('CRE tab, region', {'active_tab': 'cre', 'cre-output-fields': CRE_FIELDS, 'cre-chr': chromosome,
+                             'cre-start': '1', 'cre-end': '50000000'}),
+        ('CRE tab, log2FC', {'active_tab': 'cre', 'cre-output-fields': CRE_FIELDS, 'cre-log2fc': '2'}),
+        ('TF tab, one TF', {'active_tab': 'tf', 'tf-checkbox': ['tf_checkbox'], 'tf-name': tf,
+                            'cre-output-fields': ['cre_chr', 'cre_start', 'cre_end']}),
+        ('TF tab, all TFs', {'active_tab': 'tf', 'tf-checkbox': ['tf_checkbox'],
+                             'output-fields': ['hgnc']}),
+    ]
+
+
+def build_cases(condition, cell_type, gene, tf, chromosome, per_page):
+    """(name, method, path, args) for every benchmarked request."""
+    scope = {'condition': condition, 'cell_type': cell_type, 'per_page': str(per_page)}
+    cases = [(f"/search {name}", 'GET', '/search', dict(scope, **args))
+             for name, args in search_cases(gene, tf, chromosome)]
+    cases.append(('/search_count gene tab', 'GET', '/search_count',
+                  dict(scope, **{'output-fields': GENE_FIELDS})))
+    plot = {'condition_name': condition, 'cell_type': cell_type}
+    cases.extend([
+        ('/volcano_plot', 'POST', '/volcano_plot', plot),
+        ('/volcano_plot columnar', 'POST', '/volcano_plot', dict(plot, format='columnar', max_points='4000')),
+        ('/fgsea_plot', 'POST', '/fgsea_plot', dict(plot, pathway_count='10')),
+        ('/cre_gene_scatter', 'POST', '/cre_gene_scatter', plot),
+    ])
+    return cases
+
+
+def count_rows(response):
+    """Rows in a response: table rows for HTML, list items or 'n' for JSON."""
+    if response.is_json:
+        payload = response.get_json()
+        if isinstance(payload, list):
+            return len(payload)
+        if isinstance(payload, dict):
+            return payload.get('n', payload.get('total_records', 0)) or 0
+        return 0
+    # Header row excluded
+    return max(len(re.findall(rb'<tr>', response.data)) - 1, 0)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_case(client, method, path, args, repeat, warmup, warm):
+    """Time one request ``repeat`` times; returns the summary dict."""
+    timings = []
+    response = None
+    for i in range(warmup + repeat):
+        if not warm:
+            base.get_result_cache().clear()
+            base.get_count_cache().clear()
+        start = time.perf_counter()
+        if method == 'GET':
+            response = client.get(path, query_string=args)
+        else:
+            response = client.post(path, data=args)
+        data = response.get_data()  # drains streamed responses
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+    timings.sort()
+    return {
+        'status': response.status_code,
+        'rows': count_rows(response),
+        'bytes': len(data),
+        'p50_ms': percentile(timings, 0.50),
+        'p95_ms': percentile(timings, 0.95),
+        'p99_ms': percentile(timings, 0.99),
+        'mean_ms': statistics.fmean(timings),
+        'max_ms': timings[-1],
+    }
+
+
+def git_commit():
+    """(short commit, dirty) of the working tree, or ('unknown', False) outside git."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+
+def print_results(results, baseline=None):
+    print(f"{'case':<40}{'status':>7}{'rows':>8}{'KiB':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          + (f"{'p50 vs base':>13}" if baseline else ''))
+    for name, result in results.items():
+        line = (f"{name:<40}{result['status']:>7}{result['rows']:>8,}{result['bytes'] / 1024:>9.1f}"
+                f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}")
+        if baseline:
+            before = baseline.get(name)
+            line += f"{result['p50_ms'] / before['p50_ms']:>12.2f}x" if before and before['p50_ms'] else f"{'new':>13}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app's routes through the Flask test client.")
+    parser.add_argument('--host', default=os.environ.get('DB_HOST', 'localhost'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('DB_PORT', 3306)))
+    parser.add_argument('--database', default=os.environ.get('DB_NAME', 'Team7'))
+    parser.add_argument('--user', default=os.environ.get('DB_USER', ''))
+    parser.add_argument('--condition', default='IFN')
+    parser.add_argument('--cell-type', default='ESC')
+    parser.add_argument('--gene', default='SYN1', help='gene symbol for the single-gene search')
+    parser.add_argument('--tf', default='STAT1', help='TF name for the TF-tab search')
+    parser.add_argument('--chromosome', default='1', help='chromosome for the region searches')
+    parser.add_argument('--per-page', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--warm', action='store_true', help='keep the result caches between requests')
+    parser.add_argument('--only', help='run only cases whose name contains this text')
+    parser.add_argument('--save', action='store_true', help='write results to benchmarks/results/')
+    parser.add_argument('--compare', metavar='PATH', help='show p50 ratios against a saved run')
+    args = parser.parse_args()
+
+    password = os.environ.get('DB_PASSWORD')
+    if password is None:
+        password = getpass.getpass(f"Password for {args.user}@{args.host}: ")
+    # Must be set before the first request creates the pool
+    app = base.create_app({'DB_HOST': args.host, 'DB_PORT': args.port, 'DB_NAME': args.database,
+                           'DB_USER': args.user, 'DB_PASSWORD': password})
+    client = app.test_client()
+
+    cases = build_cases(args.condition, args.cell_type, args.gene, args.tf, args.chromosome, args.per_page)
+    if args.only:
+        cases = [case for case in cases if args.only in case[0]]
+
+    results = {}
+    for name, method, path, query in cases:
+        results[name] = run_case(client, method, path, query, args.repeat, args.warmup, args.warm)
+        print(f"  {name}: p50 {results[name]['p50_ms']:.1f} ms", file=sys.stderr)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)['cases']
+    print_results(results, baseline)
+
+    if args.save:
+        commit, dirty = git_commit()
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"routes-{commit}{'-dirty' if dirty else ''}.json")
+        with open(path, 'w') as handle:
+            json.dump({
+                'commit': commit,
+                'dirty': dirty,
+                'captured_at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'settings': {key: value for key, value in vars(args).items() if key not in ('save', 'compare')},
+                'cases': results,
+            }, handle, indent=2)
+        print(f"Saved {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Measure worker start-up: importing app/base.py, create_app() and the first request.
+
+Each run is a fresh interpreter, as a new gunicorn worker or test process
+would be. The first request is to /guide, a static page, so nothing here
+needs a database. Also checks that importing and creating the app leave the
+save directory alone, since all I/O is meant to wait for first use.
+
+    python benchmarks/bench_startup.py [--repeat 20] [--save]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_routes import RESULTS_DIR, ROOT, git_commit, percentile
+
+PHASES = ('interpreter', 'import', 'create_app', 'first_request')
+
+CHILD = """
+import json, os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {app_dir!r})
+import base
+imported = time.perf_counter()
+app = base.create_app()
+created = time.perf_counter()
+app.test_client().get('/guide').get_data()
+served = time.perf_counter()
+print(json.dumps({{
+    'import': (imported - start) * 1000,
+    'create_app': (created - imported) * 1000,
+    'first_request': (served - created) * 1000,
+    'save_dir_created': os.path.exists(os.environ['SAVE_DIR']),
+}}))
+"""
+
+
+def run_once(save_dir):
+    """Timings (ms) of one fresh interpreter, plus whether the save directory appeared."""
+    env = dict(os.environ, SAVE_DIR=save_dir)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True, env=env)
+    interpreter = (time.perf_counter() - start) * 1000
+    output = subprocess.run([sys.executable, '-c', CHILD.format(app_dir=os.path.join(ROOT, 'app'))],
+                            check=True, env=env, capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['interpreter'] = interpreter
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app import and worker start-up time.")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--save', action='store_true', help='write results to benchmarks/results/')
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as scratch:
+        save_dir = os.path.join(scratch, 'saved_results')
+        for _ in range(args.repeat):
+            runs.append(run_once(save_dir))
+
+    results = {}
+    print(f"{'phase':<16}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}")
+    for phase in PHASES:
+        timings = sorted(run[phase] for run in runs)
+        results[phase] = {
+            'p50_ms': percentile(timings, 0.50),
+            'p95_ms': percentile(timings, 0.95),
+            'mean_ms': statistics.fmean(timings),
+        }
+        print(f"{phase:<16}{results[phase]['p50_ms']:>9.1f}{results[phase]['p95_ms']:>9.1f}"
+              f"{results[phase]['mean_ms']:>9.1f}")
+    side_effects = any(run['save_dir_created'] for run in runs)
+    print("Save directory created during start-up: " + ("yes" if side_effects else "no"))
+
+    if args.save:
+        commit, dirty = git_commit()
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"startup-{commit}{'-dirty' if dirty else ''}.json")
+        with open(path, 'w') as handle:
+            json.dump({
+                'commit': commit,
+                'dirty': dirty,
+                'captured_at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'settings': {'repeat': args.repeat},
+                'phases': results,
+                'save_dir_created': side_effects,
+            }, handle, indent=2)
+        print(f"Saved {path}")
+    return 1 if side_effects else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Compare result-table rendering: old string concatenation vs the streamed Jinja include.
+
+Renders synthetic search results at 10, 1,000 and 10,000 rows through
+app/templates/_results_table.html without touching the database.
+
+    python benchmarks/bench_table_render.py [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import time
+
+from flask import Flask, render_template_string, stream_template_string
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'templates')
+ROW_COUNTS = (10, 1000, 10000)
+HEADERS = ['gene_symbol', 'ensembl_id', 'chromosome', 'start_position', 'end_position',
+           'strand', 'log2foldchange', 'p_value', 'padj', 'pathways']
+
+
+def legacy_table_html(results, headers, title=None):
+    """The table body as generate_table_html used to build it, for comparison."""
+    table_html = f"""
+    <div class="results-section">
+        <h2>{title or "Search Results"}</h2>
+        <div class="table-container">
+            <table class="results-table">
+                <thead>
+                    <tr>
+    """
+    for header in headers:
+        table_html += f"<th>{header.replace('_', ' ').title()}</th>"
+    table_html += """
+            </tr></thead>
+            <tbody>
+    """
+    for row in results:
+        table_html += "<tr>"
+        for header in headers:
+            value = row.get(header, '')
+            table_html += f"<td>{value if value is not None else ''}</td>"
+        table_html += "</tr>"
+    table_html += """
+            </tbody>
+        </table>
+    </div>
+    """
+    return table_html
+
+
+def synthetic_rows(count, seed=7):
+    """Rows shaped like a gene + DE search result."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        start = rng.randint(1, 200_000_000)
+        rows.append({
+            'gene_symbol': f"GENE{i}",
+            'ensembl_id': f"ENSG{i:011d}",
+            'chromosome': f"chr{rng.randint(1, 22)}",
+            'start_position': start,
+            'end_position': start + rng.randint(500, 50_000),
+            'strand': rng.choice('+-'),
+            'log2foldchange': rng.gauss(0, 1.5),
+            'p_value': rng.random(),
+            'padj': rng.random() if rng.random() > 0.1 else None,
+            'pathways': 'HALLMARK_<APOPTOSIS>; KEGG_P53 & friends',
+        })
+    return rows
+
+
+def best_of(repeat, func):
+    """Fastest wall time in seconds over ``repeat`` runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    app = Flask(__name__, template_folder=TEMPLATE_DIR)
+    include = '{% include "_results_table.html" %}'
+
+    print(f"{'rows':>8} {'concat ms':>12} {'jinja ms':>12} {'streamed ms':>12} {'first chunk ms':>15}")
+    for count in ROW_COUNTS:
+        rows = synthetic_rows(count)
+        pagination = {'page': 1, 'per_page': count, 'total_records': count * 3, 'count_is_estimate': False,
+                      'total_pages': 3, 'has_next': True, 'next_cursor': 'abc'}
+        table = {'results': rows, 'headers': HEADERS, 'pagination': pagination, 'title': 'Benchmark'}
+
+        with app.test_request_context('/search'):
+            # Warm the template cache so compilation is not measured
+            render_template_string(include, table=table)
+
+            concat = best_of(args.repeat, lambda: legacy_table_html(rows, HEADERS, 'Benchmark'))
+            rendered = best_of(args.repeat, lambda: render_template_string(include, table=table))
+            streamed = best_of(args.repeat, lambda: ''.join(stream_template_string(include, table=table)))
+
+            def first_chunk():
+                next(iter(stream_template_string(include, table=table)))
+            first = best_of(args.repeat, first_chunk)
+
+        print(f"{count:>8} {concat * 1000:>12.2f} {rendered * 1000:>12.2f} {streamed * 1000:>12.2f} {first * 1000:>15.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Compare the notebook's parse_merged_cres_faster pipeline with tf_matrix.parse_tf_matrix.
+
+Writes a synthetic TF x merged-CRE matrix, runs both implementations end to
+end (read, melt, relabel, filter, write CSV), checks they produce the same
+rows, and reports wall time and peak traced memory.
+
+    python benchmarks/bench_tf_matrix.py [--rows 200000] [--columns 600] [--density 0.01]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from tf_matrix import parse_tf_matrix  # noqa: E402
+
+KEPT_CONDITIONS = ['IFN', 'TREM2R47H', 'TREM2KO', 'xenot7d', 'coculture']
+COLUMN_SUFFIXES = ['H1-IFN', 'WTC11-IFN', 'TREM2R47H', 'TREM2KO', 'SORL1KO', 'APOE4vs2',
+                   'iPSC-coculture', 'iPSC-xenot7d', 'iPSC-xenot8w', 'HIV-ACTvsLAT', 'CLU-CRISPR']
+
+
+def parse_merged_cres_faster(df):
+    """The notebook implementation, unchanged apart from this docstring."""
+    chr_col = df['chr'].values
+    start_col = df['start'].values
+    end_col = df['end'].values
+    feature_cols = [col for col in df.columns if col not in ['chr', 'start', 'end']]
+    keys = []
+    values = []
+    for col_name in feature_cols:
+        indices = np.where(df[col_name].values == 1)[0]
+        if len(indices) > 0:
+            names = col_name.split('-')
+            if len(names) == 2:
+                condition = names[1]
+                if condition in ['SORL1A528T', 'SORL1KO', 'TREM2R47H', 'TREM2KO', 'CD33', 'INPP5D']:
+                    cell = 'ESC'
+                elif condition in ['APOE4vs2', 'APOE4vs3', 'APOEKOvs2', 'APOEKOvs3', 'HIVactivated', 'HIVlatent']:
+                    cell = 'iPSC'
+                else:
+                    cell = 'Unknown'
+                tf, cell_type, cond = names[0], cell, condition
+            elif len(names) == 3:
+                cell = names[1]
+                condition = names[2]
+                if condition in ['ACTvsLAT', 'CRISPR', 'ACSL1']:
+                    cell = 'iPSC'
+                    condition = f'{names[1]}-{names[2]}'
+                tf, cell_type, cond = names[0], cell, condition
+            elif len(names) == 4:
+                tf, cell_type, cond = f'{names[0]}-{names[1]}', names[2], names[3]
+            else:
+                continue
+            for idx in indices:
+                keys.append(f'{idx}_{col_name}')
+                values.append([chr_col[idx], start_col[idx], end_col[idx], tf, cell_type, cond])
+    return pd.DataFrame(values, index=keys, columns=[0, 1, 2, 3, 4, 5])
+
+
+def legacy_pipeline(path, output):
+    """Notebook cells 9-26: load everything, melt, relabel, filter, write."""
+    df = pd.read_csv(path, sep='\t')
+    df.columns = [df.columns[0], df.columns[1], *[re.sub(r'_(.*?)_', '-', col) for col in df.columns[2:]]]
+    result = parse_merged_cres_faster(df)
+    result.columns = ['chr', 'start', 'end', 'transcription_factor', 'cell_type', 'condition']
+    result['cell_type'] = result['cell_type'].replace('H1', 'ESC')
+    result['cell_type'] = result['cell_type'].replace('WTC11', 'iPSC')
+    result['chr'] = result['chr'].str.replace('chr', '')
+    result = result[result['condition'].isin(KEPT_CONDITIONS)].copy()
+    result['transcription_factor'] = result['transcription_factor'].str.upper()
+    result.to_csv(output, index=False)
+    return len(result)
+
+
+def write_matrix(path, rows, columns, density, seed=11):
+    """Synthetic matrix with the real file's header shape and 0/1 values."""
+    rng = np.random.default_rng(seed)
+    names = [f"Tf{i // len(COLUMN_SUFFIXES)}_sum_{COLUMN_SUFFIXES[i % len(COLUMN_SUFFIXES)]}"
+             for i in range(columns)]
+    chroms = rng.choice([f"chr{c}" for c in list(range(1, 23)) + ['X', 'Y']], size=rows)
+    starts = rng.integers(10_000, 200_000_000, size=rows)
+    frame = pd.DataFrame({'chr': chroms, 'start': starts, 'end': starts + rng.integers(200, 3000, size=rows)})
+    values = (rng.random((rows, columns)) < density).astype(np.int8)
+    frame = pd.concat([frame, pd.DataFrame(values, columns=names)], axis=1)
+    frame.to_csv(path, sep='\t', index=False)
+
+
+def measure(func):
+    """(result, seconds, peak traced MiB); tracing slows Python code, so time an untraced run."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+def row_set(path):
+    frame = pd.read_csv(path, dtype=str)
+    frame = frame.iloc[:, [0, 1, 2, 3]].assign(condition=frame['condition'], cell_type=frame['cell_type'])
+    return set(map(tuple, frame.to_numpy()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--columns', type=int, default=600)
+    parser.add_argument('--density', type=float, default=0.01)
+    parser.add_argument('--chunksize', type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix = os.path.join(tmp, 'matrix.txt')
+        write_matrix(matrix, args.rows, args.columns, args.density)
+        size_mb = os.path.getsize(matrix) / (1024 * 1024)
+        print(f"matrix: {args.rows:,} rows x {args.columns} columns, density {args.density}, {size_mb:.1f} MiB")
+
+        legacy_out = os.path.join(tmp, 'legacy.csv')
+        chunked_out = os.path.join(tmp, 'chunked.csv')
+        legacy_rows, legacy_s, legacy_mb = measure(lambda: legacy_pipeline(matrix, legacy_out))
+        chunked_rows, chunked_s, chunked_mb = measure(
+            lambda: parse_tf_matrix(matrix, chunked_out, conditions=KEPT_CONDITIONS, chunksize=args.chunksize))
+
+        print(f"{'':<24}{'rows':>12}{'seconds':>10}{'peak MiB':>10}")
+        print(f"{'parse_merged_cres_faster':<24}{legacy_rows:>12,}{legacy_s:>10.2f}{legacy_mb:>10.1f}")
+        print(f"{'parse_tf_matrix':<24}{chunked_rows:>12,}{chunked_s:>10.2f}{chunked_mb:>10.1f}")
+        print(f"speedup {legacy_s / chunked_s:.1f}x, peak memory {legacy_mb / chunked_mb:.1f}x lower")
+        print("outputs match" if row_set(legacy_out) == row_set(chunked_out) else "OUTPUTS DIFFER")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Capture EXPLAIN plans for the queries behind each web route.
+
+The SQL is taken from app/base.py itself: build_search_query for the
+gene, CRE and TF search tabs (page and count queries), and the query
+constants of /volcano_plot, /fgsea_plot and /cre_gene_scatter. Plans are
+printed and can be saved as JSON. Comparing them with a saved baseline
+reports the changes that usually mean a regression: a table falling back
+to a full scan, a different or missing index, a new filesort or temporary
+table, and row estimates that grew past --tolerance.
+
+    python explain_routes.py --condition IFN --cell-type ESC -o plans.json
+    python migrate.py
+    python explain_routes.py --condition IFN --cell-type ESC --baseline plans.json
+
+Connection settings come from the same DB_* env vars and flags as load_data.py.
+"""
+
+import argparse
+import datetime
+import getpass
+import json
+import os
+import sys
+
+# Plans of the plain SQL predicates, not of the id lists the in-memory indexes inline
+os.environ.setdefault('INTERVAL_INDEX', 'off')
+os.environ.setdefault('IDENTIFIER_RESOLVER', 'off')
+os.environ.setdefault('PATHWAY_INDEX', 'off')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+import base  # noqa: E402
+from load_data import LoadError, MariaDBBackend  # noqa: E402
+
+PLAN_COLUMNS = ('id', 'select_type', 'table', 'type', 'possible_keys', 'key', 'key_len', 'ref', 'rows', 'Extra')
+
+# One representative request per search tab: build_search_query kwargs
+SEARCH_SHAPES = {
+    'gene': {
+        'gene_params': {},
+        'output_fields': ['hgnc', 'entrez', 'chr', 'start', 'end'],
+        'cre_fields': [], 'tf_fields': [],
+        'include_de': True,
+        'de_params': {'de_fields': ['log2foldchange', 'padj'], 'padj_filter': 0.05, 'logfc_filter': 1},
+    },
+    'cre': {
+        'gene_params': {},
+        'output_fields': [],
+        'cre_fields': ['cre_chr', 'cre_start', 'cre_end', 'cre_log2fc', 'cre_distance'],
+        'tf_fields': [],
+        'cre_params': {'cre-chr': '1', 'cre-start': 1, 'cre-end': 50_000_000},
+    },
+    'tf': {
+        'gene_params': {},
+        'output_fields': ['hgnc'],
+        'cre_fields': ['cre_chr', 'cre_start', 'cre_end'],
+        'tf_fields': ['tf_checkbox'],
+        'tf_params': {'tf-name': 'STAT1'},
+    },
+}
+
+# Plan changes worth a look, in the Extra column
+COSTLY_EXTRAS = ('Using filesort', 'Using temporary')
+
+
+def route_queries(condition, cell_type, per_page=50, pathway_count=10):
+    """(name, sql, params) for every query shape the routes run."""
+    queries = []
+    for tab, kwargs in SEARCH_SHAPES.items():
+        base_query, params, layout = base.build_search_query(condition, cell_type, **kwargs)
+        queries.append((f"search/{tab}/page",
+                        base.select_rows(base_query, layout, limit=per_page + 1, include_keys=True),
+                        params))
+        queries.append((f"search/{tab}/count", base.count_query(base_query), params))
+    scope = (condition, cell_type)
+    queries.extend([
+        ('volcano_plot', base.VOLCANO_QUERY, scope),
+        ('fgsea_plot/summary', base.FGSEA_SUMMARY_QUERY, scope + (pathway_count,) + scope + (pathway_count,)),
+        ('fgsea_plot/live_up', base.FGSEA_UP_QUERY, scope + (pathway_count,)),
+        ('fgsea_plot/live_down', base.FGSEA_DOWN_QUERY, scope + (pathway_count,)),
+        ('cre_gene_scatter', base.CRE_GENE_SCATTER_QUERY, scope),
+    ])
+    return queries
+
+
+def explain(cursor, sql, params):
+    """EXPLAIN rows of one query as dicts keyed by PLAN_COLUMNS."""
+    cursor.execute(f"EXPLAIN {sql}", tuple(params))
+    columns = [desc[0] for desc in cursor.description]
+    plan = []
+    for row in cursor.fetchall():
+        record = dict(zip(columns, row))
+        plan.append({column: record.get(column) for column in PLAN_COLUMNS})
+    return plan
+
+
+def capture_plans(cursor, queries):
+    """route name -> {'sql', 'plan'} (or {'sql', 'error'} if EXPLAIN failed)."""
+    plans = {}
+    for name, sql, params in queries:
+        try:
+            plans[name] = {'sql': ' '.join(sql.split()), 'plan': explain(cursor, sql, params)}
+        except Exception as e:
+            plans[name] = {'sql': ' '.join(sql.split()), 'error': str(e)}
+    return plans
+
+
+def print_plans(plans):
+    widths = (3, 12, 10, 8, 28, 10, 10)
+    for name, captured in plans.items():
+        print(f"\n== {name}")
+        if 'error' in captured:
+            print(f"   EXPLAIN failed: {captured['error']}")
+            continue
+        print(' '.join(f"{column:<{width}}" for column, width in
+                       zip(('id', 'select_type', 'table', 'type', 'key', 'rows', 'Extra'), widths)))
+        for step in captured['plan']:
+            values = (step['id'], step['select_type'], step['table'], step['type'], step['key'], step['rows'])
+            print(' '.join(f"{str(value if value is not None else ''):<{width}}"
+                           for value, width in zip(values, widths)) + ' ' + (step['Extra'] or ''))
+
+
+def compare_plans(baseline, current, tolerance=2.0):
+    """Human-readable regressions of ``current`` against ``baseline``, one string each."""
+    problems = []
+    for name, captured in current.items():
+        before = baseline.get(name)
+        if 'error' in captured:
+            problems.append(f"{name}: EXPLAIN failed: {captured['error']}")
+            continue
+        if before is None or 'plan' not in before:
+            continue
+        if before['sql'] != captured['sql']:
+            problems.append(f"{name}: SQL changed since the baseline; re-capture it if that was intended")
+        old_steps = {(step['id'], step['table']): step for step in before['plan']}
+        for step in captured['plan']:
+            old = old_steps.get((step['id'], step['table']))
+            if old is None:
+                continue
+            where = f"{name}: table {step['table']}"
+            if step['type'] == 'ALL' and old['type'] != 'ALL':
+                problems.append(f"{where} is now a full scan (was {old['type']} on {old['key']})")
+            elif step['key'] != old['key']:
+                problems.append(f"{where} uses {step['key'] or 'no index'} (was {old['key'] or 'no index'})")
+            for extra in COSTLY_EXTRAS:
+                if extra in (step['Extra'] or '') and extra not in (old['Extra'] or ''):
+                    problems.append(f"{where} now needs '{extra}'")
+            if old['rows'] and step['rows'] and int(step['rows']) > tolerance * int(old['rows']):
+                problems.append(f"{where} examines ~{step['rows']} rows (was ~{old['rows']})")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the queries behind each web route.")
+    parser.add_argument('--condition', required=True, help='condition name to plan the queries for')
+    parser.add_argument('--cell-type', required=True, help='cell type to plan the queries for')
+    parser.add_argument('--host', default=os.environ.get('DB_HOST', 'bioed-new.bu.edu'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('DB_PORT', 4253)))
+    parser.add_argument('--database', default=os.environ.get('DB_NAME', 'Team7'))
+    parser.add_argument('--user', default=os.environ.get('DB_USER', ''))
+    parser.add_argument('-o', '--output', metavar='PATH', help='save the plans as JSON')
+    parser.add_argument('--baseline', metavar='PATH', help='compare with plans saved by an earlier run')
+    parser.add_argument('--tolerance', type=float, default=2.0,
+                        help='report row estimates that grew by more than this factor')
+    parser.add_argument('--quiet', action='store_true', help='do not print the plans')
+    args = parser.parse_args()
+
+    password = os.environ.get('DB_PASSWORD')
+    if password is None:
+        password = getpass.getpass(f"Password for {args.user}@{args.host}: ")
+    try:
+        backend = MariaDBBackend(host=args.host, port=args.port, database=args.database,
+                                 user=args.user, password=password)
+        conn = backend.connect()
+    except LoadError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT VERSION()")
+        server_version = cursor.fetchone()[0]
+        plans = capture_plans(cursor, route_queries(args.condition, args.cell_type))
+    finally:
+        conn.close()
+
+    if not args.quiet:
+        print_plans(plans)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({
+                'captured_at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'server_version': server_version,
+                'condition': args.condition,
+                'cell_type': args.cell_type,
+                'routes': plans,
+            }, handle, indent=2, default=str)
+        print(f"\nSaved {len(plans)} plans to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)['routes']
+        problems = compare_plans(baseline, plans, tolerance=args.tolerance)
+        print(f"\n{len(problems)} plan change(s) against {args.baseline}")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
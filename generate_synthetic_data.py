@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""Generate a synthetic AD database at a chosen scale, ready for load_data.py.
+
+Writes one CSV per loader input plus a manifest.json, so the output loads
+exactly like the real tables:
+
+    python generate_synthetic_data.py synthetic/ --conditions 4 --cell-types 3 --scale 10
+    python load_data.py synthetic/manifest.json --sqlite synthetic.db
+
+The data satisfies every key and foreign key of AD_database_tables.sql:
+- Merged CREs do not overlap.
+- Each CRE lies inside a merged CRE and is unique within its condition and
+  cell type.
+- Each CRE is linked to its nearest genes by TSS distance.
+- Each gene has one DE row per condition/cell type, with BH-adjusted
+  p-values.
+- TF hits are unique (TF, merged CRE) pairs among the merged CREs that have
+  a CRE in that condition/cell type.
+
+Every table draws from its own generator seeded with (--seed, table name).
+The same seed therefore gives the same genes whatever the CRE or TF counts
+are. --scale multiplies the merged CRE, CRE and TF-hit counts. At --scale
+10 with 2 x 2 conditions/cell types that is 4 million CREs and 40 million
+TF-CRE rows.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# GRCh38 primary assembly lengths; genes, CREs and merged CREs are spread by length
+CHROMOSOME_LENGTHS = {
+    '1': 248956422, '2': 242193529, '3': 198295559, '4': 190214555, '5': 181538259,
+    '6': 170805979, '7': 159345973, '8': 145138636, '9': 138394717, '10': 133797422,
+    '11': 135086622, '12': 133275309, '13': 114364328, '14': 107043718, '15': 101991189,
+    '16': 90338345, '17': 83257441, '18': 80373285, '19': 58617616, '20': 64444167,
+    '21': 46709983, '22': 50818468, 'X': 156040895, 'Y': 57227415,
+}
+
+# Real names first, so the app's defaults and explain_routes.py find something
+CONDITION_NAMES = ('IFN', 'TREM2R47H', 'TREM2KO', 'xenot7d', 'coculture')
+CELL_TYPE_NAMES = ('ESC', 'iPSC', 'microglia')
+TF_NAMES = ('STAT1', 'STAT2', 'IRF1', 'IRF9', 'SPI1', 'CEBPB', 'RELA', 'NFKB1')
+PATHWAY_PREFIXES = ('HALLMARK', 'REACTOME', 'KEGG', 'GOBP')
+
+CSV_CHUNK_ROWS = 1_000_000
+
+
+def table_rng(seed, table):
+    """Independent generator for one table, stable across the other tables' sizes."""
+    return np.random.default_rng([seed, zlib.crc32(table.encode())])
+
+
+def write_csv(path, frames, columns):
+    """Write an iterable of DataFrames to one CSV with a header; returns the row count."""
+    rows = 0
+    with open(path, 'w', newline='') as handle:
+        handle.write(','.join(columns) + '\n')
+        for frame in frames:
+            frame.to_csv(handle, header=False, index=False, float_format='%.6g', na_rep='NA')
+            rows += len(frame)
+    return rows
+
+
+def chunks(frame, size=CSV_CHUNK_ROWS):
+    for start in range(0, len(frame), size):
+        yield frame.iloc[start:start + size]
+
+
+def spread_over_chromosomes(rng, count):
+    """Chromosome of each of ``count`` features, proportional to chromosome length."""
+    names = np.array(list(CHROMOSOME_LENGTHS))
+    lengths = np.array(list(CHROMOSOME_LENGTHS.values()), dtype=np.float64)
+    per_chrom = rng.multinomial(count, lengths / lengths.sum())
+    return names, per_chrom
+
+
+def benjamini_hochberg(p_values):
+    """BH-adjusted p-values, as DESeq2 reports padj."""
+    order = np.argsort(p_values)
+    ranked = p_values[order] * len(p_values) / np.arange(1, len(p_values) + 1)
+    adjusted = np.minimum.accumulate(ranked[::-1])[::-1]
+    padj = np.empty_like(adjusted)
+    padj[order] = np.minimum(adjusted, 1.0)
+    return padj
+
+
+def make_genes(rng, count, genes_from=None):
+    """Genes table sorted by chromosome and TSS."""
+    if genes_from:
+        source = pd.read_csv(genes_from).dropna(subset=['entrez', 'chromosome', 'start_position', 'end_position'])
+        source = source.drop_duplicates('entrez')
+        genes = pd.DataFrame({
+            'gene_symbol': source['hgnc'].fillna(''),
+            'Ensembl_ID': source['ensembl_gene_id'],
+            'Entrez_ID': source['entrez'].astype(np.int64).astype(str),
+            'chromosome': source['chromosome'].astype(str),
+            'start_position': source['start_position'].astype(np.int64),
+            'end_position': source['end_position'].astype(np.int64),
+            'strand': source['strand'],
+        })
+        genes = genes[genes['chromosome'].isin(CHROMOSOME_LENGTHS)]
+    else:
+        names, per_chrom = spread_over_chromosomes(rng, count)
+        chromosomes = np.repeat(names, per_chrom)
+        limits = np.array([CHROMOSOME_LENGTHS[c] for c in chromosomes])
+        lengths = np.minimum(rng.lognormal(10, 1.2, size=count).astype(np.int64) + 500, 2_000_000)
+        starts = (rng.random(count) * (limits - lengths)).astype(np.int64) + 1
+        ids = np.arange(1, count + 1)
+        genes = pd.DataFrame({
+            'gene_symbol': [f"SYN{i}" for i in ids],
+            'Ensembl_ID': [f"ENSG9{i:010d}" for i in ids],
+            'Entrez_ID': (900000 + ids).astype(str),
+            'chromosome': chromosomes,
+            'start_position': starts,
+            'end_position': starts + lengths,
+            'strand': rng.choice(['+', '-'], size=count),
+        })
+    tss = np.where(genes['strand'] == '-', genes['end_position'], genes['start_position'])
+    return genes.assign(_tss=tss).sort_values(['chromosome', '_tss'], kind='stable').reset_index(drop=True)
+
+
+def make_merged_cres(rng, count):
+    """Non-overlapping merged CREs: one per equal-width slot of each chromosome."""
+    names, per_chrom = spread_over_chromosomes(rng, count)
+    frames = []
+    for chrom, n in zip(names, per_chrom):
+        if n == 0:
+            continue
+        slot = CHROMOSOME_LENGTHS[chrom] // n
+        lengths = np.minimum(rng.integers(300, 3000, size=n), slot - 1)
+        starts = np.arange(n, dtype=np.int64) * slot + (rng.random(n) * (slot - lengths)).astype(np.int64)
+        frames.append(pd.DataFrame({'chromosome': chrom, 'start_position': starts,
+                                    'end_position': starts + lengths}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def nearest_genes(genes, chromosomes, positions, per_cre):
+    """Up to ``per_cre`` nearest genes by TSS for each position: (row index, gene index, distance)."""
+    rows, picked, distances = [], [], []
+    for chrom, gene_block in genes.groupby('chromosome', sort=False):
+        mask = chromosomes == chrom
+        if not mask.any():
+            continue
+        tss = gene_block['_tss'].to_numpy()
+        offset = gene_block.index[0]
+        where = np.nonzero(mask)[0]
+        pos = positions[mask]
+        right = np.searchsorted(tss, pos)
+        # Candidates on both sides, ranked by distance
+        candidates = np.stack([right + k for k in range(-per_cre, per_cre)], axis=1)
+        valid = (candidates >= 0) & (candidates < len(tss))
+        clipped = np.clip(candidates, 0, len(tss) - 1)
+        dist = np.where(valid, np.abs(tss[clipped] - pos[:, None]), np.iinfo(np.int64).max)
+        best = np.argsort(dist, axis=1, kind='stable')[:, :per_cre]
+        chosen = np.take_along_axis(clipped, best, axis=1)
+        chosen_dist = np.take_along_axis(dist, best, axis=1)
+        keep = chosen_dist != np.iinfo(np.int64).max
+        rows.append(np.repeat(where, per_cre)[keep.ravel()])
+        picked.append(chosen.ravel()[keep.ravel()] + offset)
+        distances.append(chosen_dist.ravel()[keep.ravel()])
+    return np.concatenate(rows), np.concatenate(picked), np.concatenate(distances)
+
+
+def generate(output, seed=7, conditions=2, cell_types=2, genes=23000, genes_from=None,
+             merged_cres=200_000, cres_per_scope=100_000, genes_per_cre=2, tfs=300,
+             tf_hits_per_scope=1_000_000, pathways=2000, de_fraction=0.9, scale=1.0):
+    """Write every loader input and manifest.json to ``output``; returns {input: rows}."""
+    os.makedirs(output, exist_ok=True)
+    merged_cres = int(merged_cres * scale)
+    cres_per_scope = min(int(cres_per_scope * scale), merged_cres)
+    tf_hits_per_scope = int(tf_hits_per_scope * scale)
+    written = {}
+
+    def save(name, frames, columns):
+        start = time.perf_counter()
+        written[name] = write_csv(os.path.join(output, f"{name}.csv"), frames, columns)
+        print(f"{name:<24}{written[name]:>14,} rows  {time.perf_counter() - start:6.1f}s")
+
+    condition_names = [CONDITION_NAMES[i] if i < len(CONDITION_NAMES) else f"COND{i}" for i in range(conditions)]
+    cell_names = [CELL_TYPE_NAMES[i] if i < len(CELL_TYPE_NAMES) else f"CELL{i}" for i in range(cell_types)]
+    tf_names = [TF_NAMES[i] if i < len(TF_NAMES) else f"TF{i:04d}" for i in range(tfs)]
+    scopes = [(c, ct) for c in condition_names for ct in cell_names]
+
+    save('conditions', [pd.DataFrame({'name': condition_names, 'disease_category': 'synthetic'})],
+         ('name', 'disease_category'))
+    save('cell_types', [pd.DataFrame({'cell': cell_names})], ('cell',))
+    save('tfs', [pd.DataFrame({'name': tf_names})], ('name',))
+
+    gene_table = make_genes(table_rng(seed, 'genes'), genes, genes_from)
+    gene_columns = ('gene_symbol', 'Ensembl_ID', 'Entrez_ID', 'chromosome', 'start_position',
+                    'end_position', 'strand')
+    save('genes', [gene_table[list(gene_columns)]], gene_columns)
+
+    rng = table_rng(seed, 'pathways')
+    pathway_names = [f"{PATHWAY_PREFIXES[i % len(PATHWAY_PREFIXES)]}_SYNTHETIC_PATHWAY_{i:05d}"
+                     for i in range(pathways)]
+    save('pathways', [pd.DataFrame({'name': pathway_names})], ('name',))
+    sizes = np.clip(rng.lognormal(3.5, 0.8, size=pathways).astype(np.int64), 5, min(500, len(gene_table)))
+    members = [rng.choice(len(gene_table), size=size, replace=False) for size in sizes]
+    save('gene_pathways', [pd.DataFrame({
+        'entrez': gene_table['Entrez_ID'].to_numpy()[np.concatenate(members)],
+        'pathway': np.repeat(pathway_names, sizes),
+    })], ('entrez', 'pathway'))
+
+    merged = make_merged_cres(table_rng(seed, 'merged_cres'), merged_cres)
+    save('merged_cres', chunks(merged), ('chromosome', 'start_position', 'end_position'))
+    merged_chrom = merged['chromosome'].to_numpy()
+    merged_start = merged['start_position'].to_numpy()
+    merged_end = merged['end_position'].to_numpy()
+
+    de_frames, cre_frames, cre_gene_frames, tf_frames = [], [], [], []
+    for condition, cell in scopes:
+        scope_key = f"{condition}/{cell}"
+
+        rng = table_rng(seed, f"differential_expression/{scope_key}")
+        picked = np.sort(rng.choice(len(gene_table), size=int(len(gene_table) * de_fraction), replace=False))
+        p_values = rng.random(len(picked)) ** 3
+        padj = benjamini_hochberg(p_values)
+        padj[rng.random(len(picked)) < 0.05] = np.nan  # DESeq2 leaves independent-filtered genes NA
+        de_frames.append(pd.DataFrame({
+            'entrez': gene_table['Entrez_ID'].to_numpy()[picked],
+            'condition_name': condition, 'cell_type': cell,
+            'baseMean': rng.lognormal(5, 2, size=len(picked)),
+            'log2foldchange': rng.normal(0, 1.2, size=len(picked)),
+            'p_value': p_values, 'padj': padj,
+        }))
+
+        rng = table_rng(seed, f"cres/{scope_key}")
+        in_scope = np.sort(rng.choice(len(merged), size=cres_per_scope, replace=False))
+        widths = merged_end[in_scope] - merged_start[in_scope]
+        starts = merged_start[in_scope] + (rng.random(len(in_scope)) * widths * 0.3).astype(np.int64)
+        ends = np.maximum(merged_end[in_scope] - (rng.random(len(in_scope)) * widths * 0.3).astype(np.int64),
+                          starts + 1)
+        chroms = merged_chrom[in_scope]
+        cre_frames.append(pd.DataFrame({
+            'condition_name': condition, 'cell_type': cell, 'chromosome': chroms,
+            'start_position': starts, 'end_position': ends,
+            'cre_log2foldchange': rng.normal(0, 1.5, size=len(in_scope)),
+            'merged_chromosome': chroms, 'merged_start_position': merged_start[in_scope],
+            'merged_end_position': merged_end[in_scope],
+        }))
+
+        rows, gene_idx, distance = nearest_genes(gene_table, chroms, starts, genes_per_cre)
+        cre_gene_frames.append(pd.DataFrame({
+            'condition_name': condition, 'cell_type': cell, 'chromosome': chroms[rows],
+            'start_position': starts[rows], 'end_position': ends[rows],
+            'entrez': gene_table['Entrez_ID'].to_numpy()[gene_idx], 'distance_to_tss': distance,
+        }))
+
+        # Unique (TF, merged CRE) pairs: oversample with replacement, dedupe, trim
+        rng = table_rng(seed, f"cre_tfs/{scope_key}")
+        wanted = min(tf_hits_per_scope, len(in_scope) * len(tf_names))
+        keys = np.unique(rng.integers(0, len(in_scope) * len(tf_names), size=int(wanted * 1.1) + 16))
+        keys = rng.permutation(keys)[:wanted]
+        keys.sort()
+        hit_merged = in_scope[keys // len(tf_names)]
+        tf_frames.append((condition, cell, hit_merged, keys % len(tf_names)))
+
+    save('differential_expression', de_frames,
+         ('entrez', 'condition_name', 'cell_type', 'baseMean', 'log2foldchange', 'p_value', 'padj'))
+    save('cres', (chunk for frame in cre_frames for chunk in chunks(frame)),
+         ('condition_name', 'cell_type', 'chromosome', 'start_position', 'end_position',
+          'cre_log2foldchange', 'merged_chromosome', 'merged_start_position', 'merged_end_position'))
+    save('cre_genes', (chunk for frame in cre_gene_frames for chunk in chunks(frame)),
+         ('condition_name', 'cell_type', 'chromosome', 'start_position', 'end_position', 'entrez',
+          'distance_to_tss'))
+
+    tf_array = np.array(tf_names)
+
+    def tf_hit_frames():
+        for condition, cell, hit_merged, hit_tf in tf_frames:
+            for start in range(0, len(hit_merged), CSV_CHUNK_ROWS):
+                block = hit_merged[start:start + CSV_CHUNK_ROWS]
+                yield pd.DataFrame({
+                    'merged_chromosome': merged_chrom[block],
+                    'merged_start_position': merged_start[block],
+                    'merged_end_position': merged_end[block],
+                    'transcription_factor': tf_array[hit_tf[start:start + CSV_CHUNK_ROWS]],
+                    'condition_name': condition, 'cell_type': cell,
+                })
+
+    save('cre_tfs', tf_hit_frames(),
+         ('merged_chromosome', 'merged_start_position', 'merged_end_position', 'transcription_factor',
+          'condition_name', 'cell_type'))
+
+    with open(os.path.join(output, 'manifest.json'), 'w') as handle:
+        json.dump({name: f"{name}.csv" for name in written}, handle, indent=2)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic AD database for load_data.py.")
+    parser.add_argument('output', help='directory for the CSVs and manifest.json')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiplies the merged CRE, CRE and TF-hit counts')
+    parser.add_argument('--conditions', type=int, default=2)
+    parser.add_argument('--cell-types', type=int, default=2)
+    parser.add_argument('--genes', type=int, default=23000, help='synthetic gene count')
+    parser.add_argument('--genes-from', metavar='CSV',
+                        help='use real gene coordinates instead (e.g. genes/ifnb_wtc11_genes.csv)')
+    parser.add_argument('--merged-cres', type=int, default=200_000)
+    parser.add_argument('--cres-per-scope', type=int, default=100_000,
+                        help='CREs per condition/cell type')
+    parser.add_argument('--genes-per-cre', type=int, default=2, help='nearest genes linked to each CRE')
+    parser.add_argument('--tfs', type=int, default=300)
+    parser.add_argument('--tf-hits-per-scope', type=int, default=1_000_000,
+                        help='TF-CRE rows per condition/cell type')
+    parser.add_argument('--pathways', type=int, default=2000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written = generate(args.output, seed=args.seed, conditions=args.conditions, cell_types=args.cell_types,
+                       genes=args.genes, genes_from=args.genes_from, merged_cres=args.merged_cres,
+                       cres_per_scope=args.cres_per_scope, genes_per_cre=args.genes_per_cre, tfs=args.tfs,
+                       tf_hits_per_scope=args.tf_hits_per_scope, pathways=args.pathways, scale=args.scale)
+    print(f"Wrote {sum(written.values()):,} rows to {args.output} in {time.perf_counter() - start:.1f}s; "
+          f"load with: python load_data.py {os.path.join(args.output, 'manifest.json')}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
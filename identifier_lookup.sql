@@ -0,0 +1,34 @@
+-- Rebuild Identifier_Lookup, the normalized identifier -> gid/tfid table that
+-- app/identifiers.py loads into memory. Identifiers are stored upper-cased
+-- and Ensembl IDs without their version suffix, so lookups are plain equality
+-- on an indexed column. load_data.py runs this after every load:
+--   SOURCE identifier_lookup.sql;
+
+DELETE FROM Identifier_Lookup;
+
+INSERT INTO Identifier_Lookup (kind, identifier, id_type, target_id)
+SELECT DISTINCT 'gene', UPPER(TRIM(gene_symbol)), 'hgnc', gid
+FROM Genes WHERE gene_symbol IS NOT NULL AND TRIM(gene_symbol) <> '';
+
+INSERT INTO Identifier_Lookup (kind, identifier, id_type, target_id)
+SELECT DISTINCT 'gene', UPPER(TRIM(Entrez_ID)), 'entrez', gid
+FROM Genes WHERE Entrez_ID IS NOT NULL AND TRIM(Entrez_ID) <> '';
+
+INSERT INTO Identifier_Lookup (kind, identifier, id_type, target_id)
+SELECT DISTINCT 'gene',
+       UPPER(CASE WHEN INSTR(TRIM(Ensembl_ID), '.') > 0
+                  THEN SUBSTR(TRIM(Ensembl_ID), 1, INSTR(TRIM(Ensembl_ID), '.') - 1)
+                  ELSE TRIM(Ensembl_ID) END),
+       'ensembl', gid
+FROM Genes WHERE Ensembl_ID IS NOT NULL AND TRIM(Ensembl_ID) <> '';
+
+-- Aliases that are also some gene's approved symbol stay out: the symbol wins
+INSERT INTO Identifier_Lookup (kind, identifier, id_type, target_id)
+SELECT DISTINCT 'gene', UPPER(TRIM(a.alias)), 'alias', a.gid
+FROM Gene_Aliases a
+WHERE TRIM(a.alias) <> ''
+  AND NOT EXISTS (SELECT 1 FROM Genes g WHERE g.gene_symbol = TRIM(a.alias));
+
+INSERT INTO Identifier_Lookup (kind, identifier, id_type, target_id)
+SELECT DISTINCT 'tf', UPPER(TRIM(name)), 'tf', tfid
+FROM Transcription_Factors;
@@ -0,0 +1,728 @@
+#!/usr/bin/env python3
+"""Bulk loader for the AD database, replacing the hand-edited inserting_data.sql.
+
+Takes a JSON manifest mapping input names to CSV files (paths are relative
+to the manifest), for example:
+
+    {
+      "genes": "Tables/combined_genes.csv",
+      "cell_types": "Tables/cell_type.csv",
+      "conditions": "Tables/conditions.csv",
+      "merged_cres": "Tables/merged_cres.csv",
+      "tfs": "Tables/tfs.csv",
+      "pathways": "Tables/pathways.csv",
+      "differential_expression": "Tables/combined_de.csv",
+      "cres": "Tables/unique_cres.csv",
+      "cre_genes": "Tables/unique_cres_genes.csv",
+      "gene_pathways": "Tables/filtered_gene_pathways.csv",
+      "cre_tfs": "Tables/merged_cre_tf.csv",
+      "gene_aliases": "Tables/gene_aliases.csv"
+    }
+
+Every CSV has a header row and the column order listed in STAGING_TABLES.
+Inputs left out of the manifest are not touched.
+
+    python load_data.py manifest.json                      # MariaDB, settings from DB_* env vars
+    python load_data.py manifest.json --sqlite local.db    # SQLite stand-in
+    python load_data.py manifest.json --condition AD --cell-type microglia
+
+Steps: CSVs are loaded into stg_* staging tables in parallel, and dimension
+tables are upserted on their unique key (existing ids are kept, other
+columns take the staged values; rows with a NULL key are skipped and
+counted). Fact tables are replaced in one transaction, either everything
+or just one condition/cell type. The loader's
+secondary indexes are rebuilt after the data is in. Pathway_DE_Summary and
+Identifier_Lookup are rebuilt and Data_Version is bumped so the web app
+drops its caches.
+"""
+
+import argparse
+import csv
+import getpass
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+try:
+    import mariadb
+except ImportError:  # pragma: no cover - only needed for the MariaDB target
+    mariadb = None
+
+PATHWAY_SUMMARY_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pathway_summary.sql')
+IDENTIFIER_LOOKUP_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'identifier_lookup.sql')
+
+# Input name -> (staging table, CSV columns in file order)
+STAGING_TABLES = {
+    'genes': ('stg_genes', (
+        ('gene_symbol', 'VARCHAR(50)'), ('Ensembl_ID', 'VARCHAR(50)'), ('Entrez_ID', 'VARCHAR(50)'),
+        ('chromosome', 'VARCHAR(50)'), ('start_position', 'BIGINT'), ('end_position', 'BIGINT'),
+        ('strand', 'VARCHAR(1)'))),
+    'cell_types': ('stg_cell_types', (('cell', 'VARCHAR(30)'),)),
+    'conditions': ('stg_conditions', (('name', 'VARCHAR(100)'), ('disease_category', 'VARCHAR(100)'))),
+    'merged_cres': ('stg_merged_cres', (
+        ('chromosome', 'VARCHAR(50)'), ('start_position', 'BIGINT'), ('end_position', 'BIGINT'))),
+    'tfs': ('stg_tfs', (('name', 'VARCHAR(50)'),)),
+    'pathways': ('stg_pathways', (('name', 'VARCHAR(500)'),)),
+    'differential_expression': ('stg_differential_expression', (
+        ('entrez', 'VARCHAR(50)'), ('condition_name', 'VARCHAR(100)'), ('cell_type', 'VARCHAR(50)'),
+        ('baseMean', 'FLOAT'), ('log2foldchange', 'FLOAT'), ('p_value', 'DOUBLE'), ('padj', 'DOUBLE'))),
+    'cres': ('stg_cres', (
+        ('condition_name', 'VARCHAR(100)'), ('cell_type', 'VARCHAR(50)'), ('chromosome', 'VARCHAR(50)'),
+        ('start_position', 'BIGINT'), ('end_position', 'BIGINT'), ('cre_log2foldchange', 'FLOAT'),
+        ('merged_chromosome', 'VARCHAR(50)'), ('merged_start_position', 'BIGINT'),
+        ('merged_end_position', 'BIGINT'))),
+    'cre_genes': ('stg_cre_genes', (
+        ('condition_name', 'VARCHAR(100)'), ('cell_type', 'VARCHAR(50)'), ('chromosome', 'VARCHAR(50)'),
+        ('start_position', 'BIGINT'), ('end_position', 'BIGINT'), ('entrez', 'VARCHAR(50)'),
+        ('distance_to_tss', 'INT'))),
+    'gene_pathways': ('stg_gene_pathways', (('entrez', 'VARCHAR(50)'), ('pathway', 'VARCHAR(500)'))),
+    'cre_tfs': ('stg_cre_tfs', (
+        ('merged_chromosome', 'VARCHAR(50)'), ('merged_start_position', 'BIGINT'),
+        ('merged_end_position', 'BIGINT'), ('transcription_factor', 'VARCHAR(50)'),
+        ('condition_name', 'VARCHAR(100)'), ('cell_type', 'VARCHAR(50)'))),
+    'gene_aliases': ('stg_gene_aliases', (('entrez', 'VARCHAR(50)'), ('alias', 'VARCHAR(50)'))),
+}
+
+# Staging tables carrying a condition/cell type get a lookup index for scoped reloads
+SCOPED_INPUTS = ('differential_expression', 'cres', 'cre_genes', 'cre_tfs')
+
+# Dimension upserts: input -> (table, unique key, columns). Rows already present keep
+# their ids and get the staged values of their other columns; rows with a NULL key are skipped.
+DIMENSIONS = (
+    ('genes', 'Genes', ('Entrez_ID',), ('gene_symbol', 'Ensembl_ID', 'Entrez_ID', 'chromosome',
+                                        'start_position', 'end_position', 'strand')),
+    ('cell_types', 'Cell_Type', ('cell',), ('cell',)),
+    ('conditions', 'Conditions', ('name',), ('name', 'disease_category')),
+    ('merged_cres', 'Merged_CRES', ('chromosome', 'start_position', 'end_position'),
+     ('chromosome', 'start_position', 'end_position')),
+    ('tfs', 'Transcription_Factors', ('name',), ('name',)),
+    ('pathways', 'Biological_Pathways', ('name',), ('name',)),
+)
+
+CONDITION_JOIN = ('Conditions c', 'c.name = i.condition_name', 'c.cdid')
+CELL_TYPE_JOIN = ('Cell_Type ct', 'ct.cell = i.cell_type', 'ct.cell_id')
+
+# Fact tables in insert order. Each join is (table alias, ON clause, key that is NULL when unmatched).
+FACTS = (
+    {
+        'input': 'differential_expression',
+        'table': 'Differential_Expression',
+        'columns': ('gid', 'cdid', 'cell_id', 'baseMean', 'log2foldchange', 'p_value', 'padj'),
+        'select': ('g.gid', 'c.cdid', 'ct.cell_id', 'i.baseMean', 'i.log2foldchange', 'i.p_value', 'i.padj'),
+        'joins': (('Genes g', 'g.Entrez_ID = i.entrez', 'g.gid'), CONDITION_JOIN, CELL_TYPE_JOIN),
+        'delete': ("DELETE FROM Differential_Expression",),
+        'delete_scoped': ("DELETE FROM Differential_Expression WHERE cdid = ? AND cell_id = ?",),
+    },
+    {
+        'input': 'cres',
+        'table': 'Cis_Regulatory_Elements',
+        'columns': ('cdid', 'cell_id', 'chromosome', 'start_position', 'end_position',
+                    'cre_log2foldchange', 'mcid'),
+        'select': ('c.cdid', 'ct.cell_id', 'i.chromosome', 'i.start_position', 'i.end_position',
+                   'i.cre_log2foldchange', 'mc.mcid'),
+        'joins': (CONDITION_JOIN, CELL_TYPE_JOIN,
+                  ('Merged_CRES mc', 'mc.chromosome = i.merged_chromosome'
+                                     ' AND mc.start_position = i.merged_start_position'
+                                     ' AND mc.end_position = i.merged_end_position', 'mc.mcid')),
+        # CRE ids change on reload, so their gene links go with them
+        'delete': ("DELETE FROM CRE_Gene_Interactions",
+                   "DELETE FROM Cis_Regulatory_Elements"),
+        'delete_scoped': ("DELETE FROM CRE_Gene_Interactions WHERE cid IN "
+                          "(SELECT cid FROM Cis_Regulatory_Elements WHERE cdid = ? AND cell_id = ?)",
+                          "DELETE FROM Cis_Regulatory_Elements WHERE cdid = ? AND cell_id = ?"),
+    },
+    {
+        'input': 'cre_genes',
+        'table': 'CRE_Gene_Interactions',
+        'columns': ('cid', 'gid', 'distance_to_TSS'),
+        'select': ('cre.cid', 'g.gid', 'i.distance_to_tss'),
+        'joins': (('Genes g', 'g.Entrez_ID = i.entrez', 'g.gid'), CONDITION_JOIN, CELL_TYPE_JOIN,
+                  ('Cis_Regulatory_Elements cre', 'cre.chromosome = i.chromosome'
+                                                  ' AND cre.start_position = i.start_position'
+                                                  ' AND cre.end_position = i.end_position'
+                                                  ' AND cre.cdid = c.cdid AND cre.cell_id = ct.cell_id',
+                   'cre.cid')),
+        'delete': ("DELETE FROM CRE_Gene_Interactions",),
+        'delete_scoped': ("DELETE FROM CRE_Gene_Interactions WHERE cid IN "
+                          "(SELECT cid FROM Cis_Regulatory_Elements WHERE cdid = ? AND cell_id = ?)",),
+    },
+    {
+        'input': 'gene_pathways',
+        'table': 'Gene_Pathway_Associations',
+        'columns': ('gid', 'pid'),
+        'select': ('g.gid', 'p.pid'),
+        'joins': (('Genes g', 'g.Entrez_ID = i.entrez', 'g.gid'),
+                  ('Biological_Pathways p', 'p.name = i.pathway', 'p.pid')),
+        'delete': ("DELETE FROM Gene_Pathway_Associations",),
+        'delete_scoped': None,   # not condition specific; only replaced by a full load
+    },
+    {
+        'input': 'cre_tfs',
+        'table': 'TF_CRE_Interactions',
+        'columns': ('tfid', 'mcid', 'cdid', 'cell_id'),
+        'select': ('tf.tfid', 'mc.mcid', 'c.cdid', 'ct.cell_id'),
+        'joins': (('Transcription_Factors tf', 'tf.name = i.transcription_factor', 'tf.tfid'),
+                  CONDITION_JOIN, CELL_TYPE_JOIN,
+                  ('Merged_CRES mc', 'mc.chromosome = i.merged_chromosome'
+                                     ' AND mc.start_position = i.merged_start_position'
+                                     ' AND mc.end_position = i.merged_end_position', 'mc.mcid')),
+        'delete': ("DELETE FROM TF_CRE_Interactions",),
+        'delete_scoped': ("DELETE FROM TF_CRE_Interactions WHERE cdid = ? AND cell_id = ?",),
+    },
+    {
+        'input': 'gene_aliases',
+        'table': 'Gene_Aliases',
+        'columns': ('gid', 'alias'),
+        'select': ('g.gid', 'i.alias'),
+        'joins': (('Genes g', 'g.Entrez_ID = i.entrez', 'g.gid'),),
+        'delete': ("DELETE FROM Gene_Aliases",),
+        'delete_scoped': None,   # not condition specific; only replaced by a full load
+    },
+)
+
+# Reloading CREs renumbers them, which orphans any CRE-gene links not reloaded alongside
+REQUIRED_WITH = {'cres': 'cre_genes'}
+
+# Secondary indexes on the fact tables: dropped before a full load, built once the data is in.
+# Keep in step with the covering indexes of migrations/001_covering_indexes.sql.
+SECONDARY_INDEXES = (
+    ('idx_cre_chromosome_start_end', 'Cis_Regulatory_Elements',
+     ('chromosome', 'start_position', 'end_position', 'cdid', 'cell_id')),
+    ('idx_de_scope_padj', 'Differential_Expression',
+     ('cdid', 'cell_id', 'padj', 'log2foldchange', 'p_value')),
+    ('idx_cre_scope_position', 'Cis_Regulatory_Elements',
+     ('cdid', 'cell_id', 'chromosome', 'start_position', 'end_position', 'cre_log2foldchange', 'mcid')),
+    ('idx_tci_mcid_scope', 'TF_CRE_Interactions', ('mcid', 'cdid', 'cell_id', 'tfid')),
+    ('idx_cgi_cid_gid', 'CRE_Gene_Interactions', ('cid', 'gid', 'distance_to_TSS')),
+)
+
+# Values treated as SQL NULL in the CSVs (R writes NA)
+NULL_TOKENS = ('', 'NA')
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Genes (
+    gid INTEGER PRIMARY KEY AUTOINCREMENT,
+    gene_symbol VARCHAR(50), Ensembl_ID VARCHAR(50), Entrez_ID VARCHAR(50) UNIQUE,
+    chromosome VARCHAR(50), start_position BIGINT, end_position BIGINT, strand VARCHAR(1));
+CREATE TABLE IF NOT EXISTS Cell_Type (
+    cell_id INTEGER PRIMARY KEY AUTOINCREMENT, cell VARCHAR(30) NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS Conditions (
+    cdid INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(100) NOT NULL UNIQUE,
+    disease_category VARCHAR(100));
+CREATE TABLE IF NOT EXISTS Differential_Expression (
+    gid INT NOT NULL REFERENCES Genes(gid), cdid INT NOT NULL REFERENCES Conditions(cdid),
+    cell_id INT NOT NULL REFERENCES Cell_Type(cell_id),
+    baseMean FLOAT, log2foldchange FLOAT, p_value DOUBLE, padj DOUBLE,
+    PRIMARY KEY (gid, cdid, cell_id));
+CREATE TABLE IF NOT EXISTS Merged_CRES (
+    mcid INTEGER PRIMARY KEY AUTOINCREMENT,
+    chromosome VARCHAR(50), start_position BIGINT, end_position BIGINT,
+    UNIQUE (chromosome, start_position, end_position));
+CREATE TABLE IF NOT EXISTS Cis_Regulatory_Elements (
+    cid INTEGER PRIMARY KEY AUTOINCREMENT,
+    cdid INT NOT NULL REFERENCES Conditions(cdid), cell_id INT NOT NULL REFERENCES Cell_Type(cell_id),
+    chromosome VARCHAR(50), start_position BIGINT, end_position BIGINT, cre_log2foldchange FLOAT,
+    mcid INT NOT NULL REFERENCES Merged_CRES(mcid),
+    UNIQUE (cdid, cell_id, chromosome, start_position, end_position));
+CREATE TABLE IF NOT EXISTS Transcription_Factors (
+    tfid INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(50) NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS CRE_Gene_Interactions (
+    cid INT NOT NULL REFERENCES Cis_Regulatory_Elements(cid), gid INT NOT NULL REFERENCES Genes(gid),
+    distance_to_TSS INT, PRIMARY KEY (gid, cid));
+CREATE TABLE IF NOT EXISTS TF_CRE_Interactions (
+    tfid INT NOT NULL REFERENCES Transcription_Factors(tfid), mcid INT NOT NULL REFERENCES Merged_CRES(mcid),
+    cdid INT NOT NULL REFERENCES Conditions(cdid), cell_id INT NOT NULL REFERENCES Cell_Type(cell_id),
+    PRIMARY KEY (tfid, mcid, cdid, cell_id));
+CREATE TABLE IF NOT EXISTS Biological_Pathways (
+    pid INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(500) NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS Gene_Pathway_Associations (
+    gid INT NOT NULL REFERENCES Genes(gid), pid INT NOT NULL REFERENCES Biological_Pathways(pid),
+    PRIMARY KEY (gid, pid));
+CREATE TABLE IF NOT EXISTS Pathway_DE_Summary (
+    cdid INT NOT NULL, cell_id INT NOT NULL, pid INT NOT NULL,
+    gene_count INT NOT NULL, up_regulated INT NOT NULL, down_regulated INT NOT NULL,
+    avg_fold_change DOUBLE, min_padj DOUBLE, regulation_direction VARCHAR(4) NOT NULL,
+    PRIMARY KEY (cdid, cell_id, pid));
+CREATE INDEX IF NOT EXISTS idx_pathway_summary_top
+    ON Pathway_DE_Summary (cdid, cell_id, regulation_direction, min_padj);
+CREATE TABLE IF NOT EXISTS Gene_Aliases (
+    gid INT NOT NULL REFERENCES Genes(gid), alias VARCHAR(50) NOT NULL, PRIMARY KEY (gid, alias));
+CREATE TABLE IF NOT EXISTS Identifier_Lookup (
+    kind VARCHAR(4) NOT NULL, identifier VARCHAR(64) NOT NULL, id_type VARCHAR(8) NOT NULL,
+    target_id INT NOT NULL, PRIMARY KEY (kind, identifier, id_type, target_id));
+CREATE TABLE IF NOT EXISTS Data_Version (
+    id TINYINT NOT NULL PRIMARY KEY DEFAULT 1, version INT NOT NULL DEFAULT 0,
+    loaded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP);
+INSERT OR IGNORE INTO Data_Version (id, version) VALUES (1, 0);
+"""
+
+
+class LoadError(Exception):
+    """Raised for bad manifests or reload targets that do not exist."""
+
+
+class SQLiteBackend:
+    """Local SQLite stand-in for testing loads without a MariaDB server."""
+
+    name = 'sqlite'
+    insert_ignore = 'INSERT OR IGNORE'
+    # One writer per database file; parallel staging loads would only queue on the lock
+    parallel_staging = False
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=60)
+        conn.executescript(SQLITE_SCHEMA)
+        return conn
+
+    def disable_checks(self, cursor):
+        cursor.execute("PRAGMA foreign_keys = OFF")
+
+    def enable_checks(self, cursor):
+        pass
+
+    def drop_index(self, cursor, name, table):
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def upsert(self, table, keys, columns, select):
+        updates = ', '.join(f"{column} = excluded.{column}" for column in columns if column not in keys)
+        action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        return (f"INSERT INTO {table} ({', '.join(columns)}) {select} "
+                f"ON CONFLICT ({', '.join(keys)}) {action}")
+
+    def has_table(self, cursor, table):
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        return cursor.fetchone() is not None
+
+    def load_csv(self, conn, table, columns, path, batch_size=10000):
+        placeholders = ', '.join('?' for _ in columns)
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        cursor = conn.cursor()
+        with open(path, newline='') as handle:
+            reader = csv.reader(handle)
+            next(reader, None)
+            batch = []
+            for record in reader:
+                batch.append([None if value in NULL_TOKENS else value for value in record[:len(columns)]])
+                if len(batch) >= batch_size:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+        conn.commit()
+
+
+class MariaDBBackend:
+    """MariaDB target; staging tables are filled with LOAD DATA LOCAL INFILE."""
+
+    name = 'mariadb'
+    insert_ignore = 'INSERT IGNORE'
+    parallel_staging = True
+
+    def __init__(self, **connect_kwargs):
+        if mariadb is None:
+            raise LoadError("The mariadb package is required for MariaDB loads (or use --sqlite)")
+        self.connect_kwargs = connect_kwargs
+
+    def connect(self):
+        conn = mariadb.connect(local_infile=True, **self.connect_kwargs)
+        conn.autocommit = False
+        return conn
+
+    def disable_checks(self, cursor):
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+
+    def enable_checks(self, cursor):
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+    def drop_index(self, cursor, name, table):
+        cursor.execute(f"DROP INDEX IF EXISTS {name} ON {table}")
+
+    def upsert(self, table, keys, columns, select):
+        # A key-only table has nothing to update; assigning the key to itself keeps the row as is
+        updates = ', '.join(f"{column} = VALUES({column})" for column in columns if column not in keys)
+        return (f"INSERT INTO {table} ({', '.join(columns)}) {select} "
+                f"ON DUPLICATE KEY UPDATE {updates or f'{keys[0]} = {keys[0]}'}")
+
+    def has_table(self, cursor, table):
+        cursor.execute("SELECT 1 FROM information_schema.tables "
+                       "WHERE table_schema = DATABASE() AND table_name = ?", (table,))
+        return cursor.fetchone() is not None
+
+    def load_csv(self, conn, table, columns, path):
+        # Read into user variables so NA/empty become NULL and CRLF files load cleanly
+        variables = ', '.join(f"@c{i}" for i in range(len(columns)))
+        assignments = ', '.join(
+            f"{column} = NULLIF(NULLIF(TRIM(TRAILING '\\r' FROM @c{i}), ''), 'NA')"
+            for i, column in enumerate(columns))
+        quoted_path = path.replace('\\', '\\\\').replace("'", "\\'")
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE '{quoted_path}'
+            INTO TABLE {table}
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+            LINES TERMINATED BY '\\n'
+            IGNORE 1 ROWS
+            ({variables})
+            SET {assignments}
+        """)
+        conn.commit()
+
+
+class LoadReport:
+    """Per-stage timings and per-join row accounting, printed at the end of a load."""
+
+    def __init__(self):
+        self.stages = []     # (stage, seconds, detail)
+        self.tables = []     # per fact/dimension row accounting
+
+    @contextmanager
+    def stage(self, name, detail=''):
+        start = time.monotonic()
+        info = {'detail': detail}
+        yield info
+        elapsed = time.monotonic() - start
+        self.stages.append((name, elapsed, info['detail']))
+        print(f"  {name:<40} {elapsed:8.2f}s  {info['detail']}")
+
+    def as_dict(self):
+        return {
+            'stages': [{'stage': name, 'seconds': round(seconds, 3), 'detail': detail}
+                       for name, seconds, detail in self.stages],
+            'tables': self.tables,
+        }
+
+    def print_summary(self):
+        print("\nRow accounting:")
+        for entry in self.tables:
+            print(f"  {entry['table']}: {entry['staged']:,} staged -> {entry['inserted']:,} inserted")
+            for drop in entry.get('dropped_by_join', []):
+                if drop['rows']:
+                    print(f"      dropped {drop['rows']:>10,}  no match in {drop['join']} ON {drop['on']}")
+            if entry.get('duplicates'):
+                print(f"      ignored {entry['duplicates']:>10,}  duplicate keys")
+            if entry.get('null_keys'):
+                print(f"      skipped {entry['null_keys']:>10,}  NULL {entry['key']}")
+        total = sum(seconds for _, seconds, _ in self.stages)
+        print(f"\nTotal {total:.2f}s")
+
+
+def read_manifest(path):
+    """Manifest JSON -> {input name: absolute CSV path}, validated."""
+    with open(path) as handle:
+        manifest = json.load(handle)
+    if not isinstance(manifest, dict):
+        raise LoadError("Manifest must be a JSON object mapping input names to CSV paths")
+
+    unknown = sorted(set(manifest) - set(STAGING_TABLES))
+    if unknown:
+        raise LoadError(f"Unknown manifest inputs: {', '.join(unknown)} "
+                        f"(expected some of: {', '.join(STAGING_TABLES)})")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    files = {}
+    for name, csv_path in manifest.items():
+        full_path = csv_path if os.path.isabs(csv_path) else os.path.join(base_dir, csv_path)
+        if not os.path.isfile(full_path):
+            raise LoadError(f"{name}: file not found: {full_path}")
+        files[name] = full_path
+
+    for name, required in REQUIRED_WITH.items():
+        if name in files and required not in files:
+            raise LoadError(f"Reloading '{name}' also requires '{required}' in the manifest")
+    return files
+
+
+def load_staging_table(backend, name, path, scoped):
+    """(Re)create one staging table, fill it from its CSV and index it. Runs on its own connection."""
+    table, columns = STAGING_TABLES[name]
+    start = time.monotonic()
+    conn = backend.connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute(f"CREATE TABLE {table} ({', '.join(f'{col} {kind}' for col, kind in columns)})")
+        conn.commit()
+        backend.load_csv(conn, table, [col for col, _ in columns], path)
+        if scoped and name in SCOPED_INPUTS:
+            cursor.execute(f"CREATE INDEX idx_{table}_scope ON {table} (condition_name, cell_type)")
+            conn.commit()
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        rows = cursor.fetchone()[0]
+    finally:
+        conn.close()
+    return name, rows, time.monotonic() - start
+
+
+def scope_filter(scope):
+    """Conditions and params restricting a staging table (aliased i) to the reload scope."""
+    if scope is None:
+        return [], ()
+    return ["i.condition_name = ?", "i.cell_type = ?"], scope
+
+
+def where_clause(conditions):
+    return f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+
+def count_join_drops(cursor, staging_table, joins, conditions, params):
+    """Rows lost at each join, attributing a row to the first join it fails."""
+    drops = []
+    inner = ''
+    for alias, on_clause, key in joins:
+        where = where_clause(conditions + [f"{key} IS NULL"])
+        cursor.execute(f"SELECT COUNT(*) FROM {staging_table} i{inner} "
+                       f"LEFT JOIN {alias} ON {on_clause}{where}", params)
+        drops.append({'join': alias, 'on': on_clause, 'rows': cursor.fetchone()[0]})
+        inner += f" JOIN {alias} ON {on_clause}"
+    return drops
+
+
+def upsert_dimensions(backend, cursor, files, report):
+    """Upsert dimension rows from staging on their unique key; existing rows keep their ids."""
+    for name, table, keys, columns in DIMENSIONS:
+        if name not in files:
+            continue
+        staging_table = STAGING_TABLES[name][0]
+        keyed = ' AND '.join(f"{key} IS NOT NULL" for key in keys)
+        with report.stage(f"dimension:{table}") as info:
+            cursor.execute(f"SELECT COUNT(*), SUM(CASE WHEN {keyed} THEN 0 ELSE 1 END) FROM {staging_table}")
+            staged, rejected = cursor.fetchone()
+            rejected = int(rejected or 0)
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            before = cursor.fetchone()[0]
+            # Upsert rowcounts differ between backends, so new rows are counted directly
+            cursor.execute(backend.upsert(table, keys, columns,
+                                          f"SELECT {', '.join(columns)} FROM {staging_table} WHERE {keyed}"))
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            inserted = cursor.fetchone()[0] - before
+            info['detail'] = f"{staged:,} staged, {inserted:,} new, {staged - rejected - inserted:,} existing"
+            if rejected:
+                info['detail'] += f", {rejected:,} without {'/'.join(keys)} skipped"
+        report.tables.append({'table': table, 'staged': staged, 'inserted': inserted,
+                              'null_keys': rejected, 'key': '/'.join(keys)})
+
+
+def resolve_scope(cursor, condition, cell_type):
+    """(cdid, cell_id) for a scoped reload; both must exist after the dimension upsert."""
+    cursor.execute("SELECT cdid FROM Conditions WHERE name = ?", (condition,))
+    row = cursor.fetchone()
+    if row is None:
+        raise LoadError(f"Unknown condition '{condition}' (add it to the conditions CSV)")
+    cdid = row[0]
+    cursor.execute("SELECT cell_id FROM Cell_Type WHERE cell = ?", (cell_type,))
+    row = cursor.fetchone()
+    if row is None:
+        raise LoadError(f"Unknown cell type '{cell_type}' (add it to the cell_types CSV)")
+    return cdid, row[0]
+
+
+def replace_facts(backend, cursor, files, report, scope=None, scope_ids=None):
+    """Delete the facts being reloaded, then insert them from staging with per-join accounting."""
+    facts = [fact for fact in FACTS if fact['input'] in files]
+    if scope is not None:
+        skipped = [fact['input'] for fact in facts if fact['delete_scoped'] is None]
+        if skipped:
+            print(f"  skipping {', '.join(skipped)}: not condition specific, reloaded only by a full load")
+        facts = [fact for fact in facts if fact['delete_scoped'] is not None]
+
+    with report.stage("delete replaced facts") as info:
+        deleted = 0
+        for fact in reversed(facts):
+            statements = fact['delete'] if scope is None else fact['delete_scoped']
+            for sql in statements:
+                cursor.execute(sql, () if scope is None else scope_ids)
+                deleted += max(cursor.rowcount, 0)
+        info['detail'] = f"{deleted:,} rows"
+
+    conditions, params = scope_filter(scope)
+    where = where_clause(conditions)
+    for fact in facts:
+        staging_table = STAGING_TABLES[fact['input']][0]
+        joins = ''.join(f" JOIN {alias} ON {on_clause}" for alias, on_clause, _ in fact['joins'])
+        with report.stage(f"fact:{fact['table']}") as info:
+            cursor.execute(f"SELECT COUNT(*) FROM {staging_table} i{where}", params)
+            staged = cursor.fetchone()[0]
+            drops = count_join_drops(cursor, staging_table, fact['joins'], conditions, params)
+            cursor.execute(f"{backend.insert_ignore} INTO {fact['table']} ({', '.join(fact['columns'])}) "
+                           f"SELECT {', '.join(fact['select'])} FROM {staging_table} i{joins}{where}", params)
+            inserted = cursor.rowcount
+            dropped = sum(drop['rows'] for drop in drops)
+            info['detail'] = f"{staged:,} staged, {inserted:,} inserted, {dropped:,} dropped by joins"
+        report.tables.append({
+            'table': fact['table'],
+            'staged': staged,
+            'inserted': inserted,
+            'dropped_by_join': drops,
+            'duplicates': max(staged - dropped - inserted, 0),
+        })
+
+
+def pathway_summary_statements():
+    """Statements of pathway_summary.sql with @cdid/@cell_id turned into ? placeholders.
+
+    Returns (sql, [variable names in placeholder order]) pairs.
+    """
+    with open(PATHWAY_SUMMARY_SQL) as handle:
+        text = '\n'.join(line for line in handle if not line.lstrip().startswith('--'))
+    statements = []
+    for sql in text.split(';'):
+        if sql.strip():
+            variables = re.findall(r'@(cdid|cell_id)\b', sql)
+            statements.append((re.sub(r'@(cdid|cell_id)\b', '?', sql), variables))
+    return statements
+
+
+def rebuild_pathway_summary(cursor, scope_ids=None):
+    """Rebuild Pathway_DE_Summary for everything, or for one (cdid, cell_id)."""
+    values = {'cdid': None, 'cell_id': None}
+    if scope_ids is not None:
+        values['cdid'], values['cell_id'] = scope_ids
+    rows = 0
+    for sql, variables in pathway_summary_statements():
+        cursor.execute(sql, tuple(values[name] for name in variables))
+        rows = max(cursor.rowcount, 0)
+    return rows
+
+
+def rebuild_identifier_lookup(cursor):
+    """Rebuild Identifier_Lookup from the gene, alias and TF tables; returns the row count."""
+    with open(IDENTIFIER_LOOKUP_SQL) as handle:
+        text = '\n'.join(line for line in handle if not line.lstrip().startswith('--'))
+    for sql in text.split(';'):
+        if sql.strip():
+            cursor.execute(sql)
+    cursor.execute("SELECT COUNT(*) FROM Identifier_Lookup")
+    return cursor.fetchone()[0]
+
+
+def bump_data_version(cursor):
+    """Advance Data_Version so running web workers drop their cached results."""
+    cursor.execute("UPDATE Data_Version SET version = version + 1, loaded_at = CURRENT_TIMESTAMP WHERE id = 1")
+    if cursor.rowcount == 0:
+        cursor.execute("INSERT INTO Data_Version (id, version) VALUES (1, 1)")
+    cursor.execute("SELECT version FROM Data_Version WHERE id = 1")
+    return cursor.fetchone()[0]
+
+
+def run_load(backend, files, scope=None, workers=4, keep_staging=False):
+    """Load every input in ``files``; ``scope`` = (condition, cell type) limits fact replacement."""
+    report = LoadReport()
+    full_load = scope is None
+    staged_tables = [STAGING_TABLES[name][0] for name in files]
+    # Only the indexes of fact tables this load replaces are dropped and rebuilt
+    reloaded = {fact['table'] for fact in FACTS if fact['input'] in files}
+    indexes = [index for index in SECONDARY_INDEXES if index[1] in reloaded]
+
+    print(f"Loading {len(files)} input(s) into {backend.name}"
+          + ("" if full_load else f" for {scope[0]} / {scope[1]}"))
+
+    conn = backend.connect()
+    cursor = conn.cursor()
+    try:
+        with report.stage("staging (total)") as info:
+            workers = workers if backend.parallel_staging else 1
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                futures = [pool.submit(load_staging_table, backend, name, path, not full_load)
+                           for name, path in files.items()]
+                loaded = [future.result() for future in futures]
+            for name, rows, seconds in loaded:
+                report.stages.append((f"staging:{name}", seconds, f"{rows:,} rows"))
+                print(f"    staging:{name:<31} {seconds:8.2f}s  {rows:,} rows")
+            info['detail'] = f"{len(loaded)} table(s), {workers} worker(s)"
+
+        backend.disable_checks(cursor)
+        if full_load:
+            with report.stage("drop secondary indexes") as info:
+                info['detail'] = f"{len(indexes)} index(es)"
+                for name, table, _ in indexes:
+                    backend.drop_index(cursor, name, table)
+                conn.commit()
+
+        # Dimensions, facts, summary and version change become visible together
+        upsert_dimensions(backend, cursor, files, report)
+        scope_ids = None if full_load else resolve_scope(cursor, *scope)
+        replace_facts(backend, cursor, files, report, scope=scope, scope_ids=scope_ids)
+
+        with report.stage("pathway summary") as info:
+            info['detail'] = f"{rebuild_pathway_summary(cursor, scope_ids):,} rows"
+        with report.stage("identifier lookup") as info:
+            if backend.has_table(cursor, 'Identifier_Lookup'):
+                info['detail'] = f"{rebuild_identifier_lookup(cursor):,} rows"
+            else:
+                info['detail'] = "skipped: run migrate.py to create Identifier_Lookup"
+        with report.stage("bump data version") as info:
+            info['detail'] = f"version {bump_data_version(cursor)}"
+        with report.stage("commit"):
+            conn.commit()
+
+        with report.stage("build secondary indexes") as info:
+            info['detail'] = f"{len(indexes)} index(es)"
+            for name, table, columns in indexes:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+            conn.commit()
+        backend.enable_checks(cursor)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if not keep_staging:
+            for table in staged_tables:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.commit()
+        conn.close()
+
+    report.print_summary()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load AD database CSVs from a manifest.")
+    parser.add_argument('manifest', help='JSON manifest mapping input names to CSV paths')
+    parser.add_argument('--sqlite', metavar='PATH', help='load into a SQLite file instead of MariaDB')
+    parser.add_argument('--host', default=os.environ.get('DB_HOST', 'bioed-new.bu.edu'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('DB_PORT', 4253)))
+    parser.add_argument('--database', default=os.environ.get('DB_NAME', 'Team7'))
+    parser.add_argument('--user', default=os.environ.get('DB_USER', ''))
+    parser.add_argument('--condition', help='reload only this condition (requires --cell-type)')
+    parser.add_argument('--cell-type', help='reload only this cell type (requires --condition)')
+    parser.add_argument('--workers', type=int, default=4, help='parallel staging loads (MariaDB only)')
+    parser.add_argument('--keep-staging', action='store_true', help='leave stg_* tables for inspection')
+    parser.add_argument('--report-json', metavar='PATH', help='also write the load report as JSON')
+    args = parser.parse_args()
+
+    if bool(args.condition) != bool(args.cell_type):
+        parser.error("--condition and --cell-type must be given together")
+
+    try:
+        files = read_manifest(args.manifest)
+        if args.sqlite:
+            backend = SQLiteBackend(args.sqlite)
+        else:
+            password = os.environ.get('DB_PASSWORD')
+            if password is None:
+                password = getpass.getpass(f"Password for {args.user}@{args.host}: ")
+            backend = MariaDBBackend(host=args.host, port=args.port, database=args.database,
+                                     user=args.user, password=password)
+        scope = (args.condition, args.cell_type) if args.condition else None
+        report = run_load(backend, files, scope=scope, workers=args.workers,
+                          keep_staging=args.keep_staging)
+    except LoadError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.report_json:
+        with open(args.report_json, 'w') as handle:
+            json.dump(report.as_dict(), handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
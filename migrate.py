@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Versioned schema migrations for the AD database.
+
+Migrations are migrations/NNN_description.sql files, applied in version
+order on top of AD_database_tables.sql. Each applied migration is recorded
+in Schema_Migrations with a checksum of its file, so a migration edited
+after it ran is reported instead of being silently skipped.
+
+MariaDB commits DDL statements immediately. A migration is therefore
+recorded only once all of its statements have succeeded. Write statements
+that are safe to re-run (CREATE INDEX IF NOT EXISTS, ...) so that a
+migration which failed part way can simply be applied again.
+
+A ``SOURCE file.sql;`` statement runs the statements of a SQL file at the
+repository root that load_data.py also uses, such as identifier_lookup.sql,
+so the two never need separate copies. Only the migration file itself is
+checksummed.
+
+    python migrate.py                      # apply pending migrations, settings from DB_* env vars
+    python migrate.py --status             # list applied and pending migrations
+    python migrate.py --dry-run            # print the pending SQL without running it
+    python migrate.py --sqlite local.db    # the SQLite stand-in written by load_data.py --sqlite
+"""
+
+import argparse
+import getpass
+import hashlib
+import os
+import re
+import sys
+import time
+
+from load_data import LoadError, MariaDBBackend, SQLiteBackend
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MIGRATIONS_DIR = os.path.join(ROOT, 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{3})_(\w+)\.sql$')
+SOURCE_STATEMENT = re.compile(r'^SOURCE\s+([\w.-]+\.sql)$', re.IGNORECASE)
+
+SCHEMA_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS Schema_Migrations (
+    version INT NOT NULL PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)
+"""
+
+
+class MigrationError(Exception):
+    """Raised for malformed migration files or applied migrations that have changed."""
+
+
+class Migration:
+    """One migrations/NNN_description.sql file."""
+
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, 'rb') as handle:
+            self.text = handle.read().decode('utf-8')
+        self.checksum = hashlib.sha256(self.text.encode('utf-8')).hexdigest()
+
+    def statements(self):
+        """The file's statements, with comment lines dropped, split on ';' and SOURCE expanded."""
+        statements = []
+        for sql in split_statements(self.text):
+            source = SOURCE_STATEMENT.match(sql)
+            if source:
+                path = os.path.join(ROOT, source.group(1))
+                try:
+                    with open(path) as handle:
+                        statements.extend(split_statements(handle.read()))
+                except OSError as e:
+                    raise MigrationError(f"{os.path.basename(self.path)}: cannot read {path}: {e}") from e
+            else:
+                statements.append(sql)
+        return statements
+
+
+def split_statements(text):
+    """Statements of a SQL script, with comment lines dropped and split on ';'."""
+    text = '\n'.join(line for line in text.splitlines() if not line.lstrip().startswith('--'))
+    return [sql.strip() for sql in text.split(';') if sql.strip()]
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """Migrations in ``directory`` ordered by version."""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.sql'):
+            continue
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            raise MigrationError(f"{filename}: migration files must be named NNN_description.sql")
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(f"{filename}: version {version} is also used by "
+                                 f"{os.path.basename(migrations[version].path)}")
+        migrations[version] = Migration(version, match.group(2), os.path.join(directory, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def applied_migrations(cursor):
+    """version -> (name, checksum, applied_at) of every recorded migration."""
+    cursor.execute(SCHEMA_MIGRATIONS_TABLE)
+    cursor.execute("SELECT version, name, checksum, applied_at FROM Schema_Migrations")
+    return {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+
+
+def pending_migrations(migrations, applied):
+    """Migrations not yet applied; raises if an applied one no longer matches its file."""
+    changed = [m for m in migrations if m.version in applied and applied[m.version][1] != m.checksum]
+    if changed:
+        names = ', '.join(os.path.basename(m.path) for m in changed)
+        raise MigrationError(f"applied migrations were edited afterwards: {names}. "
+                             f"Add a new migration instead of changing one that has run.")
+    return [m for m in migrations if m.version not in applied]
+
+
+def apply_migration(conn, migration):
+    """Run every statement of ``migration`` and record it; returns the elapsed seconds."""
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    for sql in migration.statements():
+        try:
+            cursor.execute(sql)
+        except Exception as e:
+            conn.rollback()
+            raise MigrationError(f"{os.path.basename(migration.path)} failed: {e}\n{sql}") from e
+    cursor.execute("INSERT INTO Schema_Migrations (version, name, checksum) VALUES (?, ?, ?)",
+                   (migration.version, migration.name, migration.checksum))
+    conn.commit()
+    return time.perf_counter() - start
+
+
+def print_status(migrations, applied):
+    known = {m.version for m in migrations}
+    for migration in migrations:
+        state = f"applied {applied[migration.version][2]}" if migration.version in applied else "pending"
+        print(f"{migration.version:03d} {migration.name:<40} {state}")
+    for version in sorted(set(applied) - known):
+        print(f"{version:03d} {applied[version][0]:<40} applied, file missing")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations.")
+    parser.add_argument('--sqlite', metavar='PATH', help='migrate a SQLite file instead of MariaDB')
+    parser.add_argument('--host', default=os.environ.get('DB_HOST', 'bioed-new.bu.edu'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('DB_PORT', 4253)))
+    parser.add_argument('--database', default=os.environ.get('DB_NAME', 'Team7'))
+    parser.add_argument('--user', default=os.environ.get('DB_USER', ''))
+    parser.add_argument('--status', action='store_true', help='list migrations and exit')
+    parser.add_argument('--dry-run', action='store_true', help='print pending SQL without running it')
+    args = parser.parse_args()
+
+    try:
+        migrations = discover_migrations()
+        if args.sqlite:
+            backend = SQLiteBackend(args.sqlite)
+        else:
+            password = os.environ.get('DB_PASSWORD')
+            if password is None:
+                password = getpass.getpass(f"Password for {args.user}@{args.host}: ")
+            backend = MariaDBBackend(host=args.host, port=args.port, database=args.database,
+                                     user=args.user, password=password)
+
+        conn = backend.connect()
+        try:
+            applied = applied_migrations(conn.cursor())
+            conn.commit()
+            if args.status:
+                print_status(migrations, applied)
+                return 0
+
+            pending = pending_migrations(migrations, applied)
+            if not pending:
+                print("Schema is up to date")
+                return 0
+            for migration in pending:
+                if args.dry_run:
+                    print(f"-- {os.path.basename(migration.path)}")
+                    print(';\n'.join(migration.statements()) + ';\n')
+                    continue
+                elapsed = apply_migration(conn, migration)
+                print(f"Applied {migration.version:03d} {migration.name} in {elapsed:.2f}s")
+        finally:
+            conn.close()
+    except (MigrationError, LoadError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,28 @@
+-- Covering indexes for the query shapes the web app runs on every request
+-- (execute_query, /volcano_plot, /fgsea_plot, /cre_gene_scatter) and for
+-- pathway_summary.sql. AD_database_tables.sql only has primary keys, a few
+-- uniques and the indexes InnoDB adds for single foreign-key columns.
+-- Check the plans with explain_routes.py before and after applying.
+
+-- DE rows of one condition/cell type, filtered on padj and |log2FC|. p_value
+-- is included so the volcano plot reads only this index (gid is in every
+-- secondary index as part of the primary key).
+CREATE INDEX IF NOT EXISTS idx_de_scope_padj
+    ON Differential_Expression (cdid, cell_id, padj, log2foldchange, p_value);
+
+-- CREs of one condition/cell type by position. cre_log2foldchange and mcid
+-- are included for the CRE tab, the scatter plot and the join to TF hits.
+-- The existing UNIQUE has the same prefix but not these two columns.
+CREATE INDEX IF NOT EXISTS idx_cre_scope_position
+    ON Cis_Regulatory_Elements (cdid, cell_id, chromosome, start_position, end_position,
+                                cre_log2foldchange, mcid);
+
+-- TF hits are joined on (mcid, cdid, cell_id). The primary key starts with
+-- tfid, so only a TF-name search could use it.
+CREATE INDEX IF NOT EXISTS idx_tci_mcid_scope
+    ON TF_CRE_Interactions (mcid, cdid, cell_id, tfid);
+
+-- The primary key (gid, cid) is clustered, so lookups by gid already cover
+-- distance_to_TSS. Plans that start from the CREs need the reverse lookup.
+CREATE INDEX IF NOT EXISTS idx_cgi_cid_gid
+    ON CRE_Gene_Interactions (cid, gid, distance_to_TSS);
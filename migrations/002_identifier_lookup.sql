@@ -0,0 +1,26 @@
+-- Identifier resolution without lower() on indexed columns. Identifier_Lookup
+-- maps every HGNC symbol, alias, Entrez ID, Ensembl ID (version dropped) and
+-- TF name, upper-cased, to its gid or tfid. The web app loads it into memory
+-- (app/identifiers.py) and filters searches on the integer keys.
+-- Gene_Aliases is filled from the loader's optional gene_aliases input.
+-- The lookup is filled here from identifier_lookup.sql, which load_data.py
+-- also runs after every load.
+
+CREATE TABLE IF NOT EXISTS Gene_Aliases (
+    gid INT NOT NULL,
+    alias VARCHAR(50) NOT NULL,
+    PRIMARY KEY (gid, alias));
+
+CREATE INDEX IF NOT EXISTS idx_gene_aliases_alias ON Gene_Aliases (alias);
+
+CREATE TABLE IF NOT EXISTS Identifier_Lookup (
+    kind VARCHAR(4) NOT NULL,          -- 'gene' or 'tf'
+    identifier VARCHAR(64) NOT NULL,   -- upper-cased, Ensembl version dropped
+    id_type VARCHAR(8) NOT NULL,       -- hgnc, alias, entrez, ensembl or tf
+    target_id INT NOT NULL,            -- gid or tfid
+    PRIMARY KEY (kind, identifier, id_type, target_id));
+
+-- Symbol lookups, such as the alias check in identifier_lookup.sql
+CREATE INDEX IF NOT EXISTS idx_genes_symbol ON Genes (gene_symbol);
+
+SOURCE identifier_lookup.sql;
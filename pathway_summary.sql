@@ -0,0 +1,44 @@
+-- Rebuild Pathway_DE_Summary, the per (condition, cell type, pathway) aggregate
+-- of significant DE genes that /fgsea_plot reads.
+--
+-- Set @cdid and @cell_id to rebuild a single condition/cell type after reloading
+-- it; leave them NULL to rebuild everything:
+--   SET @cdid = NULL; SET @cell_id = NULL;
+--   SOURCE pathway_summary.sql;
+
+DELETE FROM Pathway_DE_Summary
+WHERE (@cdid IS NULL OR cdid = @cdid)
+  AND (@cell_id IS NULL OR cell_id = @cell_id);
+
+-- One pass over the DE x pathway join. Each gene has one DE row per
+-- condition/cell type and one association per pathway, so COUNT(*) is the
+-- distinct gene count.
+INSERT INTO Pathway_DE_Summary (cdid, cell_id, pid, gene_count, up_regulated, down_regulated,
+                                avg_fold_change, min_padj, regulation_direction)
+SELECT
+  s.cdid,
+  s.cell_id,
+  s.pid,
+  s.gene_count,
+  s.up_regulated,
+  s.down_regulated,
+  s.avg_fold_change,
+  s.min_padj,
+  CASE WHEN s.up_regulated > s.down_regulated THEN 'up' ELSE 'down' END
+FROM (
+  SELECT
+    de.cdid,
+    de.cell_id,
+    gpa.pid,
+    COUNT(*) AS gene_count,
+    SUM(CASE WHEN de.log2foldchange > 0 THEN 1 ELSE 0 END) AS up_regulated,
+    SUM(CASE WHEN de.log2foldchange < 0 THEN 1 ELSE 0 END) AS down_regulated,
+    AVG(de.log2foldchange) AS avg_fold_change,
+    MIN(COALESCE(de.padj, 1)) AS min_padj
+  FROM Differential_Expression de
+  JOIN Gene_Pathway_Associations gpa ON gpa.gid = de.gid
+  WHERE de.padj < 0.05
+    AND (@cdid IS NULL OR de.cdid = @cdid)
+    AND (@cell_id IS NULL OR de.cell_id = @cell_id)
+  GROUP BY de.cdid, de.cell_id, gpa.pid
+) s;
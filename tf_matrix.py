@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Chunked parser for the wide TF x merged-CRE binding matrix.
+
+Replaces parse_merged_cres_faster in data_parsing.ipynb. The input
+(TFBSlog2FCsum_mergedCRE_...txt) is tab separated: chr, start, end, then one
+0/1 column per TF/cell line/condition. The output is the long table the
+loader reads as its cre_tfs input:
+
+    merged_chromosome, merged_start_position, merged_end_position,
+    transcription_factor, condition, cell_type
+
+The matrix is read a chunk of rows at a time with int8 value columns. Hits
+are pulled out with one np.nonzero per chunk and appended to the output, so
+peak memory depends on the chunk size, not the file size.
+
+    python tf_matrix.py TFBSlog2FCsum_mergedCRE_deAD_sigTF_top0.05dis_neat.txt merged_cre_tf.csv \\
+        --conditions IFN TREM2R47H TREM2KO xenot7d coculture
+
+    from tf_matrix import parse_tf_matrix
+"""
+
+import argparse
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+COORDINATE_COLUMNS = ('chr', 'start', 'end')
+OUTPUT_COLUMNS = ('merged_chromosome', 'merged_start_position', 'merged_end_position',
+                  'transcription_factor', 'condition', 'cell_type')
+
+# Cell type for columns named only <tf>-<condition>
+CONDITION_CELL_TYPES = {
+    'SORL1A528T': 'ESC', 'SORL1KO': 'ESC', 'TREM2R47H': 'ESC', 'TREM2KO': 'ESC',
+    'CD33': 'ESC', 'INPP5D': 'ESC',
+    'APOE4vs2': 'iPSC', 'APOE4vs3': 'iPSC', 'APOEKOvs2': 'iPSC', 'APOEKOvs3': 'iPSC',
+    'HIVactivated': 'iPSC', 'HIVlatent': 'iPSC',
+}
+
+# <tf>-<x>-<suffix> columns where x is part of the condition name (e.g. HIV-ACTvsLAT), all iPSC
+COMPOUND_CONDITION_SUFFIXES = {'ACTvsLAT': 'iPSC', 'CRISPR': 'iPSC', 'ACSL1': 'iPSC'}
+
+# Cell lines named in the matrix -> cell types used in the database
+CELL_LINE_TYPES = {'H1': 'ESC', 'WTC11': 'iPSC'}
+
+
+def normalise_column_name(name):
+    """Collapse the raw '<tf>_<stat>_<cell>-<condition>' header to '<tf>-<cell>-<condition>'."""
+    return re.sub(r'_(.*?)_', '-', name)
+
+
+def parse_column(name):
+    """(tf, cell_type, condition) for a matrix column, or None if the name does not parse."""
+    parts = normalise_column_name(name).split('-')
+    if len(parts) == 2:
+        tf, condition = parts
+        cell = CONDITION_CELL_TYPES.get(condition, 'Unknown')
+    elif len(parts) == 3:
+        tf, cell, condition = parts
+        if condition in COMPOUND_CONDITION_SUFFIXES:
+            cell, condition = COMPOUND_CONDITION_SUFFIXES[condition], f'{parts[1]}-{parts[2]}'
+    elif len(parts) == 4:
+        tf, cell, condition = f'{parts[0]}-{parts[1]}', parts[2], parts[3]
+    else:
+        return None
+    return tf.upper(), CELL_LINE_TYPES.get(cell, cell), condition
+
+
+def column_table(header, conditions=None):
+    """Value columns to read, with their parsed TF/cell type/condition.
+
+    Columns whose condition is not in ``conditions`` (when given) and columns
+    that do not parse are dropped here, so they are never read from disk.
+    """
+    wanted = set(conditions) if conditions else None
+    rows = []
+    for name in header:
+        if name in COORDINATE_COLUMNS:
+            continue
+        parsed = parse_column(name)
+        if parsed is None or (wanted is not None and parsed[2] not in wanted):
+            continue
+        rows.append((name,) + parsed)
+    return pd.DataFrame(rows, columns=['column', 'transcription_factor', 'cell_type', 'condition'])
+
+
+def iter_tf_hits(path, conditions=None, chunksize=20000):
+    """Yield long-form DataFrames (OUTPUT_COLUMNS) of the 1 entries, one per chunk of matrix rows."""
+    header = pd.read_csv(path, sep='\t', nrows=0).columns
+    columns = column_table(header, conditions)
+    value_columns = list(columns['column'])
+
+    # Label arrays indexed by value-column position; categoricals keep the output compact
+    labels = {name: pd.Categorical(columns[name]) for name in ('transcription_factor', 'condition', 'cell_type')}
+    dtypes = {'chr': 'category', 'start': np.int64, 'end': np.int64}
+    dtypes.update({name: np.int8 for name in value_columns})
+
+    reader = pd.read_csv(path, sep='\t', usecols=list(COORDINATE_COLUMNS) + value_columns,
+                         dtype=dtypes, chunksize=chunksize)
+    for chunk in reader:
+        values = chunk[value_columns].to_numpy()
+        rows, cols = np.nonzero(values == 1)
+        if len(rows) == 0:
+            continue
+        chromosomes = chunk['chr'].cat.rename_categories(
+            lambda chrom: str(chrom).replace('chr', ''))
+        yield pd.DataFrame({
+            'merged_chromosome': chromosomes.to_numpy()[rows],
+            'merged_start_position': chunk['start'].to_numpy()[rows],
+            'merged_end_position': chunk['end'].to_numpy()[rows],
+            'transcription_factor': pd.Categorical.from_codes(
+                labels['transcription_factor'].codes[cols], labels['transcription_factor'].categories),
+            'condition': pd.Categorical.from_codes(
+                labels['condition'].codes[cols], labels['condition'].categories),
+            'cell_type': pd.Categorical.from_codes(
+                labels['cell_type'].codes[cols], labels['cell_type'].categories),
+        })
+
+
+def parse_tf_matrix(path, output, conditions=None, chunksize=20000):
+    """Write the long TF-CRE table for ``path`` to ``output`` chunk by chunk; returns the row count."""
+    written = 0
+    with open(output, 'w', newline='') as handle:
+        handle.write(','.join(OUTPUT_COLUMNS) + '\n')
+        for hits in iter_tf_hits(path, conditions=conditions, chunksize=chunksize):
+            hits.to_csv(handle, header=False, index=False)
+            written += len(hits)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Melt the wide TF x merged-CRE matrix to long CSV.")
+    parser.add_argument('matrix', help='tab-separated TFBSlog2FCsum_mergedCRE_*.txt matrix')
+    parser.add_argument('output', help='CSV to write (the loader\'s cre_tfs input)')
+    parser.add_argument('--conditions', nargs='+', help='keep only these conditions')
+    parser.add_argument('--chunksize', type=int, default=20000, help='matrix rows per chunk')
+    args = parser.parse_args()
+
+    rows = parse_tf_matrix(args.matrix, args.output, conditions=args.conditions, chunksize=args.chunksize)
+    print(f"Wrote {rows:,} TF-CRE rows to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())